@@ -8,10 +8,12 @@ API Package - Основной пакет API endpoints для Legal Assistant
 """
 
 import logging
+import threading
 import time  # ДОБАВЛЕНО: импорт модуля time
-from typing import List, Dict, Any
-from fastapi import APIRouter, FastAPI
-from fastapi.routing import APIRoute
+from typing import TYPE_CHECKING, List, Dict, Any
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter, FastAPI
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +76,7 @@ class APIRegistry:
         self.routes_count = 0
         self.initialization_errors = []
     
-    def register_router(self, name: str, router: APIRouter, prefix: str = "", tags: List[str] = None):
+    def register_router(self, name: str, router: "APIRouter", prefix: str = "", tags: List[str] = None):
         """Регистрирует роутер в реестре"""
         try:
             self.routers[name] = {
@@ -102,6 +104,8 @@ class APIRegistry:
     
     def get_routes_summary(self) -> Dict[str, Any]:
         """Возвращает сводку по всем маршрутам"""
+        from fastapi.routing import APIRoute
+        
         total_routes = sum(info["routes_count"] for info in self.routers.values())
         
         routes_by_method = {}
@@ -229,9 +233,39 @@ def load_admin_routers():
         logger.error(f"❌ Error loading admin routers: {e}")
         api_registry.initialization_errors.append(f"Admin routers loading: {e}")
 
+# Роутеры загружаются при первом обращении (configure_fastapi_app, get_api_info),
+# а не при импорте пакета: импорт api.user.chat в тестах не тянет все роутеры
+_api_initialized = False
+_api_init_lock = threading.Lock()
+
+def ensure_api_initialized():
+    """Загружает роутеры и системный роутер один раз"""
+    global _api_initialized
+    if _api_initialized:
+        return
+    
+    with _api_init_lock:
+        if _api_initialized:
+            return
+        try:
+            initialize_api()
+            
+            # Регистрируем системный роутер
+            api_registry.register_router(
+                "system",
+                create_system_router(),
+                prefix="",
+                tags=["System"]
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ API package initialization failed: {e}")
+        _api_initialized = True
+
 def initialize_api():
     """Инициализирует все API компоненты"""
     logger.info("🚀 Initializing API package...")
+    started_at = time.perf_counter()
     
     # Загружаем роутеры
     load_user_routers()
@@ -240,7 +274,7 @@ def initialize_api():
     # Получаем сводку
     summary = api_registry.get_routes_summary()
     
-    logger.info(f"📊 API initialization completed:")
+    logger.info(f"📊 API initialization completed in {time.perf_counter() - started_at:.2f}s:")
     logger.info(f"   Total routers: {summary['total_routers']}")
     logger.info(f"   Total routes: {summary['total_routes']}")
     
@@ -251,8 +285,10 @@ def initialize_api():
     else:
         logger.info("✅ All routers loaded successfully")
 
-def configure_fastapi_app(app: FastAPI):
+def configure_fastapi_app(app: "FastAPI"):
     """Настраивает FastAPI приложение с зарегистрированными роутерами"""
+    ensure_api_initialized()
+    
     try:
         logger.info("🔧 Configuring FastAPI app with routers...")
         
@@ -283,6 +319,7 @@ def configure_fastapi_app(app: FastAPI):
 
 def get_api_info() -> Dict[str, Any]:
     """Возвращает информацию об API"""
+    ensure_api_initialized()
     summary = api_registry.get_routes_summary()
     
     return {
@@ -306,6 +343,9 @@ def get_api_info() -> Dict[str, Any]:
 
 def get_api_routes() -> List[Dict[str, Any]]:
     """Возвращает детальную информацию о всех маршрутах"""
+    from fastapi.routing import APIRoute
+    
+    ensure_api_initialized()
     routes_info = []
     
     for router_name, router_info in api_registry.get_all_routers().items():
@@ -329,7 +369,7 @@ def get_api_routes() -> List[Dict[str, Any]]:
     
     return routes_info
 
-def create_system_router() -> APIRouter:
+def create_system_router() -> "APIRouter":
     """Создает системный роутер с информацией об API"""
     from fastapi import APIRouter
     from fastapi.responses import JSONResponse
@@ -380,21 +420,12 @@ def create_system_router() -> APIRouter:
     
     return router
 
-# Автоматическая инициализация при импорте
-try:
-    initialize_api()
-    
-    # Регистрируем системный роутер
-    system_router = create_system_router()
-    api_registry.register_router(
-        "system",
-        system_router,
-        prefix="",
-        tags=["System"]
-    )
-    
-except Exception as e:
-    logger.error(f"❌ API package initialization failed: {e}")
+def __getattr__(name: str):
+    """system_router создается вместе с остальными роутерами при первом обращении"""
+    if name == "system_router":
+        ensure_api_initialized()
+        return (api_registry.get_router("system") or {}).get("router")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Экспорт основных компонентов
 __all__ = [
@@ -410,6 +441,7 @@ __all__ = [
     
     # Функции инициализации
     "initialize_api",
+    "ensure_api_initialized",
     "configure_fastapi_app",
     "load_user_routers",
     "load_admin_routers",
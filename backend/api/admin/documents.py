@@ -24,122 +24,98 @@ from models.responses import (
 )
 from app.dependencies import get_document_service, get_services_status, CHROMADB_ENABLED
 from app.config import settings, DOCUMENT_CATEGORIES
+from services.result_projection import parse_fields, preview, slice_content
 import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Максимум документов в одном запросе пакетного удаления
+MAX_BULK_DELETE = 1000
+
+# Поля списка документов по умолчанию: только метаданные, текст не читается
+LISTING_DEFAULT_FIELDS = ("metadata",)
+
 @router.get("/documents", response_model=DocumentsResponse)
 async def get_documents(
     category: Optional[str] = None,
     limit: Optional[int] = None,
     offset: Optional[int] = 0,
+    cursor: Optional[str] = None,
+    added_after: Optional[float] = None,
+    added_before: Optional[float] = None,
+    fields: Optional[str] = None,
     document_service = Depends(get_document_service)
 ):
-    """Получить детальный список всех документов с фильтрацией"""
+    """Получить страницу документов (новые первыми) с фильтрацией
+    
+    Пагинация по курсору: next_cursor ответа передается в cursor следующего запроса
+    (offset оставлен для совместимости). added_after/added_before - Unix timestamp.
+    fields - через запятую: snippet (превью текста), full_content, metadata.
+    По умолчанию только metadata: текст документов не читается, content пустой,
+    content_truncated показывает, что полный текст доступен через /documents/{id}.
+    """
+    try:
+        requested_fields = parse_fields(fields) if fields else LISTING_DEFAULT_FIELDS
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    page_size = min(limit or settings.DOCUMENTS_PAGE_SIZE, settings.DOCUMENTS_MAX_PAGE_SIZE)
+    if page_size < 1 or (offset or 0) < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    
     try:
-        logger.info(f"Getting documents with category={category}, limit={limit}, offset={offset}")
+        logger.info(f"Getting documents with category={category}, limit={page_size}, offset={offset}, cursor={cursor}")
         
-        if CHROMADB_ENABLED:
-            # ChromaDB версия
-            logger.info("Using ChromaDB for document retrieval")
-            documents = await document_service.get_all_documents()
-            
-            # Фильтрация по категории
-            if category and category != "all":
-                documents = [doc for doc in documents if doc.get("category") == category]
-            
-            # Пагинация
-            total_documents = len(documents)
-            if limit:
-                end_index = offset + limit
-                documents = documents[offset:end_index]
-            
-            # Форматируем для фронтенда
-            formatted_documents = []
-            for doc in documents:
-                formatted_doc = DocumentInfo(
-                    id=doc["id"],
-                    filename=doc["filename"],
-                    category=doc["category"],
-                    source="ChromaDB",
-                    original_url=doc.get("metadata", {}).get("original_url", "N/A"),
-                    content=doc["content"],
-                    size=doc["size"],
-                    word_count=doc["word_count"],
-                    chunks_count=doc["chunks_count"],
-                    added_at=doc["added_at"],
-                    metadata=doc["metadata"]
-                )
-                formatted_documents.append(formatted_doc)
-            
-            return DocumentsResponse(
-                documents=formatted_documents,
-                total=total_documents,
-                message=f"Found {len(formatted_documents)} documents (showing {len(formatted_documents)} of {total_documents})",
-                database_type="ChromaDB"
+        # Фильтры и порядок применяются сортированным индексом, читаются только строки страницы
+        try:
+            page = await document_service.list_documents(
+                limit=page_size,
+                cursor=cursor,
+                offset=offset or 0,
+                category=category if category and category != "all" else None,
+                added_after=added_after,
+                added_before=added_before,
+                include_content="snippet" in requested_fields or "full_content" in requested_fields
             )
-        
-        else:
-            # SimpleVectorDB версия
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            
-            logger.info(f"Using SimpleVectorDB: {db_file}")
-            
-            if not os.path.exists(db_file):
-                return DocumentsResponse(
-                    documents=[],
-                    total=0,
-                    message="No documents database found",
-                    database_type="SimpleVectorDB"
-                )
-            
-            with open(db_file, 'r', encoding='utf-8') as f:
-                raw_documents = json.load(f)
-            
-            # Фильтрация по категории
-            if category and category != "all":
-                raw_documents = [doc for doc in raw_documents if doc.get("category") == category]
-            
-            # Сортируем по времени добавления (новые первые)
-            raw_documents.sort(key=lambda x: x.get("added_at", 0), reverse=True)
-            
-            total_documents = len(raw_documents)
-            
-            # Пагинация
-            if limit:
-                end_index = offset + limit
-                raw_documents = raw_documents[offset:end_index]
-            
-            # Форматируем документы для frontend
-            formatted_documents = []
-            for doc in raw_documents:
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Форматируем документы для frontend
+        formatted_documents = []
+        for doc in page["documents"]:
+            if CHROMADB_ENABLED:
+                source = "ChromaDB"
+                original_url = doc["metadata"].get("original_url", "N/A")
+            else:
                 # Определяем источник по метаданным
                 source = _determine_document_source(doc)
                 original_url = _extract_original_url(doc)
-                
-                formatted_doc = DocumentInfo(
-                    id=doc["id"],
-                    filename=doc["filename"],
-                    category=doc["category"],
-                    source=source,
-                    original_url=original_url,
-                    content=doc["content"],
-                    size=doc["metadata"].get("content_length", len(doc["content"])),
-                    word_count=doc["metadata"].get("word_count", 0),
-                    chunks_count=len(doc.get("chunks", [])),
-                    added_at=doc.get("added_at", time.time()),
-                    metadata=doc["metadata"]
-                )
-                formatted_documents.append(formatted_doc)
             
-            return DocumentsResponse(
-                documents=formatted_documents,
-                total=total_documents,
-                message=f"Found {len(formatted_documents)} documents (showing {len(formatted_documents)} of {total_documents})",
-                database_type="SimpleVectorDB"
+            formatted_doc = DocumentInfo(
+                id=doc["id"],
+                filename=doc["filename"],
+                category=doc["category"],
+                source=source,
+                original_url=original_url,
+                size=doc["size"],
+                word_count=doc["word_count"],
+                chunks_count=doc["chunks_count"] or 1,
+                added_at=doc["added_at"] or 0.0,
+                **_project_listing(doc, requested_fields)
             )
+            formatted_documents.append(formatted_doc)
+        
+        return DocumentsResponse(
+            documents=formatted_documents,
+            total=page["total"],
+            next_cursor=page["next_cursor"],
+            message=f"Found {len(formatted_documents)} documents (showing {len(formatted_documents)} of {page['total']})",
+            database_type="ChromaDB" if CHROMADB_ENABLED else "SimpleVectorDB"
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get documents error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get documents: {str(e)}")
@@ -147,17 +123,24 @@ async def get_documents(
 @router.get("/documents/{doc_id}")
 async def get_document_by_id(
     doc_id: str,
+    offset: int = 0,
+    length: Optional[int] = None,
     document_service = Depends(get_document_service)
 ):
-    """Получить конкретный документ по ID"""
+    """Получить конкретный документ по ID
+    
+    offset/length - часть полного текста (по символам) для постраничного чтения больших документов
+    """
+    if offset < 0 or (length is not None and length < 0):
+        raise HTTPException(status_code=400, detail="offset and length must be non-negative")
+    
     try:
         decoded_id = urllib.parse.unquote(doc_id)
         logger.info(f"Getting document by ID: {decoded_id}")
         
         if CHROMADB_ENABLED:
-            # ChromaDB версия
-            documents = await document_service.get_all_documents()
-            document = next((doc for doc in documents if doc["id"] == decoded_id), None)
+            # ChromaDB версия: чтение одной записи коллекции
+            document = await document_service.get_document(decoded_id)
             
             if not document:
                 raise HTTPException(status_code=404, detail=f"Document with ID '{decoded_id}' not found")
@@ -168,24 +151,16 @@ async def get_document_by_id(
                 category=document["category"],
                 source="ChromaDB",
                 original_url=document.get("metadata", {}).get("original_url", "N/A"),
-                content=document["content"],
                 size=document["size"],
                 word_count=document["word_count"],
                 chunks_count=document["chunks_count"],
                 added_at=document["added_at"],
-                metadata=document["metadata"]
+                metadata=document["metadata"],
+                **_content_range(document["content"], offset, length)
             )
         else:
-            # SimpleVectorDB версия
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            
-            if not os.path.exists(db_file):
-                raise HTTPException(status_code=404, detail="Database not found")
-            
-            with open(db_file, 'r', encoding='utf-8') as f:
-                documents = json.load(f)
-            
-            document = next((doc for doc in documents if doc["id"] == decoded_id), None)
+            # SimpleVectorDB версия: чтение одной записи по индексу
+            document = await document_service.vector_db.get_document(decoded_id)
             
             if not document:
                 raise HTTPException(status_code=404, detail=f"Document with ID '{decoded_id}' not found")
@@ -199,12 +174,12 @@ async def get_document_by_id(
                 category=document["category"],
                 source=source,
                 original_url=original_url,
-                content=document["content"],
                 size=document["metadata"].get("content_length", len(document["content"])),
                 word_count=document["metadata"].get("word_count", 0),
                 chunks_count=len(document.get("chunks", [])),
                 added_at=document.get("added_at", time.time()),
-                metadata=document["metadata"]
+                metadata=document["metadata"],
+                **_content_range(document["content"], offset, length)
             )
         
     except HTTPException:
@@ -333,57 +308,41 @@ async def update_document(
         logger.info(f"Updating document: {decoded_id}")
         
         if CHROMADB_ENABLED:
-            # ChromaDB версия обновления
-            success = await document_service.update_document(
+            # ChromaDB версия: пересчитываются только эмбеддинги измененных чанков
+            new_metadata = dict(update_data.metadata or {})
+            if update_data.category:
+                new_metadata["category"] = update_data.category
+            
+            result = await document_service.update_document_incremental(
                 decoded_id, 
                 update_data.content, 
-                update_data.metadata
+                new_metadata
             )
             
-            if success:
+            if result["success"]:
                 return SuccessResponse(
                     message=f"Document '{decoded_id}' updated successfully",
-                    data={"updated_id": decoded_id}
+                    data={
+                        "updated_id": decoded_id,
+                        "chunks_total": result["chunks_total"],
+                        "chunks_reused": result["chunks_reused"],
+                        "chunks_embedded": result["chunks_embedded"],
+                        "chunks_deleted": result["chunks_deleted"]
+                    }
                 )
             else:
                 raise HTTPException(status_code=404, detail="Document not found or update failed")
         else:
-            # SimpleVectorDB версия - более сложная логика обновления
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            
-            if not os.path.exists(db_file):
-                raise HTTPException(status_code=404, detail="Database not found")
-            
-            with open(db_file, 'r', encoding='utf-8') as f:
-                documents = json.load(f)
-            
-            # Находим документ
-            doc_index = None
-            for i, doc in enumerate(documents):
-                if doc["id"] == decoded_id:
-                    doc_index = i
-                    break
+            # SimpleVectorDB версия
+            updated = await document_service.vector_db.update_document(decoded_id, {
+                "content": update_data.content,
+                "category": update_data.category,
+                "metadata": update_data.metadata
+            })
             
-            if doc_index is None:
+            if not updated:
                 raise HTTPException(status_code=404, detail="Document not found")
             
-            # Обновляем поля
-            if update_data.content:
-                documents[doc_index]["content"] = update_data.content
-                documents[doc_index]["metadata"]["content_length"] = len(update_data.content)
-                documents[doc_index]["metadata"]["word_count"] = len(update_data.content.split())
-                documents[doc_index]["metadata"]["updated_at"] = time.time()
-            
-            if update_data.category:
-                documents[doc_index]["category"] = update_data.category
-            
-            if update_data.metadata:
-                documents[doc_index]["metadata"].update(update_data.metadata)
-            
-            # Сохраняем
-            with open(db_file, 'w', encoding='utf-8') as f:
-                json.dump(documents, f, ensure_ascii=False, indent=2)
-            
             return SuccessResponse(
                 message=f"Document '{decoded_id}' updated successfully",
                 data={"updated_id": decoded_id}
@@ -421,43 +380,23 @@ async def delete_document(
         
         else:
             # SimpleVectorDB версия
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            
-            if not os.path.exists(db_file):
-                raise HTTPException(status_code=404, detail="Database not found")
-            
-            with open(db_file, 'r', encoding='utf-8') as f:
-                documents = json.load(f)
-            
-            original_count = len(documents)
-            found_doc = None
-            
-            # Поиск по точному совпадению ID
-            for doc in documents:
-                if doc['id'] == decoded_id:
-                    found_doc = doc
-                    break
+            vector_db = document_service.vector_db
+            found_doc = await vector_db.get_document(decoded_id)
             
             if not found_doc:
                 logger.warning(f"Document not found with ID: {decoded_id}")
-                logger.info(f"Available document IDs: {[doc['id'] for doc in documents[:3]]}")
                 raise HTTPException(status_code=404, detail=f"Document with ID '{decoded_id}' not found")
             
-            # Удаляем найденный документ
-            documents = [doc for doc in documents if doc['id'] != decoded_id]
-            
-            # Сохраняем обновленный список
-            with open(db_file, 'w', encoding='utf-8') as f:
-                json.dump(documents, f, ensure_ascii=False, indent=2)
-            
-            deleted_count = original_count - len(documents)
+            # Удаление дописывает tombstone в журнал
+            await vector_db.delete_document(decoded_id)
+            remaining = await vector_db.get_document_count()
             logger.info(f"Successfully deleted document: {found_doc['filename']}")
             
             return DocumentDeleteResponse(
                 message=f"Document '{found_doc['filename']}' deleted successfully",
                 deleted_id=decoded_id,
-                deleted_count=deleted_count,
-                remaining_documents=len(documents),
+                deleted_count=1,
+                remaining_documents=remaining,
                 database_type="SimpleVectorDB"
             )
         
@@ -472,41 +411,36 @@ async def delete_multiple_documents(
     document_ids: List[str],
     document_service = Depends(get_document_service)
 ):
-    """Удалить несколько документов"""
+    """Удалить несколько документов (одним пакетным удалением)"""
     try:
         if not document_ids:
             raise HTTPException(status_code=400, detail="No document IDs provided")
         
-        if len(document_ids) > 50:
-            raise HTTPException(status_code=400, detail="Cannot delete more than 50 documents at once")
+        if len(document_ids) > MAX_BULK_DELETE:
+            raise HTTPException(status_code=400, detail=f"Cannot delete more than {MAX_BULK_DELETE} documents at once")
         
         logger.info(f"Deleting {len(document_ids)} documents")
         
-        deleted_count = 0
-        failed_ids = []
-        
-        for doc_id in document_ids:
-            try:
-                decoded_id = urllib.parse.unquote(doc_id)
-                success = await document_service.delete_document(decoded_id)
-                if success:
-                    deleted_count += 1
-                else:
-                    failed_ids.append(doc_id)
-            except Exception as e:
-                logger.error(f"Failed to delete document {doc_id}: {e}")
-                failed_ids.append(doc_id)
-        
-        message = f"Successfully deleted {deleted_count}/{len(document_ids)} documents"
+        decoded_ids = {urllib.parse.unquote(doc_id): doc_id for doc_id in document_ids}
+        result = await document_service.delete_documents(list(decoded_ids))
+        
+        # Итог по каждому документу в ID, переданных клиентом
+        outcomes = {decoded_ids[doc_id]: status for doc_id, status in result["results"].items()}
+        failed_ids = [doc_id for doc_id, status in outcomes.items() if status != "deleted"]
+        
+        message = f"Successfully deleted {result['deleted']}/{len(document_ids)} documents"
         if failed_ids:
             message += f". Failed to delete: {failed_ids}"
         
         return SuccessResponse(
             message=message,
             data={
-                "deleted_count": deleted_count,
+                "deleted_count": result["deleted"],
                 "failed_count": len(failed_ids),
-                "failed_ids": failed_ids
+                "failed_ids": failed_ids,
+                "results": outcomes,
+                "records_deleted": result["records_deleted"],
+                "elapsed_seconds": result["elapsed_seconds"]
             }
         )
         
@@ -526,23 +460,8 @@ async def get_document_categories(
         stats = await document_service.get_stats()
         actual_categories = stats.get('categories', [])
         
-        # Подсчитываем документы по категориям
-        category_counts = {}
-        
-        if CHROMADB_ENABLED:
-            documents = await document_service.get_all_documents()
-            for doc in documents:
-                category = doc.get("category", "general")
-                category_counts[category] = category_counts.get(category, 0) + 1
-        else:
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            if os.path.exists(db_file):
-                with open(db_file, 'r', encoding='utf-8') as f:
-                    documents = json.load(f)
-                
-                for doc in documents:
-                    category = doc.get("category", "general")
-                    category_counts[category] = category_counts.get(category, 0) + 1
+        # Количество документов по категориям из каталога (без чтения коллекции)
+        category_counts = document_service.get_category_counts()
         
         # Формируем ответ
         categories_info = []
@@ -580,12 +499,7 @@ async def backup_documents(
         if CHROMADB_ENABLED:
             documents = await document_service.get_all_documents()
         else:
-            db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-            if os.path.exists(db_file):
-                with open(db_file, 'r', encoding='utf-8') as f:
-                    documents = json.load(f)
-            else:
-                documents = []
+            documents = await document_service.vector_db.get_all_documents()
         
         # Сохраняем бэкап
         backup_data = {
@@ -616,6 +530,22 @@ async def backup_documents(
 
 # Utility functions
 
+def _project_listing(doc: dict, fields) -> dict:
+    """Поля документа для списка: превью вместо полного текста, если full_content не запрошен"""
+    projected = {"metadata": doc["metadata"] if "metadata" in fields else {}}
+    content = doc.get("content")
+    if content is None:
+        # Строка без текста (только метаданные)
+        projected["content"] = ""
+        projected["content_truncated"] = doc["size"] > 0
+    elif "full_content" in fields:
+        projected["content"] = content
+    else:
+        projected["content"] = preview(content)
+        projected["content_truncated"] = projected["content"] != content
+    return projected
+
+
 def _determine_document_source(doc: dict) -> str:
     """Определяет источник документа по метаданным"""
     metadata = doc.get("metadata", {})
@@ -649,4 +579,10 @@ def _extract_original_url(doc: dict) -> str:
         if url_lines:
             return url_lines[0].replace('URL:', '').strip()
     
-    return "N/A"
\ No newline at end of file
+    return "N/A"
+
+def _content_range(content: str, offset: int, length: Optional[int]) -> dict:
+    """Часть текста документа с offset/length для DocumentInfo"""
+    part = slice_content(content, offset, length)
+    part["content_truncated"] = part["content_offset"] > 0 or part["has_more"]
+    return part
@@ -15,6 +15,7 @@ from typing import Optional, List, Dict, Any
 from models.responses import SuccessResponse
 from app.dependencies import get_llm_service, get_services_status
 from app.config import settings, get_llm_config, validate_llm_config
+from services.llm_scheduler import LLMOverloadedError, PRIORITY_ADMIN
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -157,7 +158,8 @@ async def test_llm_generation(
                 prompt=prompt,
                 model=test_model,
                 temperature=test_temperature,
-                max_tokens=test_max_tokens
+                max_tokens=test_max_tokens,
+                priority=PRIORITY_ADMIN  # Тестовые вызовы уступают пользовательскому чату
             )
             
             return {
@@ -189,6 +191,8 @@ async def test_llm_generation(
                 ]
             }
             
+    except LLMOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": e.retry_after_header})
     except Exception as e:
         logger.error(f"LLM test error: {e}")
         return {
@@ -202,7 +206,7 @@ async def test_llm_generation(
         }
 
 @router.get("/llm/usage-stats")
-async def get_llm_usage_stats():
+async def get_llm_usage_stats(llm_service = Depends(get_llm_service)):
     """Получить статистику использования LLM"""
     try:
         # Импортируем историю чатов для анализа
@@ -250,6 +254,8 @@ async def get_llm_usage_stats():
                 "average_response_time": avg_time
             },
             "models_usage": models_used,
+            "cache": llm_service.ollama.get_cache_stats() if hasattr(llm_service, 'ollama') else {"enabled": False},
+            "scheduler": llm_service.ollama.scheduler.get_stats() if hasattr(llm_service, 'ollama') else None,
             "recommendations": _get_usage_recommendations(ai_usage_rate, error_rate, avg_time)
         }
         
@@ -258,22 +264,27 @@ async def get_llm_usage_stats():
         raise HTTPException(status_code=500, detail=f"Failed to get usage stats: {str(e)}")
 
 @router.post("/llm/clear-cache")
-async def clear_llm_cache():
-    """Очистить кэш LLM (если реализован)"""
+async def clear_llm_cache(llm_service = Depends(get_llm_service)):
+    """Очистить кэш ответов LLM"""
     try:
-        # Пока что простая заглушка
-        # В будущем здесь может быть логика очистки кэша ответов
+        if not hasattr(llm_service, 'ollama'):
+            raise HTTPException(status_code=503, detail="Ollama service not available")
         
-        logger.info("🧹 LLM cache cleared")
+        removed = llm_service.ollama.clear_cache()
+        
+        logger.info(f"🧹 LLM cache cleared: {removed} entries removed")
         
         return SuccessResponse(
             message="LLM cache cleared successfully",
             data={
                 "cleared_at": time.time(),
-                "note": "Cache clearing functionality to be implemented"
+                "removed_entries": removed,
+                "cache": llm_service.ollama.get_cache_stats()
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error clearing cache: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to clear cache: {str(e)}")
@@ -339,7 +350,8 @@ async def run_llm_health_check(llm_service = Depends(get_llm_service)):
             test_response = await llm_service.ollama.generate_response(
                 prompt="Test prompt for health check",
                 model=settings.OLLAMA_DEFAULT_MODEL,
-                max_tokens=50
+                max_tokens=50,
+                priority=PRIORITY_ADMIN
             )
             
             health_results["checks"]["default_model"] = {
@@ -350,6 +362,11 @@ async def run_llm_health_check(llm_service = Depends(get_llm_service)):
                     "error": test_response.error
                 }
             }
+        except LLMOverloadedError as e:
+            health_results["checks"]["default_model"] = {
+                "status": "warn",
+                "details": {"error": str(e), "retry_after": e.retry_after}
+            }
         except Exception as e:
             health_results["checks"]["default_model"] = {
                 "status": "fail",
@@ -239,37 +239,17 @@ async def _analyze_document_categories(document_service):
         stats = await document_service.get_stats()
         categories = stats.get("categories", [])
         
-        # Если есть доступ к документам, анализируем их
-        category_counts = {}
-        
-        if CHROMADB_ENABLED:
-            try:
-                documents = await document_service.get_all_documents()
-                for doc in documents:
-                    category = doc.get("category", "unknown")
-                    category_counts[category] = category_counts.get(category, 0) + 1
-            except:
-                # Fallback к базовому списку категорий
-                for cat in categories:
-                    category_counts[cat] = 0
-        else:
-            # SimpleVectorDB версия
-            try:
-                import os, json
-                db_file = os.path.join(document_service.vector_db.persist_directory, "documents.json")
-                if os.path.exists(db_file):
-                    with open(db_file, 'r', encoding='utf-8') as f:
-                        documents = json.load(f)
-                    
-                    for doc in documents:
-                        category = doc.get("category", "unknown")
-                        category_counts[category] = category_counts.get(category, 0) + 1
-            except:
-                pass
+        # Счетчики поддерживаются каталогом документов, коллекция не читается
+        try:
+            category_counts = document_service.get_category_counts()
+        except Exception:
+            # Fallback к базовому списку категорий
+            category_counts = {cat: 0 for cat in categories}
         
         return {
             "total_categories": len(categories),
             "category_distribution": category_counts,
+            "catalog": stats.get("catalog") or stats.get("storage", {}).get("catalog"),
             "most_popular": max(category_counts, key=category_counts.get) if category_counts else None
         }
         
@@ -8,7 +8,9 @@ User Chat Endpoints - Пользовательские endpoints для чата
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import json
 import logging
 import time
 
@@ -16,6 +18,8 @@ from models.requests import ChatMessage, ChatHistoryRequest
 from models.responses import ChatResponse, ChatHistoryResponse, ChatHistoryItem
 from app.dependencies import get_document_service, get_llm_service
 from app.config import settings
+from services.llm_scheduler import LLMOverloadedError
+from services.single_flight import SingleFlight
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -23,6 +27,10 @@ logger = logging.getLogger(__name__)
 # Временное хранение для истории чатов
 chat_history: List[Dict[str, Any]] = []
 
+# Одинаковые одновременные вопросы выполняют поиск и генерацию один раз
+search_flights = SingleFlight("chat_search")
+answer_flights = SingleFlight("chat_answer")
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_assistant(
     message: ChatMessage,
@@ -31,27 +39,10 @@ async def chat_with_assistant(
 ):
     """Основной endpoint для чата с юридическим ассистентом с AI поддержкой"""
     try:
-        search_results = []
-        sources = []
-        
         # ====================================
         # ЭТАП 1: ПОИСК РЕЛЕВАНТНЫХ ДОКУМЕНТОВ
         # ====================================
-        try:
-            search_results = await document_service.search(
-                query=message.message,
-                limit=settings.MAX_CONTEXT_DOCUMENTS,  # Используем конфиг лимит
-                min_relevance=0.3  # Минимальный порог релевантности 30%
-            )
-            
-            # Формируем источники только из релевантных документов
-            sources = [result.get('filename', 'Unknown') for result in search_results]
-            
-            logger.info(f"🔍 Found {len(search_results)} relevant documents for query: '{message.message[:50]}...'")
-            
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            search_results = []
+        search_results, sources = await _find_context(message, document_service)
         
         # ====================================
         # ЭТАП 2: ГЕНЕРАЦИЯ AI ОТВЕТА
@@ -64,26 +55,16 @@ async def chat_with_assistant(
                 logger.info("🤖 Generating AI response based on found documents...")
                 
                 # Подготавливаем контекст для LLM
-                context_documents = []
-                for result in search_results:
-                    # Ограничиваем длину каждого документа
-                    content = result.get('content', '')
-                    if len(content) > settings.CONTEXT_TRUNCATE_LENGTH:
-                        content = content[:settings.CONTEXT_TRUNCATE_LENGTH] + "..."
-                    
-                    context_doc = {
-                        "filename": result.get('filename', 'Unknown'),
-                        "content": content,
-                        "relevance_score": result.get('relevance_score', 0.0),
-                        "metadata": result.get('metadata', {})
-                    }
-                    context_documents.append(context_doc)
+                context_documents = _build_context_documents(search_results)
                 
-                # Генерируем ответ через LLM
-                ai_response = await llm_service.answer_legal_question(
-                    question=message.message,
-                    context_documents=context_documents,
-                    language=message.language
+                # Генерируем ответ через LLM (один раз для одинаковых одновременных вопросов)
+                ai_response = await answer_flights.do(
+                    ("context", _flight_key(message)),
+                    lambda: llm_service.answer_legal_question(
+                        question=message.message,
+                        context_documents=context_documents,
+                        language=message.language
+                    )
                 )
                 
                 if ai_response.success and ai_response.content.strip():
@@ -99,6 +80,8 @@ async def chat_with_assistant(
                         message.message, search_results, message.language, ai_response.error
                     )
                     
+            except LLMOverloadedError:
+                raise
             except Exception as e:
                 logger.error(f"LLM generation error: {e}")
                 # Fallback если AI полностью недоступен
@@ -107,37 +90,15 @@ async def chat_with_assistant(
                 )
         else:
             # Нет релевантных документов - генерируем ответ об отсутствии информации
-            response_text = await _generate_no_context_response(
-                message.message, message.language, llm_service
+            response_text = await answer_flights.do(
+                ("no_context", _flight_key(message)),
+                lambda: _generate_no_context_response(message.message, message.language, llm_service)
             )
         
         # ====================================
         # ЭТАП 3: СОХРАНЕНИЕ В ИСТОРИЮ
         # ====================================
-        chat_entry = {
-            "message": message.message,
-            "response": response_text,
-            "language": message.language,
-            "sources": sources,
-            "timestamp": time.time(),
-            "search_stats": {
-                "found_documents": len(search_results),
-                "has_relevant_results": len(search_results) > 0,
-                "search_query": message.message
-            },
-            "ai_stats": {
-                "ai_used": ai_response is not None and ai_response.success,
-                "model": ai_response.model if ai_response else "fallback",
-                "tokens_used": ai_response.tokens_used if ai_response else 0,
-                "response_time": ai_response.response_time if ai_response else 0,
-                "error": ai_response.error if ai_response and not ai_response.success else None
-            }
-        }
-        chat_history.append(chat_entry)
-        
-        # Ограничиваем историю последними 100 сообщениями
-        if len(chat_history) > 100:
-            chat_history.pop(0)
+        _record_chat(message, response_text, sources, search_results, ai_response)
         
         # ====================================
         # ЭТАП 4: ЛОГИРОВАНИЕ РЕЗУЛЬТАТА
@@ -154,13 +115,233 @@ async def chat_with_assistant(
             sources=sources if sources else None
         )
         
+    except LLMOverloadedError as e:
+        logger.warning(f"💬 Chat rejected by LLM scheduler: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": e.retry_after_header})
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat service error: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_with_assistant_stream(
+    message: ChatMessage,
+    document_service = Depends(get_document_service),
+    llm_service = Depends(get_llm_service)
+):
+    """Потоковый чат (Server-Sent Events): сначала источники, затем токены ответа"""
+    started_at = time.time()
+    
+    # Очередь генераций заполнена - отклоняем до начала потока
+    if hasattr(llm_service, 'ollama'):
+        try:
+            llm_service.ollama.scheduler.check_admission()
+        except LLMOverloadedError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": e.retry_after_header})
+    
+    search_results, sources = await _find_context(message, document_service)
+    
+    return StreamingResponse(
+        _stream_chat_events(message, search_results, sources, llm_service, started_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_chat_events(message: ChatMessage, search_results: List[Dict], sources: List[str],
+                              llm_service, started_at: float) -> AsyncIterator[str]:
+    """Формирует SSE события потокового ответа и сохраняет историю по завершении"""
+    yield _sse_event("sources", {
+        "sources": sources,
+        "found_documents": len(sources)
+    })
+    
+    ai_response = None
+    parts: List[str] = []
+    first_token_at: Optional[float] = None
+    
+    if search_results:
+        context_documents = _build_context_documents(search_results)
+        header, footer = "", ""
+    else:
+        # Без контекста пробуем ответ на основе общих знаний
+        context_documents = []
+        header, footer = _general_knowledge_wrappers(message.language)
+    
+    try:
+        async for chunk in _stream_answer(llm_service, message.message, context_documents, message.language):
+            if chunk.done:
+                ai_response = chunk.response
+                break
+            
+            if first_token_at is None:
+                first_token_at = time.time() - started_at
+                if header:
+                    parts.append(header)
+                    yield _sse_event("token", {"content": header})
+            
+            parts.append(chunk.content)
+            yield _sse_event("token", {"content": chunk.content})
+    except LLMOverloadedError as e:
+        logger.warning(f"💬 Chat stream rejected by LLM scheduler: {e}")
+        yield _sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+        return
+    except Exception as e:
+        logger.error(f"LLM streaming error: {e}")
+    
+    if first_token_at is None:
+        # AI ничего не вернул - отдаем fallback ответ одним фрагментом
+        error = ai_response.error if ai_response else "LLM stream failed"
+        if search_results:
+            fallback_text = _generate_fallback_response_with_context(
+                message.message, search_results, message.language, error
+            )
+        else:
+            fallback_text = _no_context_fallback_text(message.message, message.language)
+        
+        first_token_at = time.time() - started_at
+        parts.append(fallback_text)
+        yield _sse_event("token", {"content": fallback_text})
+    elif footer and ai_response and ai_response.success:
+        parts.append(footer)
+        yield _sse_event("token", {"content": footer})
+    
+    response_text = "".join(parts).strip()
+    chat_entry = _record_chat(message, response_text, sources, search_results, ai_response,
+                              time_to_first_token=first_token_at)
+    
+    logger.info(f"💬 Chat stream completed: query='{message.message[:30]}...', "
+                f"sources={len(sources)}, TTFT={first_token_at:.2f}s, total={time.time() - started_at:.2f}s")
+    
+    yield _sse_event("done", {
+        "response": response_text,
+        "sources": sources if sources else None,
+        "ai_stats": chat_entry["ai_stats"],
+        "total_time": time.time() - started_at
+    })
+
+async def _stream_answer(llm_service, question: str, context_documents: List[Dict],
+                         language: str) -> AsyncIterator[Any]:
+    """Потоковый ответ LLM; сервисы без стриминга отдают ответ одним фрагментом"""
+    from services.llm_service import LLMStreamChunk
+    
+    if hasattr(llm_service, 'stream_legal_answer'):
+        async for chunk in llm_service.stream_legal_answer(
+            question=question,
+            context_documents=context_documents,
+            language=language
+        ):
+            yield chunk
+        return
+    
+    ai_response = await llm_service.answer_legal_question(
+        question=question,
+        context_documents=context_documents,
+        language=language
+    )
+    if ai_response.success and ai_response.content.strip():
+        yield LLMStreamChunk(content=ai_response.content)
+    yield LLMStreamChunk(content="", done=True, response=ai_response)
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Форматирует Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _flight_key(message: ChatMessage) -> Tuple[str, str]:
+    """Ключ single-flight: нормализованный текст вопроса и язык"""
+    return " ".join(message.message.lower().split()), message.language
+
+async def _find_context(message: ChatMessage, document_service) -> Tuple[List[Dict], List[str]]:
+    """Ищет релевантные документы для сообщения (один поиск на одинаковые одновременные вопросы)"""
+    search_results, sources = await search_flights.do(
+        _flight_key(message),
+        lambda: _search_context(message, document_service)
+    )
+    # Копии списков: результаты общие для всех объединенных запросов
+    return list(search_results), list(sources)
+
+async def _search_context(message: ChatMessage, document_service) -> Tuple[List[Dict], List[str]]:
+    """Выполняет поиск релевантных чанков (кандидатов для упаковки контекста)"""
+    try:
+        search_results = await document_service.search(
+            query=message.message,
+            limit=settings.CONTEXT_CANDIDATE_CHUNKS,  # Бюджет контекста соблюдает упаковщик
+            min_relevance=0.3,  # Минимальный порог релевантности 30%
+            fields=("snippet", "full_content", "metadata"),  # Контекст LLM собирается из полного текста
+            per_document=False  # Несколько чанков одного документа
+        )
+        
+        # Формируем источники только из релевантных документов (без повторов)
+        sources = list(dict.fromkeys(result.get('filename', 'Unknown') for result in search_results))
+        
+        logger.info(f"🔍 Found {len(search_results)} relevant chunks from {len(sources)} documents "
+                    f"for query: '{message.message[:50]}...'")
+        
+        return search_results, sources
+        
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        return [], []
+
+def _build_context_documents(search_results: List[Dict]) -> List[Dict[str, Any]]:
+    """Подготавливает контекст для LLM из результатов поиска"""
+    context_documents = []
+    for result in search_results:
+        # Полный текст найденного чанка (content - только сниппет); бюджет токенов соблюдает упаковщик
+        metadata = result.get('metadata', {})
+        context_doc = {
+            "filename": result.get('filename', 'Unknown'),
+            "content": result.get('full_content') or result.get('content', ''),
+            "relevance_score": result.get('relevance_score', 0.0),
+            "document_id": result.get('document_id'),
+            "chunk_index": metadata.get('chunk_index', result.get('search_info', {}).get('chunk_index', -1)),
+            "metadata": metadata
+        }
+        context_documents.append(context_doc)
+    
+    return context_documents
+
+def _top_documents(search_results: List[Dict]) -> List[Dict]:
+    """Лучший чанк каждого документа, не больше MAX_CONTEXT_DOCUMENTS (для fallback ответа)"""
+    top = {}
+    for result in search_results:
+        top.setdefault(result.get('document_id') or result.get('filename'), result)
+    return list(top.values())[:settings.MAX_CONTEXT_DOCUMENTS]
+
+def _record_chat(message: ChatMessage, response_text: str, sources: List[str], search_results: List[Dict],
+                 ai_response, time_to_first_token: Optional[float] = None) -> Dict[str, Any]:
+    """Сохраняет сообщение и статистику ответа в историю"""
+    chat_entry = {
+        "message": message.message,
+        "response": response_text,
+        "language": message.language,
+        "sources": sources,
+        "timestamp": time.time(),
+        "search_stats": {
+            "found_documents": len(sources),
+            "has_relevant_results": len(search_results) > 0,
+            "search_query": message.message
+        },
+        "ai_stats": {
+            "ai_used": ai_response is not None and ai_response.success,
+            "model": ai_response.model if ai_response else "fallback",
+            "tokens_used": ai_response.tokens_used if ai_response else 0,
+            "response_time": ai_response.response_time if ai_response else 0,
+            "error": ai_response.error if ai_response and not ai_response.success else None,
+            "streamed": time_to_first_token is not None,
+            "time_to_first_token": time_to_first_token
+        }
+    }
+    chat_history.append(chat_entry)
+    
+    # Ограничиваем историю последними 100 сообщениями
+    if len(chat_history) > 100:
+        chat_history.pop(0)
+    
+    return chat_entry
+
 def _generate_fallback_response_with_context(query: str, search_results: List[Dict], 
                                            language: str, error: str = None) -> str:
     """Генерирует fallback ответ когда AI недоступен, но есть найденный контекст"""
+    search_results = _top_documents(search_results)
     
     # Формируем контекст из найденных документов с информацией о типе совпадения
     context_snippets = []
@@ -250,22 +431,32 @@ async def _generate_no_context_response(query: str, language: str, llm_service)
         
         if ai_response.success and ai_response.content.strip():
             # AI смог ответить без контекста
-            if language == "uk":
-                return f"""🤖 Відповідь на основі загальних знань:
-
-{ai_response.content}
-
-⚠️ Зверніть увагу: ця відповідь базується на загальних знаннях AI, а не на документах у вашій базі знань. Для більш точної інформації рекомендуємо додати релевантні документи через адмін панель."""
-            else:
-                return f"""🤖 Response based on general knowledge:
-
-{ai_response.content}
-
-⚠️ Note: This response is based on the AI's general knowledge, not on documents in your knowledge base. For more accurate information, we recommend adding relevant documents through the admin panel."""
+            header, footer = _general_knowledge_wrappers(language)
+            return f"{header}{ai_response.content}{footer}"
         
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         logger.debug(f"AI general knowledge response failed: {e}")
     
+    return _no_context_fallback_text(query, language)
+
+def _general_knowledge_wrappers(language: str) -> Tuple[str, str]:
+    """Вступление и примечание для ответа на основе общих знаний AI"""
+    if language == "uk":
+        return (
+            "🤖 Відповідь на основі загальних знань:\n\n",
+            "\n\n⚠️ Зверніть увагу: ця відповідь базується на загальних знаннях AI, а не на документах у вашій базі знань. "
+            "Для більш точної інформації рекомендуємо додати релевантні документи через адмін панель."
+        )
+    return (
+        "🤖 Response based on general knowledge:\n\n",
+        "\n\n⚠️ Note: This response is based on the AI's general knowledge, not on documents in your knowledge base. "
+        "For more accurate information, we recommend adding relevant documents through the admin panel."
+    )
+
+def _no_context_fallback_text(query: str, language: str) -> str:
+    """Ответ когда нет релевантных документов и AI недоступен"""
     # Fallback если AI недоступен совсем
     try:
         # Пытаемся получить статистику базы данных
@@ -378,6 +569,7 @@ async def get_chat_stats():
         ai_responses = 0
         total_tokens = 0
         total_ai_time = 0.0
+        ttft_values = []
         
         for entry in chat_history:
             lang = entry.get("language", "unknown")
@@ -398,6 +590,8 @@ async def get_chat_stats():
                 ai_responses += 1
                 total_tokens += ai_stats.get("tokens_used", 0)
                 total_ai_time += ai_stats.get("response_time", 0)
+            if ai_stats.get("time_to_first_token") is not None:
+                ttft_values.append(ai_stats["time_to_first_token"])
         
         return {
             "total_messages": len(chat_history),
@@ -414,7 +608,15 @@ async def get_chat_stats():
             "total_tokens_used": total_tokens,
             "average_tokens_per_ai_response": total_tokens / ai_responses if ai_responses > 0 else 0,
             "total_ai_time": total_ai_time,
-            "average_ai_response_time": total_ai_time / ai_responses if ai_responses > 0 else 0
+            "average_ai_response_time": total_ai_time / ai_responses if ai_responses > 0 else 0,
+            "streamed_responses": len(ttft_values),
+            "average_time_to_first_token": sum(ttft_values) / len(ttft_values) if ttft_values else 0,
+            
+            # Объединение одинаковых одновременных запросов
+            "coalescing": {
+                "search": search_flights.get_stats(),
+                "answer": answer_flights.get_stats()
+            }
         }
         
     except Exception as e:
@@ -14,6 +14,7 @@ import time
 from models.requests import SearchRequest
 from models.responses import SearchResponse, SearchResult
 from app.dependencies import get_document_service
+from services.result_projection import parse_fields
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -31,7 +32,8 @@ async def search_documents(
         results = await document_service.search(
             query=search_request.query,
             category=search_request.category,
-            limit=search_request.limit
+            limit=search_request.limit,
+            fields=search_request.fields
         )
         
         # Преобразуем результаты в нужный формат
@@ -42,7 +44,9 @@ async def search_documents(
                 filename=result.get('filename', 'Unknown'),
                 document_id=str(result.get('document_id', '')),
                 relevance_score=float(result.get('relevance_score', 0.0)),
-                metadata=result.get('metadata', {})
+                metadata=result.get('metadata', {}),
+                highlights=result.get('highlights', []),
+                full_content=result.get('full_content')
             )
             formatted_results.append(search_result)
         
@@ -50,6 +54,7 @@ async def search_documents(
         search_metadata = {
             "category_filter": search_request.category,
             "limit": search_request.limit,
+            "fields": list(parse_fields(search_request.fields)),
             "execution_time": "fast",  # Можно добавить реальное измерение времени
             "search_type": "semantic" if hasattr(document_service, 'vector_db') else "text"
         }
@@ -194,6 +194,20 @@ def create_app() -> "FastAPI":
                     }
                 )
         
+        @app.get("/ready")
+        async def readiness_check():
+            """Проверка готовности: 200 после инициализации сервисов и прогрева модели эмбеддингов"""
+            try:
+                from app.dependencies import get_readiness
+                readiness = get_readiness()
+                readiness["timestamp"] = time.time()
+                return JSONResponse(content=readiness, status_code=200 if readiness["ready"] else 503)
+            except Exception as e:
+                return JSONResponse(
+                    status_code=503,
+                    content={"ready": False, "error": str(e), "timestamp": time.time()}
+                )
+        
         # Подключаем API роутеры
         try:
             from api import configure_fastapi_app
@@ -230,6 +244,24 @@ def create_app() -> "FastAPI":
             logger.warning(f"⚠️ {error_msg}")
             initialization_status["errors"].append(error_msg)
         
+        # Фоновые задачи запускаем в event loop сервера
+        @app.on_event("startup")
+        async def start_service_tasks():
+            try:
+                from app.dependencies import start_background_tasks
+                await start_background_tasks()
+            except Exception as e:
+                logger.error(f"❌ Failed to start background tasks: {e}")
+        
+        # Закрываем сервисы при остановке
+        @app.on_event("shutdown")
+        async def shutdown_services():
+            try:
+                from app.dependencies import cleanup_services
+                await cleanup_services()
+            except Exception as e:
+                logger.error(f"❌ Services cleanup failed: {e}")
+        
         # Обработчик ошибок
         @app.exception_handler(Exception)
         async def global_exception_handler(request, exc):
@@ -60,6 +60,19 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNKING_MODE: str = "content_defined"  # fixed | content_defined (границы не сдвигаются при правках)
+    EMBEDDING_BATCH_SIZE: int = 256  # Текстов за один вызов модели эмбеддингов
+    CHROMA_WRITE_BATCH_SIZE: int = 1000  # Записей за один вызов collection.add
+    EMBEDDING_CACHE_ENABLED: bool = True  # Дисковый кэш эмбеддингов чанков
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache"  # Рядом с CHROMADB_PATH
+    CHROMA_IO_WORKERS: int = 4  # Потоки для вызовов коллекции ChromaDB
+    EMBEDDING_WORKERS: int = 1  # Потоки для модели эмбеддингов
+    EMBEDDING_PROCESSES: int = 0  # Процессы для больших пакетов эмбеддингов (0 - выключено)
+    EMBEDDING_PROCESS_THRESHOLD: int = 512  # Текстов в пакете, с которого используется пул процессов
+    EMBEDDING_WARMUP_ON_STARTUP: bool = True  # Загружать модель в фоне после старта (иначе при первом поиске)
+    EMBEDDING_BACKEND: str = "sentence_transformers"  # sentence_transformers | onnx_int8 (квантованная модель для CPU)
+    EMBEDDING_ONNX_PATH: str = "./onnx_models"  # Экспортированные ONNX модели
+    EMBEDDING_SELF_CHECK_TOLERANCE: float = 0.98  # Мин. косинусная близость int8 векторов к эталонной модели
     
     # Парсинг сайтов
     SCRAPING_DELAY: float = 1.5
@@ -69,6 +82,15 @@ class Settings(BaseSettings):
     # Поиск
     DEFAULT_SEARCH_LIMIT: int = 5
     MAX_SEARCH_LIMIT: int = 50
+    SEARCH_QUERY_CACHE_SIZE: int = 1000  # LRU эмбеддингов запросов
+    SEARCH_RESULT_CACHE_SIZE: int = 500  # Кэш готовых результатов поиска
+    SEARCH_RESULT_CACHE_TTL: int = 300  # секунд
+    SEARCH_HYBRID_ENABLED: bool = True  # BM25 + эмбеддинги с reciprocal rank fusion
+    SEARCH_RRF_K: int = 60  # Константа k в 1 / (k + rank)
+    
+    # Список документов в админ панели
+    DOCUMENTS_PAGE_SIZE: int = 100  # Строк на страницу по умолчанию
+    DOCUMENTS_MAX_PAGE_SIZE: int = 1000
     
     # ====================================
     # НОВЫЕ НАСТРОЙКИ LLM
@@ -79,6 +101,14 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_DEFAULT_MODEL: str = "llama3:latest"  # ИСПРАВЛЕНО для ваших моделей
     OLLAMA_FALLBACK_MODELS: List[str] = ["llama3:latest", "llama3:8b"]  # ИСПРАВЛЕНО
+    OLLAMA_POOL_SIZE: int = 10  # Максимум одновременных соединений к Ollama
+    OLLAMA_KEEPALIVE_TIMEOUT: float = 30.0  # секунд жизни простаивающего соединения
+    LLM_HEALTH_CHECK_INTERVAL: float = 30.0  # Интервал фоновой проверки Ollama
+    LLM_HEALTH_BACKOFF_MAX: float = 300.0  # Максимальная задержка проверки при недоступности
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Ошибок запросов подряд до размыкания
+    LLM_MAX_CONCURRENT_REQUESTS: int = 2  # Одновременных генераций в Ollama
+    LLM_QUEUE_MAX_SIZE: int = 20  # Максимум запросов в очереди
+    LLM_QUEUE_TIMEOUT: float = 30.0  # секунд ожидания в очереди до 503
     
     # Параметры генерации
     LLM_TEMPERATURE: float = 0.3  # Низкая для юридических вопросов
@@ -87,8 +117,8 @@ class Settings(BaseSettings):
     
     # Управление контекстом
     MAX_CONTEXT_DOCUMENTS: int = 3  # Максимум документов в контексте
-    MAX_CONTEXT_LENGTH: int = 4000  # Максимальная длина контекста
-    CONTEXT_TRUNCATE_LENGTH: int = 1500  # Длина каждого документа в контексте
+    MAX_CONTEXT_LENGTH: int = 4000  # Бюджет контекста в токенах (оценка)
+    CONTEXT_CANDIDATE_CHUNKS: int = 12  # Чанки-кандидаты для упаковки контекста (без группировки по документам)
     
     # Режимы работы
     LLM_DEMO_MODE: bool = False  # Если True, показывает заглушки вместо реальных ответов
@@ -98,6 +128,9 @@ class Settings(BaseSettings):
     LLM_CACHE_ENABLED: bool = True
     LLM_CACHE_TTL: int = 3600  # 1 час
     LLM_CACHE_MAX_SIZE: int = 100  # Максимум кэшированных ответов
+    LLM_CACHE_PERSISTENT: bool = False  # Хранить кэш в SQLite между перезапусками
+    LLM_CACHE_DB_PATH: str = "./llm_cache/responses.sqlite3"
+    LLM_CACHE_PERSISTENT_MAX_SIZE: int = 5000
     
     # Мониторинг и лимиты
     LLM_RATE_LIMIT: int = 60  # Запросов в час на пользователя
@@ -138,7 +171,8 @@ class Settings(BaseSettings):
             'LLM_TEMPERATURE': ('LLM_TEMPERATURE', float),
             'LLM_MAX_TOKENS': ('LLM_MAX_TOKENS', int),
             'LLM_DEMO_MODE': ('LLM_DEMO_MODE', lambda x: x.lower() in ['true', '1', 'yes']),
-            'LLM_CACHE_ENABLED': ('LLM_CACHE_ENABLED', lambda x: x.lower() in ['true', '1', 'yes'])
+            'LLM_CACHE_ENABLED': ('LLM_CACHE_ENABLED', lambda x: x.lower() in ['true', '1', 'yes']),
+            'LLM_CACHE_PERSISTENT': ('LLM_CACHE_PERSISTENT', lambda x: x.lower() in ['true', '1', 'yes'])
         }
         
         for attr_name, (env_name, converter) in env_mappings.items():
@@ -182,28 +216,59 @@ except Exception as e:
             self.EMBEDDING_MODEL = "all-MiniLM-L6-v2"
             self.CHUNK_SIZE = 1000
             self.CHUNK_OVERLAP = 200
+            self.CHUNKING_MODE = "content_defined"
+            self.EMBEDDING_BATCH_SIZE = 256
+            self.CHROMA_WRITE_BATCH_SIZE = 1000
+            self.EMBEDDING_CACHE_ENABLED = True
+            self.EMBEDDING_CACHE_PATH = "./embedding_cache"
+            self.CHROMA_IO_WORKERS = 4
+            self.EMBEDDING_WORKERS = 1
+            self.EMBEDDING_PROCESSES = 0
+            self.EMBEDDING_PROCESS_THRESHOLD = 512
+            self.EMBEDDING_WARMUP_ON_STARTUP = True
+            self.EMBEDDING_BACKEND = "sentence_transformers"
+            self.EMBEDDING_ONNX_PATH = "./onnx_models"
+            self.EMBEDDING_SELF_CHECK_TOLERANCE = 0.98
             self.SCRAPING_DELAY = 1.5
             self.SCRAPING_TIMEOUT = 15
             self.MAX_URLS_PER_REQUEST = 20
             self.DEFAULT_SEARCH_LIMIT = 5
             self.MAX_SEARCH_LIMIT = 50
+            self.SEARCH_QUERY_CACHE_SIZE = 1000
+            self.SEARCH_RESULT_CACHE_SIZE = 500
+            self.SEARCH_RESULT_CACHE_TTL = 300
+            self.SEARCH_HYBRID_ENABLED = True
+            self.SEARCH_RRF_K = 60
+            self.DOCUMENTS_PAGE_SIZE = 100
+            self.DOCUMENTS_MAX_PAGE_SIZE = 1000
             
             # LLM настройки fallback
             self.OLLAMA_ENABLED = True
             self.OLLAMA_BASE_URL = "http://localhost:11434"
             self.OLLAMA_DEFAULT_MODEL = "llama3:8b"  # ИСПРАВЛЕНО
             self.OLLAMA_FALLBACK_MODELS = ["llama3:latest", "llama3:8b"]  # ИСПРАВЛЕНО
+            self.OLLAMA_POOL_SIZE = 10
+            self.OLLAMA_KEEPALIVE_TIMEOUT = 30.0
+            self.LLM_HEALTH_CHECK_INTERVAL = 30.0
+            self.LLM_HEALTH_BACKOFF_MAX = 300.0
+            self.LLM_CIRCUIT_FAILURE_THRESHOLD = 3
+            self.LLM_MAX_CONCURRENT_REQUESTS = 2
+            self.LLM_QUEUE_MAX_SIZE = 20
+            self.LLM_QUEUE_TIMEOUT = 30.0
             self.LLM_TEMPERATURE = 0.3
             self.LLM_MAX_TOKENS = 500
             self.LLM_TIMEOUT = 180
             self.MAX_CONTEXT_DOCUMENTS = 3
             self.MAX_CONTEXT_LENGTH = 4000
-            self.CONTEXT_TRUNCATE_LENGTH = 1500
+            self.CONTEXT_CANDIDATE_CHUNKS = 12
             self.LLM_DEMO_MODE = False
             self.LLM_FALLBACK_ENABLED = True
             self.LLM_CACHE_ENABLED = True
             self.LLM_CACHE_TTL = 3600
             self.LLM_CACHE_MAX_SIZE = 100
+            self.LLM_CACHE_PERSISTENT = False
+            self.LLM_CACHE_DB_PATH = "./llm_cache/responses.sqlite3"
+            self.LLM_CACHE_PERSISTENT_MAX_SIZE = 5000
             self.LLM_RATE_LIMIT = 60
             self.LLM_DAILY_LIMIT = 500
             self.LLM_LOG_REQUESTS = True
@@ -372,6 +437,9 @@ def get_llm_config() -> dict:
         "timeout": settings.LLM_TIMEOUT,
         "demo_mode": settings.LLM_DEMO_MODE,
         "cache_enabled": settings.LLM_CACHE_ENABLED,
+        "cache_ttl": settings.LLM_CACHE_TTL,
+        "cache_max_size": settings.LLM_CACHE_MAX_SIZE,
+        "cache_persistent": settings.LLM_CACHE_PERSISTENT,
         "supported_languages": settings.SUPPORTED_LANGUAGES,
         "recommended_models": RECOMMENDED_MODELS,
         "quality_settings": RESPONSE_QUALITY_SETTINGS
@@ -13,6 +13,7 @@ import os
 import time
 import json
 import asyncio
+import importlib.util
 from typing import Optional, List, Dict, Any
 
 from app.config import settings
@@ -78,11 +79,36 @@ class FallbackDocumentService:
         logger.warning("Fallback get_all_documents called")
         return []
     
+    async def get_document(self, doc_id: str):
+        """Заглушка для получения документа"""
+        return None
+    
+    async def list_documents(self, **options):
+        """Заглушка для страницы документов"""
+        return {"documents": [], "total": 0, "next_cursor": None}
+    
+    def get_category_counts(self):
+        """Заглушка для счетчиков категорий"""
+        return {}
+    
     async def delete_document(self, doc_id: str):
         """Заглушка для удаления документа"""
         logger.warning(f"Fallback delete_document called for ID: {doc_id}")
         return False
     
+    async def delete_documents(self, doc_ids):
+        """Заглушка для пакетного удаления"""
+        logger.warning(f"Fallback delete_documents called for {len(doc_ids)} IDs")
+        return {
+            "success": False,
+            "results": {doc_id: "failed" for doc_id in doc_ids},
+            "deleted": 0,
+            "not_found": 0,
+            "failed": len(doc_ids),
+            "records_deleted": 0,
+            "elapsed_seconds": 0.0
+        }
+    
     async def process_and_store_file(self, file_path: str, category: str = "general"):
         """Заглушка для обработки файла"""
         logger.warning(f"Fallback process_and_store_file called for: {file_path}")
@@ -92,6 +118,11 @@ class FallbackDocumentService:
         """Заглушка для обновления документа"""
         logger.warning(f"Fallback update_document called for ID: {doc_id}")
         return False
+    
+    async def update_document_incremental(self, doc_id: str, content: str = None, metadata: Dict = None):
+        """Заглушка для инкрементального обновления"""
+        logger.warning(f"Fallback update_document_incremental called for ID: {doc_id}")
+        return {"success": False, "chunks_total": 0, "chunks_reused": 0, "chunks_embedded": 0, "chunks_deleted": 0}
 
 class FallbackScraperService:
     """Заглушка для scraper service когда основной сервис недоступен"""
@@ -237,12 +268,26 @@ llm_service: Optional[object] = None  # НОВЫЙ СЕРВИС
 SERVICES_AVAILABLE: bool = False
 CHROMADB_ENABLED: bool = False
 LLM_ENABLED: bool = False  # НОВЫЙ ФЛАГ
+SERVICES_INITIALIZED: bool = False  # init_services завершен
+
+# Длительность фаз запуска (секунды) и фоновый прогрев модели эмбеддингов
+STARTUP_TIMINGS: Dict[str, float] = {}
+_warmup_task: Optional[asyncio.Task] = None
+
+def _record_startup_phase(phase: str, started_at: float) -> float:
+    """Запоминает и логирует длительность фазы запуска, возвращает начало следующей"""
+    now = time.perf_counter()
+    STARTUP_TIMINGS[phase] = round(now - started_at, 3)
+    logger.info(f"⏱️ Startup phase {phase}: {now - started_at:.2f}s")
+    return now
 
 async def init_services():
     """Инициализация всех сервисов приложения включая LLM"""
     global document_service, scraper, llm_service, SERVICES_AVAILABLE, CHROMADB_ENABLED, LLM_ENABLED
+    global SERVICES_INITIALIZED
     
     logger.info("🔧 Initializing services...")
+    startup_start = phase_start = time.perf_counter()
     
     # Добавляем текущую папку в Python path
     current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -257,14 +302,40 @@ async def init_services():
             # Пытаемся использовать ChromaDB
             try:
                 from services.chroma_service import DocumentService
-                document_service = DocumentService(settings.CHROMADB_PATH)
+                document_service = DocumentService(
+                    settings.CHROMADB_PATH,
+                    chunking_mode=settings.CHUNKING_MODE,
+                    chunk_size=settings.CHUNK_SIZE,
+                    chunk_overlap=settings.CHUNK_OVERLAP,
+                    embedding_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    write_batch_size=settings.CHROMA_WRITE_BATCH_SIZE,
+                    embedding_model=settings.EMBEDDING_MODEL,
+                    embedding_cache_dir=settings.EMBEDDING_CACHE_PATH if settings.EMBEDDING_CACHE_ENABLED else None,
+                    query_cache_size=settings.SEARCH_QUERY_CACHE_SIZE,
+                    result_cache_size=settings.SEARCH_RESULT_CACHE_SIZE,
+                    result_cache_ttl=settings.SEARCH_RESULT_CACHE_TTL,
+                    hybrid_search=settings.SEARCH_HYBRID_ENABLED,
+                    rrf_k=settings.SEARCH_RRF_K,
+                    io_workers=settings.CHROMA_IO_WORKERS,
+                    embedding_workers=settings.EMBEDDING_WORKERS,
+                    embedding_processes=settings.EMBEDDING_PROCESSES,
+                    embedding_process_threshold=settings.EMBEDDING_PROCESS_THRESHOLD,
+                    embedding_backend=settings.EMBEDDING_BACKEND,
+                    onnx_model_dir=settings.EMBEDDING_ONNX_PATH,
+                    embedding_self_check_tolerance=settings.EMBEDDING_SELF_CHECK_TOLERANCE
+                )
                 CHROMADB_ENABLED = True
                 logger.info("✅ ChromaDB service initialized")
             except ImportError as e:
                 logger.warning(f"ChromaDB not available, falling back to SimpleVectorDB: {e}")
                 try:
                     from services.document_processor import DocumentService
-                    document_service = DocumentService(settings.SIMPLE_DB_PATH)
+                    document_service = DocumentService(
+                        settings.SIMPLE_DB_PATH,
+                        chunking_mode=settings.CHUNKING_MODE,
+                        chunk_size=settings.CHUNK_SIZE,
+                        chunk_overlap=settings.CHUNK_OVERLAP
+                    )
                     CHROMADB_ENABLED = False
                     logger.info("✅ SimpleVectorDB service initialized")
                 except ImportError as e2:
@@ -274,7 +345,12 @@ async def init_services():
             # Принудительно используем SimpleVectorDB
             try:
                 from services.document_processor import DocumentService
-                document_service = DocumentService(settings.SIMPLE_DB_PATH)
+                document_service = DocumentService(
+                    settings.SIMPLE_DB_PATH,
+                    chunking_mode=settings.CHUNKING_MODE,
+                    chunk_size=settings.CHUNK_SIZE,
+                    chunk_overlap=settings.CHUNK_OVERLAP
+                )
                 CHROMADB_ENABLED = False
                 logger.info("✅ SimpleVectorDB service initialized (forced)")
             except ImportError as e:
@@ -289,6 +365,7 @@ async def init_services():
         document_service = None
         SERVICES_AVAILABLE = False
         CHROMADB_ENABLED = False
+    phase_start = _record_startup_phase("document_service", phase_start)
     
     # ====================================
     # ИНИЦИАЛИЗАЦИЯ СЕРВИСА ПАРСИНГА
@@ -300,6 +377,7 @@ async def init_services():
     except Exception as e:
         logger.error(f"❌ Error initializing scraper service: {e}")
         scraper = None
+    phase_start = _record_startup_phase("scraper", phase_start)
     
     # ====================================
     # ИНИЦИАЛИЗАЦИЯ LLM СЕРВИСА
@@ -310,12 +388,31 @@ async def init_services():
             
             llm_service = create_llm_service(
                 ollama_url=settings.OLLAMA_BASE_URL,
-                model=settings.OLLAMA_DEFAULT_MODEL
+                model=settings.OLLAMA_DEFAULT_MODEL,
+                cache_enabled=settings.LLM_CACHE_ENABLED,
+                cache_ttl=settings.LLM_CACHE_TTL,
+                cache_max_size=settings.LLM_CACHE_MAX_SIZE,
+                cache_persistent_path=settings.LLM_CACHE_DB_PATH if settings.LLM_CACHE_PERSISTENT else None,
+                cache_persistent_max_size=settings.LLM_CACHE_PERSISTENT_MAX_SIZE,
+                pool_size=settings.OLLAMA_POOL_SIZE,
+                keepalive_timeout=settings.OLLAMA_KEEPALIVE_TIMEOUT,
+                request_timeout=settings.LLM_TIMEOUT,
+                health_check_interval=settings.LLM_HEALTH_CHECK_INTERVAL,
+                health_backoff_max=settings.LLM_HEALTH_BACKOFF_MAX,
+                circuit_failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                max_concurrent_requests=settings.LLM_MAX_CONCURRENT_REQUESTS,
+                queue_max_size=settings.LLM_QUEUE_MAX_SIZE,
+                queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+                context_token_budget=settings.MAX_CONTEXT_LENGTH
             )
             
             # Проверяем доступность Ollama
             status = await llm_service.get_service_status()
             
+            # init_services может выполняться не в том event loop, где работает сервер -
+            # закрываем сессию, рабочая будет создана при первом запросе
+            await llm_service.ollama.close_session()
+            
             if status["ollama_available"]:
                 LLM_ENABLED = True
                 logger.info("✅ LLM service initialized with Ollama")
@@ -335,6 +432,9 @@ async def init_services():
         logger.error(f"❌ Error initializing LLM service: {e}")
         llm_service = None
         LLM_ENABLED = False
+    _record_startup_phase("llm_service", phase_start)
+    _record_startup_phase("total", startup_start)
+    SERVICES_INITIALIZED = True
     
     # ====================================
     # ФИНАЛЬНЫЙ СТАТУС
@@ -366,9 +466,13 @@ def get_scraper_service():
         return FallbackScraperService()
     return scraper
 
+def _llm_available() -> bool:
+    """LLM доступен при старте или по последней фоновой проверке"""
+    return llm_service is not None and (LLM_ENABLED or llm_service.is_available())
+
 def get_llm_service():
     """Dependency для получения LLM сервиса"""
-    if not llm_service or not LLM_ENABLED:
+    if not _llm_available():
         # Создаем заглушку если LLM недоступен
         logger.debug("Using fallback LLM service")
         return FallbackLLMService()
@@ -379,11 +483,11 @@ def get_services_status():
     return {
         "document_service_available": document_service is not None,
         "scraper_available": scraper is not None,
-        "llm_available": LLM_ENABLED,
+        "llm_available": _llm_available(),
         "llm_service_created": llm_service is not None,
         "chromadb_enabled": CHROMADB_ENABLED,
         "services_available": SERVICES_AVAILABLE,
-        "fallback_mode": document_service is None or scraper is None or not LLM_ENABLED,
+        "fallback_mode": document_service is None or scraper is None or not _llm_available(),
         "ollama_enabled": settings.OLLAMA_ENABLED,
         "llm_demo_mode": settings.LLM_DEMO_MODE
     }
@@ -398,7 +502,7 @@ async def get_system_health():
     
     # Проверяем статус LLM если он доступен
     llm_status = {}
-    if llm_service and LLM_ENABLED:
+    if _llm_available():
         try:
             llm_status = await llm_service.get_service_status()
         except Exception as e:
@@ -408,6 +512,7 @@ async def get_system_health():
         "overall_status": "healthy" if status["services_available"] and status["llm_available"] else "degraded",
         "services": status,
         "llm_status": llm_status,
+        "readiness": get_readiness(),
         "dependencies": {
             "fastapi": True,  # Если мы дошли до сюда, FastAPI работает
             "pydantic": True, # Аналогично для Pydantic
@@ -429,11 +534,11 @@ async def get_system_health():
         "chromadb": False
     }
     
+    # find_spec проверяет установку без импорта (импорт sentence_transformers загружает torch)
     for dep in optional_deps:
         try:
-            __import__(dep)
-            optional_deps[dep] = True
-        except ImportError:
+            optional_deps[dep] = importlib.util.find_spec(dep) is not None
+        except (ImportError, ValueError):
             pass
     
     health_info["dependencies"].update(optional_deps)
@@ -495,12 +600,60 @@ async def get_service_recommendations():
     
     return recommendations
 
+async def start_background_tasks():
+    """Запускает фоновые задачи сервисов в event loop сервера"""
+    global _warmup_task
+    
+    try:
+        if llm_service and hasattr(llm_service, 'start_background_tasks'):
+            llm_service.start_background_tasks()
+            logger.info("✅ LLM background health checks started")
+    except Exception as e:
+        logger.error(f"Error starting LLM background tasks: {e}")
+
+    # Модель эмбеддингов загружается в фоне: сервер уже отвечает на /health,
+    # а /ready становится успешным после прогрева
+    if settings.EMBEDDING_WARMUP_ON_STARTUP and hasattr(document_service, 'warm_up'):
+        _warmup_task = asyncio.create_task(_warm_up_document_service())
+        logger.info("🔥 Embedding model warm-up started in background")
+
+async def _warm_up_document_service():
+    """Фоновый прогрев модели эмбеддингов с замером времени"""
+    started_at = time.perf_counter()
+    try:
+        await document_service.warm_up()
+        _record_startup_phase("embedding_warmup", started_at)
+    except Exception as e:
+        logger.error(f"❌ Embedding model warm-up failed: {e}")
+
+def get_readiness() -> Dict[str, Any]:
+    """Готовность принимать трафик: сервисы созданы и модель эмбеддингов прогрета"""
+    checks = {"services_initialized": SERVICES_INITIALIZED}
+    vector_db = {}
+    
+    readiness = getattr(document_service, 'get_readiness', None)
+    if readiness is not None:
+        try:
+            vector_db = readiness()
+            checks["embedding_model"] = vector_db["ready"]
+        except Exception as e:
+            vector_db = {"error": str(e)}
+            checks["embedding_model"] = False
+    
+    return {
+        "ready": all(checks.values()),
+        "checks": checks,
+        "vector_db": vector_db,
+        "startup_timings": dict(STARTUP_TIMINGS)
+    }
+
 async def cleanup_services():
     """Правильно закрывает все сервисы при выключении"""
-    global llm_service, scraper
-    
     logger.info("🧹 Cleaning up services...")
     
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    
     try:
         if llm_service and hasattr(llm_service, 'close'):
             await llm_service.close()
@@ -515,6 +668,15 @@ async def cleanup_services():
     except Exception as e:
         logger.error(f"Error closing scraper service: {e}")
     
+    try:
+        # SimpleVectorDB: сохраняем индекс сегментного хранилища
+        vector_db = getattr(document_service, 'vector_db', None)
+        if vector_db is not None and hasattr(vector_db, 'close'):
+            vector_db.close()
+            logger.info("✅ Document storage closed")
+    except Exception as e:
+        logger.error(f"Error closing document storage: {e}")
+    
     logger.info("✅ Services cleanup completed")
 
 def create_fallback_response(service_name: str, operation: str, **kwargs):
@@ -538,11 +700,13 @@ def create_fallback_response(service_name: str, operation: str, **kwargs):
 __all__ = [
     "init_services",
     "cleanup_services",  # НОВЫЙ ЭКСПОРТ
+    "start_background_tasks",
     "get_document_service", 
     "get_scraper_service",
     "get_llm_service",  # НОВЫЙ ЭКСПОРТ
     "get_services_status",
     "get_system_health",
+    "get_readiness",
     "get_service_recommendations",
     "FallbackDocumentService",
     "FallbackScraperService",
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_bm25_search.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: линейный поиск SimpleVectorDB vs инвертированный индекс BM25
+# ====================================
+
+"""
+Генерирует синтетический корпус (украинские и английские слова с распределением
+Ципфа) и сравнивает задержку запроса старого линейного поиска (lower() + count()
+по всем документам и чанкам) и BM25Index на 1k, 10k и 100k чанков.
+
+Запуск из backend/:
+    python benchmarks/bench_bm25_search.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bm25_index import BM25Index
+
+BASE_WORDS = (
+    "закон кодекс стаття податок податкова суд рішення договір оренда земля право "
+    "власність працівник звільнення спір позов відповідач позивач міністерство "
+    "act section regulation court judgment contract lease employee tenant landlord "
+    "statutory instrument minister appeal order schedule amendment"
+).split()
+
+def build_vocabulary(size: int, rng: random.Random) -> list:
+    """Базовые слова плюс сгенерированные термины (длинный хвост словаря)"""
+    letters = "абвгдежзиклмнопрстуфхцчшіїєabcdefghiklmnoprstuvw"
+    vocabulary = list(BASE_WORDS)
+    while len(vocabulary) < size:
+        vocabulary.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return vocabulary
+
+def generate_chunks(count: int, vocabulary: list, words_per_chunk: int, rng: random.Random) -> list:
+    """Чанки со словами по закону Ципфа"""
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    chunks = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights=weights, k=words_per_chunk)
+        words.append(f"{i % 997}")
+        chunks.append(" ".join(words) + ".")
+    return chunks
+
+def group_documents(chunks: list, chunks_per_doc: int) -> list:
+    """Документы в формате SimpleVectorDB"""
+    documents = []
+    for start in range(0, len(chunks), chunks_per_doc):
+        doc_chunks = chunks[start:start + chunks_per_doc]
+        documents.append({
+            "id": f"doc_{start // chunks_per_doc}",
+            "content": " ".join(doc_chunks),
+            "chunks": doc_chunks,
+            "category": "general"
+        })
+    return documents
+
+def legacy_search(documents: list, query: str, n_results: int = 5) -> list:
+    """Старый SimpleVectorDB.search_documents: полный просмотр текста"""
+    query_words = query.lower().split()
+    results = []
+    for doc in documents:
+        content_lower = doc["content"].lower()
+        score = 0
+        for word in query_words:
+            if word in content_lower:
+                score += content_lower.count(word)
+        if score > 0:
+            best_chunk, best_chunk_score = "", 0
+            for chunk in doc["chunks"]:
+                chunk_lower = chunk.lower()
+                chunk_score = sum(chunk_lower.count(word) for word in query_words)
+                if chunk_score > best_chunk_score:
+                    best_chunk_score, best_chunk = chunk_score, chunk
+            results.append((score / len(query_words), doc["id"], best_chunk))
+    results.sort(reverse=True)
+    return results[:n_results]
+
+def measure(call, queries: list) -> dict:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        call(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000
+    }
+
+def main(args):
+    rng = random.Random(args.seed)
+    vocabulary = build_vocabulary(args.vocabulary, rng)
+    queries = [
+        " ".join(rng.sample(BASE_WORDS, 2)) + " " + rng.choice(vocabulary[len(BASE_WORDS):])
+        for _ in range(args.queries)
+    ]
+    
+    print(f"📊 {args.queries} queries, {args.words} words per chunk, {args.chunks_per_doc} chunks per document")
+    print(f"{'chunks':>8}{'build s':>10}{'bm25 mean ms':>15}{'bm25 p95 ms':>14}{'scan mean ms':>15}{'speedup':>10}")
+    
+    for size in args.sizes:
+        chunks = generate_chunks(size, vocabulary, args.words, rng)
+        documents = group_documents(chunks, args.chunks_per_doc)
+        
+        start = time.perf_counter()
+        index = BM25Index()
+        for doc in documents:
+            index.add_document(doc["id"], doc["chunks"])
+        build_time = time.perf_counter() - start
+        
+        bm25 = measure(lambda q: index.search(q, limit=5), queries)
+        scan = measure(lambda q: legacy_search(documents, q), queries[:args.scan_queries])
+        
+        print(f"{size:>8}{build_time:>10.2f}{bm25['mean_ms']:>15.3f}{bm25['p95_ms']:>14.3f}"
+              f"{scan['mean_ms']:>15.2f}{scan['mean_ms'] / bm25['mean_ms']:>9.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimpleVectorDB BM25 index benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--scan-queries", type=int, default=5, help="Queries for the slow linear scan")
+    parser.add_argument("--words", type=int, default=120, help="Words per chunk")
+    parser.add_argument("--chunks-per-doc", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_chunk_reuse.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: доля переиспользуемых чанков после правки документа
+# ====================================
+
+"""
+Сравнивает фиксированное разбиение (окна по 1000 символов) и разбиение
+с границами по содержимому: документ правится (вставка предложения, удаление
+предложения, замена слов), и считается доля чанков новой версии, которые
+совпадают с чанками старой (их эмбеддинги переиспользует update_document_incremental).
+
+Документы: файлы из --files (файлы или каталоги с .txt/.md) и документы из
+SimpleVectorDB (--simple-db); если их меньше --min-documents, добавляются
+сгенерированные тексты в стиле законов (статьи, части, пункты).
+
+Запуск из backend/:
+    python benchmarks/bench_chunk_reuse.py --files ../documents --edits 1 3 10
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_processor import DocumentProcessor
+
+WORDS = (
+    "закон кодекс стаття податок податкова суд рішення договір оренда земля право "
+    "власність працівник звільнення спір позов відповідач позивач міністерство орган "
+    "особа строк порядок заява виконання державний реєстр платник сума нарахування "
+    "act section regulation court judgment contract lease employee tenant landlord "
+    "statutory instrument minister appeal order schedule amendment person period"
+).split()
+
+_SENTENCE_RE = re.compile(r'[^.!?]+[.!?]+\s*')
+
+def load_files(paths: list) -> list:
+    """Тексты из файлов и каталогов"""
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.path.join(path, name) for name in os.listdir(path))
+            documents.extend(load_files([name for name in names if name.endswith((".txt", ".md"))]))
+        elif os.path.isfile(path):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                documents.append(f.read())
+    return documents
+
+def load_simple_db(path: str) -> list:
+    """Тексты документов из старого documents.json SimpleVectorDB"""
+    if not path or not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [doc.get("content", "") for doc in json.load(f) if isinstance(doc, dict)]
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 30))
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", ";", "?"])
+
+def generate_statute(articles: int, rng: random.Random) -> str:
+    """Текст в стиле закона: статьи из пронумерованных частей"""
+    lines = []
+    for number in range(1, articles + 1):
+        lines.append(f"Стаття {number}. {sentence(rng)}")
+        for part in range(1, rng.randint(2, 5)):
+            lines.append(f"{part}. " + " ".join(sentence(rng) for _ in range(rng.randint(1, 4))))
+        lines.append("")
+    return "\n".join(lines)
+
+def edit(text: str, rng: random.Random) -> str:
+    """Одна правка в случайном месте: вставка, удаление или изменение предложения"""
+    sentences = [match.span() for match in _SENTENCE_RE.finditer(text)]
+    if len(sentences) < 3:
+        return text + " " + sentence(rng)
+    
+    start, end = rng.choice(sentences)
+    kind = rng.choice(("insert", "delete", "modify"))
+    if kind == "insert":
+        return text[:start] + sentence(rng) + " " + text[start:]
+    if kind == "delete":
+        return text[:start] + text[end:]
+    words = text[start:end].split(" ")
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return text[:start] + " ".join(words) + text[end:]
+
+def reuse_ratio(processor: DocumentProcessor, old: str, new: str) -> float:
+    """Доля чанков новой версии, совпадающих с чанками старой"""
+    old_chunks = set(processor._chunk_text(old))
+    new_chunks = processor._chunk_text(new)
+    return sum(chunk in old_chunks for chunk in new_chunks) / len(new_chunks)
+
+def main(args):
+    rng = random.Random(args.seed)
+    documents = [text for text in load_files(args.files) + load_simple_db(args.simple_db)
+                 if len(text) > args.chunk_size]
+    real = len(documents)
+    while len(documents) < args.min_documents:
+        documents.append(generate_statute(rng.randint(20, 60), rng))
+    
+    processors = {
+        mode: DocumentProcessor(mode, args.chunk_size, args.chunk_overlap)
+        for mode in ("fixed", "content_defined")
+    }
+    
+    print(f"📊 {len(documents)} documents ({real} real, {len(documents) - real} generated), "
+          f"chunk size {args.chunk_size}, overlap {args.chunk_overlap}")
+    
+    for mode, processor in processors.items():
+        start = time.perf_counter()
+        sizes = [len(chunk) for text in documents for chunk in processor._chunk_text(text)]
+        elapsed = time.perf_counter() - start
+        print(f"   {mode:<16} chunks {len(sizes):>6}  mean {statistics.mean(sizes):>7.0f}  "
+              f"max {max(sizes):>5}  chunking {elapsed * 1000:>8.1f} ms")
+    
+    print(f"{'edits':>6}{'fixed reuse':>14}{'content reuse':>16}")
+    for edits in args.edits:
+        ratios = {mode: [] for mode in processors}
+        for text in documents:
+            for _ in range(args.trials):
+                edited = text
+                for _ in range(edits):
+                    edited = edit(edited, rng)
+                for mode, processor in processors.items():
+                    ratios[mode].append(reuse_ratio(processor, text, edited))
+        print(f"{edits:>6}{statistics.mean(ratios['fixed']):>13.1%}"
+              f"{statistics.mean(ratios['content_defined']):>16.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk reuse after document edits")
+    parser.add_argument("--files", nargs="*", default=["../documents", "../test.txt"],
+                        help="Text files or directories with real documents")
+    parser.add_argument("--simple-db", default="./simple_db/documents.json")
+    parser.add_argument("--min-documents", type=int, default=20, help="Pad with generated statutes")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 3, 10], help="Edits per version")
+    parser.add_argument("--trials", type=int, default=5, help="Edited versions per document")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_embedding_backends.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: задержка эмбеддинга запроса и пропускная способность загрузки по бэкендам
+# ====================================
+
+"""
+Сравнивает бэкенды модели эмбеддингов (sentence_transformers, onnx_int8):
+- загрузку модели (экспорт ONNX при первом запуске замеряется отдельно)
+- задержку эмбеддинга одного поискового запроса (p50/p95)
+- пропускную способность на синтетических чанках (~1000 символов, как у DocumentProcessor)
+- косинусную близость векторов к эталонной модели (sentence_transformers)
+
+Запуск из backend/:
+    python benchmarks/bench_embedding_backends.py --chunks 1024 --queries 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_embedding_workers import generate_chunks
+from services.embedding_backends import EMBEDDING_BACKENDS, OnnxEmbeddingModel, cosine_similarities, load_embedding_model
+
+QUERIES = [
+    "податкова декларація строк подання",
+    "розірвання договору оренди землі",
+    "звільнення працівника за згодою профспілки",
+    "tenant notice period termination",
+    "irish citizenship naturalisation requirements",
+    "employment contract statutory rights",
+]
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * share) - 1)]
+
+def measure_backend(backend: str, args, chunks: list) -> dict:
+    if backend == "onnx_int8":
+        # Экспорт (один раз, нужен PyTorch) не входит во время загрузки
+        start = time.perf_counter()
+        OnnxEmbeddingModel(args.model, args.onnx_dir)
+        export_seconds = time.perf_counter() - start
+    else:
+        export_seconds = None
+    
+    start = time.perf_counter()
+    model = load_embedding_model(backend, args.model, args.onnx_dir)
+    load_seconds = time.perf_counter() - start
+    model.encode(QUERIES)  # Прогрев
+    
+    latencies = []
+    for index in range(args.queries):
+        start = time.perf_counter()
+        model.encode([QUERIES[index % len(QUERIES)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    vectors = model.encode(chunks, batch_size=args.batch_size)
+    ingest_seconds = time.perf_counter() - start
+    
+    return {
+        "export_seconds": export_seconds,
+        "load_seconds": load_seconds,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": percentile(latencies, 0.95),
+        "chunks_per_second": len(chunks) / ingest_seconds,
+        "dimension": vectors.shape[1],
+        "vectors": np.asarray(vectors, dtype=np.float32)
+    }
+
+def main(args):
+    rng = random.Random(args.seed)
+    chunks = generate_chunks(args.chunks, args.chunk_length, rng)
+    
+    print(f"📊 Model {args.model}, {len(chunks)} chunks x ~{args.chunk_length} chars, "
+          f"{args.queries} queries, {os.cpu_count()} CPUs")
+    results = {backend: measure_backend(backend, args, chunks) for backend in args.backends}
+    
+    reference = results.get("sentence_transformers")
+    print(f"\n{'backend':<24}{'load s':>8}{'query p50':>11}{'query p95':>11}{'chunks/s':>10}"
+          f"{'dim':>6}{'min cos':>9}{'mean cos':>10}")
+    for backend, result in results.items():
+        if reference is not None and backend != "sentence_transformers":
+            similarities = cosine_similarities(result["vectors"], reference["vectors"])
+            cosine = f"{similarities.min():>9.4f}{similarities.mean():>10.4f}"
+        else:
+            cosine = f"{'-':>9}{'-':>10}"
+        print(f"{backend:<24}{result['load_seconds']:>8.2f}{result['query_p50_ms']:>9.2f}ms"
+              f"{result['query_p95_ms']:>9.2f}ms{result['chunks_per_second']:>10.1f}{result['dimension']:>6}{cosine}")
+        if result["export_seconds"] is not None:
+            print(f"{'':<24}(export/open {result['export_seconds']:.2f}s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-dir", default="./onnx_models")
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--chunk-length", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32, help="Encode batch")
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_embedding_workers.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: пропускная способность эмбеддингов в зависимости от числа процессов
+# ====================================
+
+"""
+Считает эмбеддинги синтетических чанков (~1000 символов, как у DocumentProcessor)
+моделью в текущем процессе (workers = 0) и пулом EmbeddingProcessPool с разным
+числом процессов. Загрузка модели в воркерах не входит в замер (прогрев).
+
+Запуск из backend/:
+    python benchmarks/bench_embedding_workers.py --chunks 4096 --workers 0 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_workers import EmbeddingProcessPool
+
+WORDS = (
+    "закон кодекс стаття податок податкова суд рішення договір оренда земля право "
+    "власність працівник звільнення спір позов відповідач позивач міністерство "
+    "act section regulation court judgment contract lease employee tenant landlord "
+    "statutory instrument minister appeal order schedule amendment"
+).split()
+
+def generate_chunks(count: int, length: int, rng: random.Random) -> list:
+    chunks = []
+    for _ in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(WORDS))
+        chunks.append(" ".join(words) + ".")
+    return chunks
+
+def measure_in_process(model_name: str, chunks: list, batch_size: int) -> float:
+    """Модель в текущем процессе (как SentenceTransformerEmbeddingFunction)"""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    model.encode(chunks[:batch_size], batch_size=batch_size)
+    
+    start = time.perf_counter()
+    model.encode(chunks, batch_size=batch_size, convert_to_numpy=True)
+    return time.perf_counter() - start
+
+def measure_pool(model_name: str, chunks: list, workers: int, batch_size: int, task_size: int) -> float:
+    pool = EmbeddingProcessPool(model_name, workers=workers, chunk_size=task_size, encode_batch_size=batch_size)
+    try:
+        # Прогрев: модель загружается в каждом воркере
+        pool.embed(chunks[:task_size * workers])
+        
+        start = time.perf_counter()
+        pool.embed(chunks)
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+def main(args):
+    rng = random.Random(args.seed)
+    chunks = generate_chunks(args.chunks, args.chunk_length, rng)
+    
+    print(f"📊 {len(chunks)} chunks x ~{args.chunk_length} chars, model {args.model}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'seconds':>10}{'chunks/s':>12}{'speedup':>10}")
+    
+    baseline = None
+    for workers in args.workers:
+        if workers == 0:
+            elapsed = measure_in_process(args.model, chunks, args.batch_size)
+        else:
+            elapsed = measure_pool(args.model, chunks, workers, args.batch_size, args.task_size)
+        rate = len(chunks) / elapsed
+        baseline = baseline or rate
+        label = "in-proc" if workers == 0 else str(workers)
+        print(f"{label:>8}{elapsed:>10.2f}{rate:>12.1f}{rate / baseline:>9.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding process pool benchmark")
+    parser.add_argument("--chunks", type=int, default=4096)
+    parser.add_argument("--chunk-length", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8],
+                        help="Process counts (0 - model in the current process)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--batch-size", type=int, default=32, help="SentenceTransformer encode batch")
+    parser.add_argument("--task-size", type=int, default=256, help="Texts per worker task")
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_import_time.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: время импорта модулей пути запуска сервера (python -X importtime)
+# ====================================
+
+"""
+Импортирует модули, которые загружает create_app (конфигурация, зависимости,
+пакеты api и models, сервисы, роутеры), в отдельном процессе с -X importtime
+и суммирует время импорта верхнего уровня. Процесс повторяется --runs раз,
+берется лучший результат (меньше всего шума).
+
+Код возврата 1, если время превышает бюджет (--budget-ms) или на пути запуска
+импортируется тяжелый модуль, который должен загружаться при первом
+использовании (chromadb, torch, sentence_transformers, bs4, aiohttp).
+
+Запуск из backend/:
+    python benchmarks/bench_import_time.py --runs 5 --budget-ms 2000
+    python benchmarks/bench_import_time.py --packages-only   # импорт пакетов без роутеров (сбор тестов)
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_MODULES = [
+    "app",
+    "app.config",
+    "app.dependencies",
+    "app.middleware",
+    "api",
+    "models",
+    "services.chroma_service",
+    "services.document_processor",
+    "services.scraper_service",
+    "services.llm_service",
+]
+
+# Загружаются при первом использовании, а не при старте
+DEFERRED_MODULES = ["chromadb", "torch", "sentence_transformers", "bs4", "aiohttp"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def build_code(modules: list, packages_only: bool) -> str:
+    code = "; ".join(f"import {module}" for module in modules)
+    if not packages_only:
+        # Роутеры подключаются в create_app через configure_fastapi_app
+        code += "; import api; api.ensure_api_initialized()"
+    return code
+
+def measure(code: str) -> dict:
+    """Один процесс с -X importtime: время (мс) и список импортированных модулей"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+    
+    total_us = 0
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        cumulative[name] = cumulative_us
+        # Модули верхнего уровня (отступ в один пробел) содержат вложенные импорты
+        if len(indent) == 1:
+            total_us += cumulative_us
+    return {"total_ms": total_us / 1000, "cumulative_ms": {name: us / 1000 for name, us in cumulative.items()}}
+
+def main(args) -> int:
+    modules = args.modules or STARTUP_MODULES
+    code = build_code(modules, args.packages_only)
+    runs = [measure(code) for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda run: run["total_ms"])
+    totals = [run["total_ms"] for run in runs]
+    
+    print(f"📊 Startup imports ({'packages only' if args.packages_only else 'with routers'}), "
+          f"{len(runs)} runs, Python {sys.version.split()[0]}")
+    print(f"   best {best['total_ms']:.1f} ms, median {statistics.median(totals):.1f} ms, budget {args.budget_ms:.0f} ms")
+    
+    print(f"\n{'module':<40}{'cumulative ms':>15}")
+    heaviest = sorted(best["cumulative_ms"].items(), key=lambda item: item[1], reverse=True)
+    for name, milliseconds in heaviest[:args.top]:
+        print(f"{name:<40}{milliseconds:>15.1f}")
+    
+    failed = False
+    imported = [module for module in DEFERRED_MODULES if module in best["cumulative_ms"]]
+    if imported:
+        print(f"\n❌ Deferred modules imported at startup: {', '.join(imported)}")
+        failed = True
+    if best["total_ms"] > args.budget_ms:
+        print(f"\n❌ Startup import time {best['total_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Startup import time within budget")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup import time benchmark (python -X importtime)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2000.0,
+                        help="Fail when the best run exceeds this import time")
+    parser.add_argument("--packages-only", action="store_true",
+                        help="Import packages without loading routers")
+    parser.add_argument("--modules", nargs="+", help="Modules to import (default: startup path)")
+    parser.add_argument("--top", type=int, default=15, help="Heaviest modules to print")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# ====================================
+# ФАЙЛ: backend/benchmarks/bench_ollama_session.py (НОВЫЙ ФАЙЛ)
+# Бенчмарк: сессия на каждый запрос vs общий пул соединений OllamaService
+# ====================================
+
+"""
+Поднимает локальный stub Ollama сервер (/api/tags, /api/generate) и сравнивает
+задержку запросов при создании новой aiohttp сессии на каждый запрос (старое
+поведение) и при общей сессии с keep-alive пулом.
+
+Запуск из backend/:
+    python benchmarks/bench_ollama_session.py --requests 500 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.llm_service import OllamaService
+
+MODEL = "stub:latest"
+
+async def start_stub_server(delay: float) -> web.AppRunner:
+    """Stub Ollama: фиксированный ответ с искусственной задержкой генерации"""
+    
+    async def tags(request):
+        return web.json_response({"models": [{"name": MODEL}]})
+    
+    async def generate(request):
+        payload = await request.json()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({
+            "model": payload.get("model"),
+            "response": "Stub answer for benchmark.",
+            "eval_count": 5,
+            "done": True
+        })
+    
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/api/generate", generate)
+    
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+def server_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}"
+
+async def legacy_generate(base_url: str, prompt: str) -> str:
+    """Старое поведение: новая сессия (и новое TCP соединение) на каждый запрос"""
+    session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120, connect=10))
+    try:
+        payload = {"model": MODEL, "prompt": prompt, "stream": False}
+        async with session.post(f"{base_url}/api/generate", json=payload) as response:
+            data = await response.json()
+            return data.get("response", "")
+    finally:
+        await session.close()
+
+async def pooled_generate(service: OllamaService, prompt: str) -> str:
+    """Новое поведение: общая сессия OllamaService"""
+    result = await service.generate_response(prompt, model=MODEL)
+    if not result.success:
+        raise RuntimeError(result.error)
+    return result.content
+
+async def run_case(name: str, call, requests: int, concurrency: int) -> dict:
+    """Выполняет requests вызовов с заданной конкурентностью, меряет задержку каждого"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(f"question {i}")
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    total = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "name": name,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "rps": requests / total
+    }
+
+async def main(args):
+    runner = await start_stub_server(args.delay)
+    base_url = server_url(runner)
+    
+    service = OllamaService(base_url=base_url, default_model=MODEL, pool_size=args.pool_size)
+    await service.check_service_health()
+    
+    try:
+        # Прогрев
+        await run_case("warmup", lambda p: legacy_generate(base_url, p), 20, args.concurrency)
+        await run_case("warmup", lambda p: pooled_generate(service, p), 20, args.concurrency)
+        
+        results = [
+            await run_case("per-request session", lambda p: legacy_generate(base_url, p),
+                           args.requests, args.concurrency),
+            await run_case("pooled session", lambda p: pooled_generate(service, p),
+                           args.requests, args.concurrency)
+        ]
+    finally:
+        await service.close()
+        await runner.cleanup()
+    
+    print(f"📊 {args.requests} requests, concurrency {args.concurrency}, stub delay {args.delay * 1000:.0f} ms")
+    print(f"{'case':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for r in results:
+        print(f"{r['name']:<22}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['rps']:>10.1f}")
+    
+    speedup = results[0]["mean_ms"] / results[1]["mean_ms"]
+    print(f"⚡ Pooled session: {speedup:.2f}x lower mean latency than per-request session")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OllamaService session pooling benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.0, help="Stub generation delay, seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -7,10 +7,13 @@
 Models Package - Pydantic модели для Legal Assistant API
 """
 
+import importlib
 import logging
-from typing import Dict, Any, List, Type, get_type_hints
-from pydantic import BaseModel
-import inspect
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List, Type
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +30,7 @@ class ModelsRegistry:
         self.internal_models = {}
         self.loading_errors = []
     
-    def register_model(self, model_class: Type[BaseModel], category: str, name: str = None):
+    def register_model(self, model_class: Type["BaseModel"], category: str, name: str = None):
         """Регистрирует модель в реестре"""
         try:
             model_name = name or model_class.__name__
@@ -229,6 +232,26 @@ def load_internal_models():
         models_registry.loading_errors.append(error_msg)
         logger.error(f"❌ {error_msg}")
 
+# Реестр заполняется при первом обращении (get_models_info, diagnose_models...),
+# а не при импорте пакета: импорт models.requests не загружает все модели
+_models_initialized = False
+_models_init_lock = threading.Lock()
+
+def ensure_models_initialized():
+    """Загружает модели в реестр один раз"""
+    global _models_initialized
+    if _models_initialized:
+        return
+    
+    with _models_init_lock:
+        if _models_initialized:
+            return
+        try:
+            initialize_models()
+        except Exception as e:
+            logger.error(f"❌ Models package initialization failed: {e}")
+        _models_initialized = True
+
 def initialize_models():
     """Инициализирует все модели"""
     logger.info("🚀 Initializing models package...")
@@ -258,6 +281,7 @@ def get_models_info() -> Dict[str, Any]:
     """Возвращает информацию о всех моделях"""
     import time
     
+    ensure_models_initialized()
     summary = models_registry.get_models_summary()
     all_models = models_registry.get_all_models()
     
@@ -284,10 +308,12 @@ def get_models_info() -> Dict[str, Any]:
 
 def get_model_schema(model_name: str, category: str = None) -> Dict[str, Any]:
     """Возвращает JSON схему для модели"""
+    ensure_models_initialized()
     return models_registry.generate_schema(model_name, category)
 
 def validate_model_data(model_name: str, data: Dict[str, Any], category: str = None) -> Dict[str, Any]:
     """Валидирует данные против модели"""
+    ensure_models_initialized()
     model_info = models_registry.get_model(model_name, category)
     if not model_info:
         return {
@@ -315,6 +341,7 @@ def validate_model_data(model_name: str, data: Dict[str, Any], category: str = N
 
 def get_model_examples() -> Dict[str, Any]:
     """Возвращает примеры данных для моделей"""
+    ensure_models_initialized()
     examples = {}
     
     # Примеры для основных моделей
@@ -355,6 +382,7 @@ def get_model_examples() -> Dict[str, Any]:
 def diagnose_models() -> Dict[str, Any]:
     """Диагностика состояния моделей"""
     logger.info("🔍 Running models package diagnostics...")
+    ensure_models_initialized()
     
     diagnostics = {
         "timestamp": None,
@@ -451,12 +479,6 @@ def diagnose_models() -> Dict[str, Any]:
         })
         return diagnostics
 
-# Автоматическая инициализация при импорте
-try:
-    initialize_models()
-except Exception as e:
-    logger.error(f"❌ Models package initialization failed: {e}")
-
 # Экспорт основных компонентов
 __all__ = [
     # Метаданные
@@ -468,6 +490,7 @@ __all__ = [
     
     # Функции инициализации
     "initialize_models",
+    "ensure_models_initialized",
     "load_request_models",
     "load_response_models", 
     "load_internal_models",
@@ -480,29 +503,32 @@ __all__ = [
     "diagnose_models"
 ]
 
-# Условный экспорт моделей (если они загружены успешно)
-try:
-    from models.requests import *
-    from models.responses import *
-    
-    # Добавляем имена моделей в __all__
-    __all__.extend([
-        # Request models
-        "ChatMessage", "SearchRequest", "DocumentUpload", "URLScrapeRequest",
-        "BulkScrapeRequest", "DocumentUpdate", "PredefinedScrapeRequest",
-        "ChatHistoryRequest", "FileUploadForm",
-        
-        # Response models  
-        "ChatResponse", "SearchResponse", "SearchResult", "DocumentsResponse",
-        "DocumentInfo", "DocumentUploadResponse", "DocumentDeleteResponse",
-        "ScrapeResponse", "ScrapeResult", "AdminStats", "ChatHistoryItem",
-        "ChatHistoryResponse", "HealthCheckResponse", "PredefinedSitesResponse",
-        "ErrorResponse", "SuccessResponse", "NotificationResponse"
-    ])
-    
-    logger.debug("✅ Models exported successfully")
+# Модели запросов и ответов экспортируются по первому обращению (models.ChatMessage)
+_REQUEST_MODELS = [
+    "ChatMessage", "SearchRequest", "DocumentUpload", "URLScrapeRequest",
+    "BulkScrapeRequest", "DocumentUpdate", "PredefinedScrapeRequest",
+    "ChatHistoryRequest", "FileUploadForm"
+]
+_RESPONSE_MODELS = [
+    "ChatResponse", "SearchResponse", "SearchResult", "DocumentsResponse",
+    "DocumentInfo", "DocumentUploadResponse", "DocumentDeleteResponse",
+    "ScrapeResponse", "ScrapeResult", "AdminStats", "ChatHistoryItem",
+    "ChatHistoryResponse", "HealthCheckResponse", "PredefinedSitesResponse",
+    "ErrorResponse", "SuccessResponse", "NotificationResponse"
+]
+_LAZY_EXPORTS = {
+    **{name: "models.requests" for name in _REQUEST_MODELS},
+    **{name: "models.responses" for name in _RESPONSE_MODELS}
+}
+__all__.extend(_LAZY_EXPORTS)
     
-except ImportError as e:
-    logger.warning(f"⚠️ Some models could not be exported: {e}")
+def __getattr__(name: str):
+    """Импортирует модуль с моделью при первом обращении к ней"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
 
 logger.debug(f"📦 Models package loaded with {len(__all__)} exported items")
\ No newline at end of file
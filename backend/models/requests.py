@@ -10,6 +10,7 @@ Pydantic модели для входящих запросов
 from pydantic import BaseModel, HttpUrl, Field, validator
 from typing import List, Optional, Dict, Any
 from app.config import DOCUMENT_CATEGORIES
+from services.result_projection import RESULT_FIELDS, parse_fields
 
 class ChatMessage(BaseModel):
     """Модель сообщения чата"""
@@ -21,12 +22,17 @@ class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000, description="Поисковый запрос")
     category: Optional[str] = Field(None, description="Фильтр по категории")
     limit: int = Field(default=5, ge=1, le=50, description="Количество результатов")
+    fields: Optional[List[str]] = Field(None, description=f"Поля результата: {', '.join(RESULT_FIELDS)} (по умолчанию snippet, metadata)")
     
     @validator('category')
     def validate_category(cls, v):
         if v and v not in DOCUMENT_CATEGORIES:
             raise ValueError(f"Category must be one of: {DOCUMENT_CATEGORIES}")
         return v
+    
+    @validator('fields')
+    def validate_fields(cls, v):
+        return list(parse_fields(v)) if v is not None else v
 
 class DocumentUpload(BaseModel):
     """Модель загрузки документа через текст"""
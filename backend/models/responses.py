@@ -18,11 +18,13 @@ class ChatResponse(BaseModel):
 
 class SearchResult(BaseModel):
     """Модель результата поиска"""
-    content: str = Field(..., description="Содержимое документа или фрагмента")
+    content: str = Field(default="", description="Фрагмент документа (поле snippet)")
     filename: str = Field(..., description="Имя файла")
     document_id: str = Field(..., description="ID документа")
     relevance_score: float = Field(..., ge=0, le=1, description="Оценка релевантности")
-    metadata: Dict[str, Any] = Field(..., description="Метаданные документа")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Метаданные документа (поле metadata)")
+    full_content: Optional[str] = Field(None, description="Полный текст найденного фрагмента (поле full_content)")
+    highlights: List[List[int]] = Field(default_factory=list, description="Смещения [начало, конец) слов запроса в content")
 
 class SearchResponse(BaseModel):
     """Модель ответа поиска"""
@@ -44,11 +46,16 @@ class DocumentInfo(BaseModel):
     chunks_count: int = Field(default=1, ge=1, description="Количество чанков")
     added_at: float = Field(..., description="Время добавления (Unix timestamp)")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Дополнительные метаданные")
+    content_truncated: bool = Field(default=False, description="content содержит только превью")
+    content_offset: Optional[int] = Field(None, ge=0, description="Смещение content в полном тексте")
+    total_length: Optional[int] = Field(None, ge=0, description="Длина полного текста")
+    has_more: Optional[bool] = Field(None, description="Есть продолжение текста после content")
 
 class DocumentsResponse(BaseModel):
     """Модель ответа со списком документов"""
     documents: List[DocumentInfo] = Field(..., description="Список документов")
     total: int = Field(..., ge=0, description="Общее количество документов")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None - последняя страница)")
     message: Optional[str] = Field(None, description="Дополнительное сообщение")
     database_type: Optional[str] = Field(None, description="Тип используемой базы данных")
 
@@ -0,0 +1,307 @@
+# ====================================
+# ФАЙЛ: backend/services/bm25_index.py (НОВЫЙ ФАЙЛ)
+# Инвертированный индекс с ранжированием BM25 по чанкам
+# ====================================
+
+"""
+BM25 Index - Лексический поиск по чанкам без полного просмотра корпуса
+
+- Токенизация для украинского и английского: Unicode слова, апострофы внутри слов,
+  легкое отсечение окончаний, числа сохраняются (номера статей и актов)
+- Индекс term → {chunk_id: tf} обновляется инкрементально при добавлении и удалении
+- Запрос просматривает только posting-листы своих терминов; частые термины после
+  набора top-k кандидатов проверяются только для кандидатов (MaxScore)
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[^\W_]+(?:['’ʼ`][^\W_]+)*")
+_APOSTROPHES_RE = re.compile(r"['’ʼ`]")
+_CYRILLIC_RE = re.compile(r"[а-яіїєґ]")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+і й та або але а в у на до з із зі за по про під від для що це як не ні чи же ж би б
+його її їх він вона воно вони ми ви я ти який яка яке які цей ця ці той та те ті бути є був була
+""".split())
+
+# Флективные окончания украинских слов (без словообразовательных суффиксов), от длинных к коротким
+_UK_SUFFIXES = sorted("""
+ами ями ого ому ими іми
+ах ях ів їв ій ою ею их ім им ом ем ам ям ої ий ія ію ії
+а я о е у ю і и ь й
+""".split(), key=len, reverse=True)
+_MIN_STEM = 4
+
+def _stem(token: str) -> str:
+    """Легкое отсечение окончаний (без словарей, только частые флексии)"""
+    if token.isdigit():
+        return token
+    if _CYRILLIC_RE.search(token):
+        for suffix in _UK_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+                return token[:-len(suffix)]
+        return token
+    # Английское множественное число
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на нормализованные термины"""
+    terms = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = _APOSTROPHES_RE.sub("", match.group())
+        if token in _STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        terms.append(_stem(token))
+    return terms
+
+class BM25Index:
+    """Инвертированный индекс чанков с ранжированием Okapi BM25"""
+    
+    FORMAT_VERSION = 1
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        
+        # term → {chunk_id: tf}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # chunk_id → (doc_id, chunk_index, length, terms)
+        self.chunks: Dict[int, Tuple[str, int, int, List[str]]] = {}
+        # doc_id → (ревизия, [chunk_id])
+        self.documents: Dict[str, Tuple[Any, List[int]]] = {}
+        self.total_length = 0
+        self._next_chunk_id = 0
+    
+    # ====================================
+    # ОБНОВЛЕНИЕ
+    # ====================================
+    
+    def add_document(self, doc_id: str, chunks: Iterable[str], revision: Any = None):
+        """Индексирует чанки документа (старая версия документа удаляется)"""
+        self.remove_document(doc_id)
+        
+        chunk_ids = []
+        for chunk_index, text in enumerate(chunks):
+            terms = tokenize(text)
+            if not terms:
+                continue
+            
+            chunk_id = self._next_chunk_id
+            self._next_chunk_id += 1
+            
+            frequencies = Counter(terms)
+            for term, tf in frequencies.items():
+                self.postings.setdefault(term, {})[chunk_id] = tf
+            
+            self.chunks[chunk_id] = (doc_id, chunk_index, len(terms), list(frequencies))
+            self.total_length += len(terms)
+            chunk_ids.append(chunk_id)
+        
+        self.documents[doc_id] = (revision, chunk_ids)
+    
+    def remove_document(self, doc_id: str) -> bool:
+        """Удаляет документ из индекса (затрагивает только его posting-листы)"""
+        entry = self.documents.pop(doc_id, None)
+        if entry is None:
+            return False
+        
+        for chunk_id in entry[1]:
+            _, _, length, terms = self.chunks.pop(chunk_id)
+            self.total_length -= length
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        return True
+    
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+    
+    def get_revision(self, doc_id: str) -> Any:
+        entry = self.documents.get(doc_id)
+        return entry[0] if entry else None
+    
+    # ====================================
+    # ПОИСК
+    # ====================================
+    
+    def search(self, query: str, limit: int = 10,
+               doc_filter: Optional[Callable[[str], bool]] = None,
+               per_document: bool = True) -> List[Dict[str, Any]]:
+        """Лучшие чанки по BM25 (по умолчанию один лучший чанк на документ)"""
+        terms = set(tokenize(query))
+        if not terms or not self.chunks:
+            return []
+        
+        n_chunks = len(self.chunks)
+        average_length = self.total_length / n_chunks
+        
+        # Редкие термины (большой idf) первыми: они задают кандидатов
+        weighted = []
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings:
+                df = len(postings)
+                weighted.append((math.log(1 + (n_chunks - df + 0.5) / (df + 0.5)), term, postings))
+        weighted.sort(key=lambda item: item[0], reverse=True)
+        
+        # Верхняя граница вклада термина: idf * (k1 + 1) при tf → ∞
+        remaining_bound = sum(idf for idf, _, _ in weighted) * (self.k1 + 1)
+        scores: Dict[int, float] = {}
+        matched_terms: Dict[int, int] = {}
+        pruning = False
+        
+        for idf, term, postings in weighted:
+            remaining_bound -= idf * (self.k1 + 1)
+            
+            if pruning:
+                # MaxScore: новые чанки уже не попадут в top-k, обновляем только кандидатов
+                for chunk_id in scores:
+                    tf = postings.get(chunk_id)
+                    if tf:
+                        scores[chunk_id] += self._term_score(idf, tf, chunk_id, average_length)
+                        matched_terms[chunk_id] += 1
+                continue
+            
+            for chunk_id, tf in postings.items():
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + self._term_score(idf, tf, chunk_id, average_length)
+                matched_terms[chunk_id] = matched_terms.get(chunk_id, 0) + 1
+            
+            if remaining_bound > 0:
+                threshold = self._kth_score(scores, limit, doc_filter, per_document)
+                pruning = threshold is not None and remaining_bound < threshold
+        
+        # Ленивая сортировка: извлекаем из кучи только нужное количество
+        heap = [(-score, chunk_id) for chunk_id, score in scores.items()]
+        heapq.heapify(heap)
+        
+        results = []
+        seen_documents = set()
+        rejected_documents = set()
+        while heap and len(results) < limit:
+            negative_score, chunk_id = heapq.heappop(heap)
+            doc_id, chunk_index, _, _ = self.chunks[chunk_id]
+            
+            if doc_id in rejected_documents or (per_document and doc_id in seen_documents):
+                continue
+            if doc_filter is not None and doc_id not in seen_documents and not doc_filter(doc_id):
+                rejected_documents.add(doc_id)
+                continue
+            
+            seen_documents.add(doc_id)
+            results.append({
+                "document_id": doc_id,
+                "chunk_index": chunk_index,
+                "score": -negative_score,
+                "matched_terms": matched_terms[chunk_id],
+                "query_terms": len(terms)
+            })
+        
+        return results
+    
+    def _term_score(self, idf: float, tf: int, chunk_id: int, average_length: float) -> float:
+        """Вклад одного термина в BM25 чанка"""
+        norm = self.k1 * (1 - self.b + self.b * self.chunks[chunk_id][2] / average_length)
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+    
+    def _kth_score(self, scores: Dict[int, float], limit: int,
+                   doc_filter: Optional[Callable[[str], bool]], per_document: bool) -> Optional[float]:
+        """Текущий (частичный) балл limit-го результата или None, если кандидатов меньше"""
+        if len(scores) < limit:
+            return None
+        
+        best: Dict[Any, float] = {}
+        for chunk_id, score in scores.items():
+            doc_id = self.chunks[chunk_id][0]
+            key = doc_id if per_document else chunk_id
+            if score > best.get(key, 0.0):
+                best[key] = score
+        
+        if doc_filter is not None:
+            eligible = [score for key, score in best.items()
+                        if doc_filter(key if per_document else self.chunks[key][0])]
+        else:
+            eligible = list(best.values())
+        
+        if len(eligible) < limit:
+            return None
+        return heapq.nlargest(limit, eligible)[-1]
+    
+    # ====================================
+    # СОХРАНЕНИЕ
+    # ====================================
+    
+    def save(self, path: str):
+        """Атомарно сохраняет индекс в JSON"""
+        data = {
+            "version": self.FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "documents": {
+                doc_id: {
+                    "revision": revision,
+                    # [номер чанка, длина, {term: tf}] - posting-листы восстанавливаются при загрузке
+                    "chunks": [self._dump_chunk(chunk_id) for chunk_id in chunk_ids]
+                }
+                for doc_id, (revision, chunk_ids) in self.documents.items()
+            }
+        }
+        
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _dump_chunk(self, chunk_id: int) -> list:
+        _, chunk_index, length, terms = self.chunks[chunk_id]
+        return [chunk_index, length, {term: self.postings[term][chunk_id] for term in terms}]
+    
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Загружает индекс, сохраненный save()"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index version: {data.get('version')}")
+        
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, entry in data["documents"].items():
+            chunk_ids = []
+            for chunk_index, length, frequencies in entry["chunks"]:
+                chunk_id = index._next_chunk_id
+                index._next_chunk_id += 1
+                for term, tf in frequencies.items():
+                    index.postings.setdefault(term, {})[chunk_id] = tf
+                index.chunks[chunk_id] = (doc_id, chunk_index, length, list(frequencies))
+                index.total_length += length
+                chunk_ids.append(chunk_id)
+            index.documents[doc_id] = (entry["revision"], chunk_ids)
+        return index
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Размер индекса"""
+        return {
+            "documents": len(self.documents),
+            "chunks": len(self.chunks),
+            "terms": len(self.postings),
+            "average_chunk_length": self.total_length / len(self.chunks) if self.chunks else 0.0
+        }
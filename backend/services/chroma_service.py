@@ -3,17 +3,32 @@
 # Заменить существующий файл полностью
 # ====================================
 
-import chromadb
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
+from cachetools import LRUCache, TTLCache
+import asyncio
 import logging
+import threading
 import time
 import hashlib
-from typing import List, Dict, Optional, Any
+import copy
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Optional, Any
 from dataclasses import dataclass
 import json
 import os
 
+from services.bm25_index import BM25Index
+from services.content_chunker import CHUNKING_MODES, ContentDefinedChunker
+from services.document_catalog import DocumentCatalog
+from services.document_listing import DocumentListIndex
+from services.embedding_backends import EMBEDDING_BACKENDS, create_embedding_function
+from services.embedding_cache import EmbeddingCache
+from services.executor_pools import BoundedExecutor
+from services.lazy_embedding import LazyEmbeddingFunction
+from services.result_projection import parse_fields, project_result
+from services.snippet_selector import SnippetSelector
+
+if TYPE_CHECKING:
+    from services.embedding_workers import EmbeddingProcessPool
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -25,23 +40,140 @@ class ProcessedDocument:
     category: str
     chunks: List[str]
 
+# Поля метаданных, которые пересчитываются при сборке записей документа
+_DERIVED_METADATA_KEYS = (
+    "is_chunk", "chunk_index", "parent_document_id", "content_length", "word_count", "chunks_count"
+)
+
+# Операторы фильтра where ChromaDB, которые BM25 поиск проверяет по метаданным документа
+_WHERE_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target
+}
+
+def _compile_where(where: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """Предикат по метаданным для фильтра where (ValueError для неподдерживаемых операторов)"""
+    predicates = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_compile_where(part) for part in condition]
+            combine = all if key == "$and" else any
+            predicates.append(lambda metadata, parts=parts, combine=combine: combine(part(metadata) for part in parts))
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        
+        conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+        checks = []
+        for operator, target in conditions.items():
+            if operator not in _WHERE_OPERATORS:
+                raise ValueError(f"Unsupported where operator: {operator}")
+            checks.append((_WHERE_OPERATORS[operator], target))
+        predicates.append(lambda metadata, key=key, checks=checks: all(
+            _check_where(check, metadata.get(key), target) for check, target in checks
+        ))
+    return lambda metadata: all(predicate(metadata) for predicate in predicates)
+
+def _check_where(check: Callable[[Any, Any], bool], value: Any, target: Any) -> bool:
+    try:
+        return check(value, target)
+    except TypeError:
+        # Сравнение несовместимых типов (например, строка с числом) - не совпадает
+        return False
+
 class ChromaDBService:
     """Сервис для работы с ChromaDB векторной базой данных"""
     
-    def __init__(self, persist_directory: str = "./chromadb_data"):
+    def __init__(self, persist_directory: str = "./chromadb_data",
+                 embedding_batch_size: int = 256, write_batch_size: int = 1000,
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 embedding_cache_dir: Optional[str] = None,
+                 query_cache_size: int = 1000, result_cache_size: int = 500,
+                 result_cache_ttl: int = 300, hybrid_search: bool = True,
+                 rrf_k: int = 60, keyword_flush_interval: int = 256,
+                 chunker: Optional[Callable[[str], List[str]]] = None,
+                 io_workers: int = 4, embedding_workers: int = 1,
+                 embedding_processes: int = 0, embedding_process_threshold: int = 512,
+                 embedding_backend: str = "sentence_transformers", onnx_model_dir: str = "./onnx_models",
+                 embedding_self_check_tolerance: float = 0.98):
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {embedding_backend!r}, expected one of {EMBEDDING_BACKENDS}")
         self.persist_directory = persist_directory
+        # Разбиение текста на чанки при обновлении документа
+        self.chunker = chunker or DocumentProcessor()._chunk_text
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        
+        # Реализация модели: sentence_transformers (PyTorch) или onnx_int8 (CPU)
+        self.embedding_backend = embedding_backend
+        self.configured_embedding_backend = embedding_backend
+        self.onnx_model_dir = onnx_model_dir
+        self.embedding_self_check_tolerance = embedding_self_check_tolerance
+        self.embedding_backend_error: Optional[str] = None
+        
+        # Синхронные вызовы коллекции и модели выполняются в своих пулах потоков,
+        # чтобы большая загрузка не останавливала event loop (чат, поиск)
+        self.io_pool = BoundedExecutor("chroma_io", io_workers)
+        self.embedding_pool = BoundedExecutor("embedding", embedding_workers)
+        
+        # Пул процессов для больших пакетов эмбеддингов (создается при первом большом пакете)
+        self.embedding_processes = max(0, embedding_processes)
+        self.embedding_process_threshold = max(1, embedding_process_threshold)
+        self._process_pool: Optional["EmbeddingProcessPool"] = None
+        self._process_pool_lock = threading.Lock()
+        self.process_pool_stats = {"batches": 0, "texts": 0, "failures": 0}
+        
+        # Время фаз инициализации (секунды)
+        self.startup_timings: Dict[str, float] = {}
+        phase_start = time.perf_counter()
         
         # Создаем директорию если не существует
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Инициализируем ChromaDB клиент
+        # Инициализируем ChromaDB клиент (chromadb импортируется при создании сервиса,
+        # а не при импорте модуля; ImportError обрабатывает init_services)
+        import chromadb
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        # Настраиваем эмбеддинг функцию
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
+        # Настраиваем эмбеддинг функцию: модель загружается при первом вызове
+        # или фоновым прогревом (warm_up), а не при создании сервиса
+        self.embedding_function = LazyEmbeddingFunction(
+            self._create_embedding_function,
+            name=f"{embedding_model} ({embedding_backend})"
         )
         
+        # Дисковый кэш эмбеддингов чанков (опционально); векторы квантованной
+        # модели хранятся отдельно от векторов эталонной
+        self.embedding_cache = None
+        if embedding_cache_dir:
+            cache_name = embedding_model
+            if embedding_backend != "sentence_transformers":
+                cache_name = f"{embedding_model}@{embedding_backend}"
+            try:
+                self.embedding_cache = EmbeddingCache(embedding_cache_dir, cache_name)
+            except Exception as e:
+                logger.warning(f"Embedding cache disabled: {e}")
+        
+        # Кэш поиска: уровень 1 - эмбеддинги запросов, уровень 2 - готовые результаты
+        self.collection_version = 0
+        self._query_embedding_cache = LRUCache(maxsize=max(1, query_cache_size))
+        self._search_result_cache = TTLCache(maxsize=max(1, result_cache_size), ttl=result_cache_ttl)
+        self._query_cache_lock = threading.Lock()
+        self.snippet_selector = SnippetSelector(max_length=400)
+        self.search_cache_stats = {
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+            "result_hits": 0,
+            "result_misses": 0,
+            "invalidations": 0
+        }
+        
         # Создаем или получаем коллекцию документов
         self.collection = self.client.get_or_create_collection(
             name="legal_documents",
@@ -49,104 +181,328 @@ class ChromaDBService:
             metadata={"description": "Legal Assistant Documents Collection"}
         )
         
-        logger.info(f"ChromaDB initialized with {self.collection.count()} documents")
+        # Размер пакета записи не должен превышать лимит клиента ChromaDB
+        client_max_batch = getattr(self.client, "max_batch_size", None) or write_batch_size
+        self.write_batch_size = max(1, min(write_batch_size, client_max_batch))
+        phase_start = self._record_startup_phase("collection", phase_start)
+        
+        # Лексический BM25 индекс рядом с коллекцией (гибридный поиск)
+        self.rrf_k = rrf_k
+        self.keyword_index_path = os.path.join(persist_directory, "keyword_index.json")
+        self.keyword_flush_interval = max(1, keyword_flush_interval)
+        self.keyword_index: Optional[BM25Index] = None
+        self._keyword_metadata: Dict[str, Dict[str, Any]] = {}
+        self._keyword_lock = threading.Lock()
+        self._keyword_unsaved = 0
+        self.retrieval_stats = {
+            "hybrid_searches": 0,
+            "vector_time_total": 0.0,
+            "keyword_time_total": 0.0,
+            "keyword_only_results": 0,
+            "keyword_skipped_searches": 0
+        }
+        # Метаданные основных документов: индекс списка и сверка BM25 индекса
+        main_documents = self.collection.get(where={"is_chunk": False}, include=["metadatas"])
+        live = dict(zip(main_documents["ids"], main_documents["metadatas"]))
+        
+        # Сортированный по дате индекс для постраничного списка и каталог для статистики
+        self.listing = DocumentListIndex()
+        self.catalog = DocumentCatalog()
+        for doc_id, metadata in live.items():
+            self._track_document(doc_id, metadata)
+        phase_start = self._record_startup_phase("catalog", phase_start)
+        
+        if hybrid_search:
+            try:
+                self._load_keyword_index(live)
+            except Exception as e:
+                logger.warning(f"Keyword index disabled, using vector search only: {e}")
+                self.keyword_index = None
+            self._record_startup_phase("keyword_index", phase_start)
+        
+        timings = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings.items())
+        logger.info(f"ChromaDB initialized with {len(live)} documents ({timings})")
+    
+    def _create_embedding_function(self):
+        """Загружает модель выбранного бэкенда; при ошибке или неудачной самопроверке - эталонную"""
+        try:
+            return create_embedding_function(
+                self.embedding_backend, self.embedding_model, self.onnx_model_dir,
+                self_check_tolerance=self.embedding_self_check_tolerance
+            )
+        except Exception as e:
+            if self.embedding_backend == "sentence_transformers":
+                raise
+            logger.error(f"❌ Embedding backend {self.embedding_backend} unavailable, using sentence_transformers: {e}")
+            self.embedding_backend_error = str(e)
+            self.embedding_backend = "sentence_transformers"
+            return create_embedding_function("sentence_transformers", self.embedding_model)
+    
+    def _record_startup_phase(self, phase: str, started_at: float) -> float:
+        """Запоминает длительность фазы инициализации и возвращает начало следующей"""
+        now = time.perf_counter()
+        self.startup_timings[phase] = round(now - started_at, 3)
+        return now
+    
+    async def warm_up(self):
+        """Загружает модель эмбеддингов и выполняет первый вызов в пуле модели"""
+        await self.embedding_pool.run(self.embedding_function.warm_up)
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """Готовность к поиску: модель эмбеддингов загружена и прогрета"""
+        return {
+            "ready": self.embedding_function.is_ready,
+            "embedding_model": self.embedding_function.get_status(),
+            "startup_timings": dict(self.startup_timings)
+        }
     
     async def add_document(self, document: ProcessedDocument) -> bool:
         """Добавляет документ в ChromaDB"""
+        result = await self.add_documents([document])
+        return result["success"]
+    
+    async def add_documents(self, documents: List[ProcessedDocument]) -> Dict[str, Any]:
+        """
+        Пакетное добавление документов в ChromaDB.
+        
+        Одна проверка существования на все id, эмбеддинги новых текстов большими
+        пакетами (одинаковые тексты считаются один раз) и запись пакетами
+        фиксированного размера. Возвращает статистику с пропускной способностью.
+        """
+        start_time = time.time()
+        per_document: Dict[str, str] = {}
+        
         try:
-            # Проверяем существование документа
-            existing_docs = self.collection.get(
-                ids=[document.id],
-                include=["metadatas"]
-            )
+            # Собираем записи: основной документ + чанки
+            records_by_doc: Dict[str, List[Dict[str, Any]]] = {}
             
-            if existing_docs["ids"]:
-                logger.warning(f"Document {document.id} already exists, skipping addition")
-                return True  # Считаем успешным, так как документ уже есть
-            
-            # Подготавливаем метаданные для ChromaDB
-            chroma_metadata = {
-                "filename": document.filename,
-                "category": document.category,
-                "content_length": len(document.content),
-                "word_count": len(document.content.split()),
-                "chunks_count": len(document.chunks),
-                "added_at": time.time(),
-                **document.metadata
-            }
-            
-            # Добавляем основной документ
-            main_metadata = chroma_metadata.copy()
-            main_metadata.update({
-                "is_chunk": False,
-                "chunk_index": -1,
-                "parent_document_id": document.id
-            })
+            for document in documents:
+                if document.id in records_by_doc:
+                    logger.debug(f"Document {document.id} passed twice in batch, skipping duplicate")
+                    continue
+                records_by_doc[document.id] = self._build_records(document)
             
-            self.collection.add(
-                ids=[document.id],
-                documents=[document.content],
-                metadatas=[main_metadata]
-            )
+            all_ids = [record["id"] for records in records_by_doc.values() for record in records]
+            existing_ids = await self.io_pool.run(self._get_existing_ids, all_ids)
             
-            logger.info(f"✅ Added main document {document.filename}")
+            new_records = []
+            skipped_chunks = 0
             
-            # Если документ большой, добавляем чанки
-            if len(document.chunks) > 1:
-                chunk_ids = []
-                chunk_documents = []
-                chunk_metadatas = []
+            for doc_id, records in records_by_doc.items():
+                # Если основной документ уже есть - считаем документ добавленным
+                if doc_id in existing_ids:
+                    logger.warning(f"Document {doc_id} already exists, skipping addition")
+                    per_document[doc_id] = "exists"
+                    continue
                 
-                for i, chunk in enumerate(document.chunks):
-                    chunk_id = f"{document.id}_chunk_{i}"
-                    
-                    # Проверяем существование чанка
-                    existing_chunk = self.collection.get(
-                        ids=[chunk_id],
-                        include=["metadatas"]
-                    )
-                    
-                    if existing_chunk["ids"]:
-                        logger.debug(f"Chunk {chunk_id} already exists, skipping")
+                for record in records:
+                    if record["id"] in existing_ids:
+                        logger.debug(f"Chunk {record['id']} already exists, skipping")
+                        skipped_chunks += 1
                         continue
-                    
-                    chunk_ids.append(chunk_id)
-                    chunk_documents.append(chunk)
-                    
-                    chunk_metadata = chroma_metadata.copy()
-                    chunk_metadata.update({
-                        "chunk_index": i,
-                        "parent_document_id": document.id,
-                        "is_chunk": True
-                    })
-                    chunk_metadatas.append(chunk_metadata)
-                
-                # Добавляем только новые чанки
-                if chunk_ids:
-                    self.collection.add(
-                        ids=chunk_ids,
-                        documents=chunk_documents,
-                        metadatas=chunk_metadatas
-                    )
-                    
-                    logger.info(f"✅ Added {len(chunk_ids)} new chunks for {document.filename}")
-                else:
-                    logger.info(f"✅ All chunks for {document.filename} already exist")
-            else:
-                logger.info(f"✅ Added single document {document.filename}")
+                    new_records.append(record)
+                per_document[doc_id] = "added"
+            
+            # Эмбеддинги считаем для уникальных текстов
+            embeddings = await self.embedding_pool.run(
+                self._embed_texts, [record["document"] for record in new_records]
+            )
             
-            return True
+            # Пишем пакетами
+            await self.io_pool.run(self._write_records, self.collection.add, new_records, embeddings)
+            
+            if new_records:
+                self._invalidate_search_cache()
+            
+            for doc_id, status in per_document.items():
+                if status == "added":
+                    await self.io_pool.run(self._keyword_add, doc_id, records_by_doc[doc_id])
+                    self._track_document(doc_id, records_by_doc[doc_id][0]["metadata"])
+            
+            elapsed = time.time() - start_time
+            chunks_per_second = len(new_records) / elapsed if elapsed > 0 else 0.0
+            added_documents = sum(1 for status in per_document.values() if status == "added")
+            
+            logger.info(f"✅ Bulk ingestion: {added_documents}/{len(records_by_doc)} documents, "
+                       f"{len(new_records)} records written in {elapsed:.2f}s "
+                       f"({chunks_per_second:.1f} chunks/s)")
+            
+            return {
+                "success": True,
+                "documents_total": len(records_by_doc),
+                "documents_added": added_documents,
+                "documents_existing": len(records_by_doc) - added_documents,
+                "records_written": len(new_records),
+                "records_skipped": skipped_chunks,
+                "unique_texts_embedded": len(set(record["document"] for record in new_records)),
+                "elapsed_seconds": elapsed,
+                "chunks_per_second": chunks_per_second,
+                "documents": per_document
+            }
             
         except Exception as e:
-            logger.error(f"Error adding document to ChromaDB: {str(e)}")
-            return False
+            logger.error(f"Error adding documents to ChromaDB: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "documents_total": len(documents),
+                "documents_added": 0,
+                "records_written": 0,
+                "elapsed_seconds": time.time() - start_time,
+                "chunks_per_second": 0.0,
+                "documents": {document.id: "failed" for document in documents}
+            }
+    
+    def _build_records(self, document: ProcessedDocument) -> List[Dict[str, Any]]:
+        """Формирует записи ChromaDB для документа и его чанков"""
+        # Подготавливаем метаданные для ChromaDB
+        chroma_metadata = {
+            "filename": document.filename,
+            "category": document.category,
+            "content_length": len(document.content),
+            "word_count": len(document.content.split()),
+            "chunks_count": len(document.chunks),
+            "added_at": time.time(),
+            **document.metadata
+        }
+        
+        main_metadata = chroma_metadata.copy()
+        main_metadata.update({
+            "is_chunk": False,
+            "chunk_index": -1,
+            "parent_document_id": document.id
+        })
+        
+        records = [{"id": document.id, "document": document.content, "metadata": main_metadata}]
+        
+        # Если документ большой, добавляем чанки
+        if len(document.chunks) > 1:
+            for i, chunk in enumerate(document.chunks):
+                chunk_metadata = chroma_metadata.copy()
+                chunk_metadata.update({
+                    "chunk_index": i,
+                    "parent_document_id": document.id,
+                    "is_chunk": True
+                })
+                records.append({
+                    "id": f"{document.id}_chunk_{i}",
+                    "document": chunk,
+                    "metadata": chunk_metadata
+                })
+        
+        return records
+    
+    def _get_existing_ids(self, ids: List[str]) -> set:
+        """Возвращает id, которые уже есть в коллекции (пакетная проверка)"""
+        existing = set()
+        
+        for batch_start in range(0, len(ids), self.write_batch_size):
+            batch = ids[batch_start:batch_start + self.write_batch_size]
+            result = self.collection.get(ids=batch, include=[])
+            existing.update(result["ids"])
+        
+        return existing
+    
+    def _write_records(self, write: Callable[..., Any], records: List[Dict[str, Any]],
+                       embeddings: List[List[float]]):
+        """Пишет записи пакетами фиксированного размера (collection.add или collection.upsert)"""
+        for batch_start in range(0, len(records), self.write_batch_size):
+            batch = records[batch_start:batch_start + self.write_batch_size]
+            write(
+                ids=[record["id"] for record in batch],
+                documents=[record["document"] for record in batch],
+                metadatas=[record["metadata"] for record in batch],
+                embeddings=embeddings[batch_start:batch_start + self.write_batch_size]
+            )
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Считает эмбеддинги пакетами: одинаковые тексты считаются один раз,
+        готовые векторы берутся из дискового кэша
+        """
+        if not texts:
+            return []
+        
+        unique_texts = list(dict.fromkeys(texts))
+        vectors: Dict[str, List[float]] = {}
+        
+        if self.embedding_cache:
+            for text, cached in zip(unique_texts, self.embedding_cache.get_many(unique_texts)):
+                if cached is not None:
+                    vectors[text] = cached.tolist()
+        
+        missing_texts = [text for text in unique_texts if text not in vectors]
+        
+        for batch, batch_vectors in self._compute_embeddings(missing_texts):
+            if self.embedding_cache:
+                self.embedding_cache.put_many(batch, batch_vectors)
+            
+            vectors.update(zip(batch, batch_vectors))
+        
+        return [vectors[text] for text in texts]
+    
+    def _compute_embeddings(self, texts: List[str]) -> Iterable[tuple]:
+        """Пары (тексты пакета, векторы): большой пакет - в пуле процессов, иначе моделью в этом процессе"""
+        if self.embedding_processes and len(texts) >= self.embedding_process_threshold:
+            try:
+                matrix = self._get_process_pool().embed(texts)
+            except Exception as e:
+                # Воркеры не запустились или упали - считаем в этом процессе
+                logger.warning(f"Embedding process pool failed, using in-process model: {e}")
+                self.process_pool_stats["failures"] += 1
+                self._shutdown_process_pool()
+                self.embedding_processes = 0
+            else:
+                self.process_pool_stats["batches"] += 1
+                self.process_pool_stats["texts"] += len(texts)
+                yield texts, matrix.tolist()
+                return
+        
+        for batch_start in range(0, len(texts), self.embedding_batch_size):
+            batch = texts[batch_start:batch_start + self.embedding_batch_size]
+            yield batch, [[float(value) for value in vector] for vector in self.embedding_function(batch)]
+    
+    def _get_process_pool(self) -> "EmbeddingProcessPool":
+        from services.embedding_workers import EmbeddingProcessPool
+        
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = EmbeddingProcessPool(
+                    self.embedding_model, workers=self.embedding_processes,
+                    chunk_size=self.embedding_batch_size, backend=self.embedding_backend,
+                    onnx_dir=self.onnx_model_dir, self_check_tolerance=self.embedding_self_check_tolerance
+                )
+            return self._process_pool
+    
+    def _shutdown_process_pool(self):
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False)
+                self._process_pool = None
     
     async def search_documents(self, query: str, n_results: int = 5, 
-                             category: str = None, min_relevance: float = 0.3, **filters) -> List[Dict]:
+                             category: str = None, min_relevance: float = 0.3,
+                             fields: Optional[Iterable[str]] = None, per_document: bool = True,
+                             **filters) -> List[Dict]:
         """
-        Поиск документов по семантическому сходству с улучшенной фильтрацией
+        Гибридный поиск: семантический (эмбеддинги) и лексический (BM25) параллельно,
+        объединение результатов через reciprocal rank fusion.
+        fields - поля результата (snippet, full_content, metadata), по умолчанию без full_content
+        per_document=False - отдельные чанки без группировки по документам (контекст LLM)
         """
+        fields = parse_fields(fields)
         try:
+            cache_key = (
+                query, category, json.dumps(filters, sort_keys=True, default=str),
+                n_results, min_relevance, per_document, self.collection_version
+            )
+            cached_results = self._search_result_cache.get(cache_key)
+            if cached_results is not None:
+                self.search_cache_stats["result_hits"] += 1
+                logger.debug(f"Search cache hit for '{query}'")
+                return [project_result(result, fields) for result in copy.deepcopy(cached_results)]
+            self.search_cache_stats["result_misses"] += 1
+            
             # Подготавливаем фильтры
             where_filter = {}
             
@@ -159,19 +515,35 @@ class ChromaDBService:
                     where_filter[key] = value
             
             # Увеличиваем количество результатов для лучшей фильтрации
-            search_limit = min(n_results * 3, 20)
-            
-            # ИСПРАВЛЕНО: Ищем во ВСЕХ документах и чанках
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=search_limit,
-                where=where_filter if where_filter else None,  # Убрали фильтр is_chunk
-                include=["documents", "metadatas", "distances"]
-            )
+            search_limit = max(min(n_results * 3, 20), n_results)
+            
+            # BM25 проверяет тот же фильтр по метаданным; с неподдерживаемым оператором
+            # поиск выполняется только векторно, причина попадает в search_info
+            keyword_filter, keyword_skipped = None, None
+            if self.keyword_index is not None and where_filter:
+                try:
+                    keyword_filter = _compile_where(where_filter)
+                except ValueError as e:
+                    keyword_skipped = str(e)
+                    self.retrieval_stats["keyword_skipped_searches"] += 1
+                    logger.warning(f"Keyword search skipped for '{query}': {e}")
+            use_keyword = self.keyword_index is not None and keyword_skipped is None
+            
+            # Оба поиска выполняются параллельно в пулах потоков
+            search_start = time.perf_counter()
+            vector_future = self._timed_vector_query(query, search_limit, where_filter)
+            if use_keyword:
+                keyword_future = self.io_pool.run(self._timed, self._keyword_query,
+                                                  query, search_limit, keyword_filter, per_document)
+                (results, vector_time), (keyword_hits, keyword_time) = await asyncio.gather(
+                    vector_future, keyword_future
+                )
+            else:
+                results, vector_time = await vector_future
+                keyword_hits, keyword_time = [], None
             
             # Форматируем и фильтруем результаты
             formatted_results = []
-            query_lower = query.lower()
             seen_parent_ids = set()  # Для избежания дубликатов
             
             if results["documents"] and results["documents"][0]:
@@ -193,64 +565,59 @@ class ChromaDBService:
                         logger.debug(f"Skipping result with low relevance: {relevance_score:.3f} (distance: {distance:.3f})")
                         continue
                     
-                    document_content = results["documents"][0][i]
                     metadata = results["metadatas"][0][i]
                     
-                    # Получаем parent_document_id
-                    parent_doc_id = metadata.get("parent_document_id")
-                    current_doc_id = results["ids"][0][i]
-                    
-                    # Избегаем дубликатов - если уже есть основной документ, пропускаем чанки
-                    unique_id = parent_doc_id or current_doc_id
-                    if unique_id in seen_parent_ids:
-                        logger.debug(f"Skipping duplicate parent document: {unique_id}")
+                    if per_document:
+                        # Избегаем дубликатов - если уже есть основной документ, пропускаем чанки
+                        unique_id = metadata.get("parent_document_id") or results["ids"][0][i]
+                        if unique_id in seen_parent_ids:
+                            logger.debug(f"Skipping duplicate parent document: {unique_id}")
+                            continue
+                        seen_parent_ids.add(unique_id)
+                    elif not metadata.get("is_chunk", False) and metadata.get("chunks_count", 0) > 1:
+                        # Полный текст документа повторяет его чанки
                         continue
-                    seen_parent_ids.add(unique_id)
                     
-                    # Проверяем наличие точного совпадения в тексте
-                    content_lower = document_content.lower()
-                    filename_lower = metadata.get("filename", "").lower()
+                    formatted_results.append(self._format_result(
+                        query, results["ids"][0][i], results["documents"][0][i],
+                        metadata, relevance_score, distance
+                    ))
                     
-                    # Определяем тип совпадения
-                    exact_match = query_lower in content_lower or query_lower in filename_lower
-                    semantic_match = relevance_score > 0.7
+            if not use_keyword:
+                # Сортируем: сначала точные совпадения, потом основные документы, потом по релевантности
+                formatted_results.sort(key=lambda x: (
+                    x["exact_match"],                    # 1. Точные совпадения первыми
+                    not x["is_chunk"],                   # 2. Основные документы перед чанками  
+                    x["relevance_score"]                 # 3. По релевантности
+                ), reverse=True)
+                formatted_results = formatted_results[:n_results]
+            else:
+                # Тексты результатов только из BM25 читаются из коллекции - в пуле
+                formatted_results = await self.io_pool.run(
+                    self._fuse_results, query, formatted_results, keyword_hits, n_results, min_relevance,
+                    per_document
+                )
                     
-                    # Лучший контекст
-                    best_context = self._find_best_context(document_content, query, max_length=400)
+            # Задержки обоих поисков в метаданных результата
+            latency = {
+                "vector_ms": round(vector_time * 1000, 2),
+                "keyword_ms": round(keyword_time * 1000, 2) if keyword_time is not None else None,
+                "total_ms": round((time.perf_counter() - search_start) * 1000, 2)
+            }
+            for result in formatted_results:
+                result["search_info"]["latency"] = latency
+                if keyword_skipped:
+                    result["search_info"]["keyword_skipped"] = keyword_skipped
                     
-                    result = {
-                        "content": best_context,
-                        "full_content": document_content,
-                        "metadata": metadata,
-                        "distance": distance,
-                        "relevance_score": relevance_score,
-                        "document_id": parent_doc_id or current_doc_id,
-                        "filename": metadata.get("filename", "Unknown"),
-                        "exact_match": exact_match,
-                        "semantic_match": semantic_match,
-                        "is_chunk": metadata.get("is_chunk", False),
-                        "search_info": {
-                            "query": query,
-                            "match_type": "exact" if exact_match else ("semantic" if semantic_match else "weak"),
-                            "confidence": "high" if relevance_score > 0.7 else ("medium" if relevance_score > 0.5 else "low"),
-                            "source_type": "chunk" if metadata.get("is_chunk", False) else "document"
-                        }
-                    }
-                    formatted_results.append(result)
-            
-            # Сортируем: сначала точные совпадения, потом основные документы, потом по релевантности
-            formatted_results.sort(key=lambda x: (
-                x["exact_match"],                    # 1. Точные совпадения первыми
-                not x["is_chunk"],                   # 2. Основные документы перед чанками  
-                x["relevance_score"]                 # 3. По релевантности
-            ), reverse=True)
-            
-            # Ограничиваем до запрошенного количества
-            formatted_results = formatted_results[:n_results]
+            self.retrieval_stats["vector_time_total"] += vector_time
+            if keyword_time is not None:
+                self.retrieval_stats["hybrid_searches"] += 1
+                self.retrieval_stats["keyword_time_total"] += keyword_time
             
             # Логирование результатов
             if formatted_results:
-                logger.info(f"Found {len(formatted_results)} relevant results for '{query}' (min_relevance={min_relevance})")
+                logger.info(f"Found {len(formatted_results)} relevant results for '{query}' (min_relevance={min_relevance}, "
+                           f"vector {latency['vector_ms']} ms, keyword {latency['keyword_ms']} ms)")
                 for result in formatted_results:
                     source_type = result['search_info']['source_type']
                     logger.debug(f"  - {result['filename']} ({source_type}): {result['search_info']['match_type']} match, "
@@ -258,119 +625,467 @@ class ChromaDBService:
             else:
                 logger.info(f"No relevant results found for '{query}' with min_relevance={min_relevance}")
             
-            return formatted_results
+            self._search_result_cache[cache_key] = copy.deepcopy(formatted_results)
+            
+            return [project_result(result, fields) for result in formatted_results]
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
             return []
     
-    def _find_best_context(self, content: str, query: str, max_length: int = 400) -> str:
-        """
-        Находит наиболее релевантную часть документа для показа в результатах
-        """
-        if len(content) <= max_length:
-            return content
+    @staticmethod
+    def _timed(func, *args):
+        """Выполняет func(*args) и возвращает (результат, секунды)"""
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+    
+    async def _timed_vector_query(self, query: str, limit: int, where_filter: Dict[str, Any]) -> tuple:
+        """Эмбеддинг запроса (пул модели) и запрос к коллекции (пул ввода-вывода): (результат, секунды)"""
+        start = time.perf_counter()
+        embedding = self._cached_query_embedding(query)
+        if embedding is None:
+            embedding = await self.embedding_pool.run(self._compute_query_embedding, query)
+        results = await self.io_pool.run(self._vector_query, embedding, limit, where_filter)
+        return results, time.perf_counter() - start
+    
+    def _vector_query(self, query_embedding: List[float], limit: int, where_filter: Dict[str, Any]) -> Dict[str, Any]:
+        """Семантический поиск по всем документам и чанкам"""
+        return self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=limit,
+            where=where_filter if where_filter else None,
+            include=["documents", "metadatas", "distances"]
+        )
+    
+    def _keyword_query(self, query: str, limit: int,
+                       metadata_filter: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                       per_document: bool = True) -> List[Dict[str, Any]]:
+        """BM25 поиск с теми же фильтрами по метаданным, что и у векторного поиска (см. _compile_where)"""
+        doc_filter = None
+        if metadata_filter is not None:
+            doc_filter = lambda doc_id: metadata_filter(self._keyword_metadata.get(doc_id, {}))
+        with self._keyword_lock:
+            return self.keyword_index.search(query, limit=limit, doc_filter=doc_filter, per_document=per_document)
+    
+    def _format_result(self, query: str, record_id: str, document_content: str, metadata: Dict[str, Any],
+                       relevance_score: float, distance: Optional[float]) -> Dict[str, Any]:
+        """Результат поиска в формате API"""
+        # Проверяем наличие точного совпадения в тексте
+        query_lower = query.lower()
+        content_lower = document_content.lower()
+        filename_lower = metadata.get("filename", "").lower()
         
-        query_words = query.lower().split()
-        content_lower = content.lower()
+        # Определяем тип совпадения
+        exact_match = query_lower in content_lower or query_lower in filename_lower
+        semantic_match = distance is not None and relevance_score > 0.7
+        if exact_match:
+            match_type = "exact"
+        elif semantic_match:
+            match_type = "semantic"
+        else:
+            match_type = "weak" if distance is not None else "keyword"
         
-        # Ищем лучшее место для начала контекста
-        best_score = 0
-        best_start = 0
+        # Лучший контекст с подсветкой слов запроса
+        snippet = self.snippet_selector.select(document_content, query)
         
-        # Проверяем различные позиции в тексте
-        for start in range(0, len(content) - max_length + 1, max_length // 4):
-            end = start + max_length
-            segment = content_lower[start:end]
-            
-            # Считаем количество найденных слов запроса в сегменте
-            score = sum(1 for word in query_words if word in segment)
-            
-            # Бонус за нахождение в начале документа
-            if start == 0:
-                score += 0.5
-            
-            if score > best_score:
-                best_score = score
-                best_start = start
+        return {
+            "content": snippet.text,
+            "full_content": document_content,
+            "highlights": [list(span) for span in snippet.highlights],
+            "metadata": metadata,
+            "distance": distance,
+            "relevance_score": relevance_score,
+            "document_id": metadata.get("parent_document_id") or record_id,
+            "filename": metadata.get("filename", "Unknown"),
+            "exact_match": exact_match,
+            "semantic_match": semantic_match,
+            "is_chunk": metadata.get("is_chunk", False),
+            "search_info": {
+                "query": query,
+                "match_type": match_type,
+                "confidence": "high" if relevance_score > 0.7 else ("medium" if relevance_score > 0.5 else "low"),
+                "source_type": "chunk" if metadata.get("is_chunk", False) else "document",
+                "snippet_range": [snippet.start, snippet.end]
+            }
+        }
+    
+    def _fuse_results(self, query: str, vector_results: List[Dict], keyword_hits: List[Dict],
+                      n_results: int, min_relevance: float, per_document: bool = True) -> List[Dict]:
+        """Reciprocal rank fusion: score = sum(1 / (k + rank)) по обоим спискам"""
+        fused: Dict[Any, Dict[str, Any]] = {}
+        
+        # Ключ объединения: документ или отдельный чанк (однофрагментный документ - чанк 0)
+        def fusion_key(doc_id: str, chunk_index: int) -> Any:
+            return doc_id if per_document else (doc_id, max(chunk_index, 0))
+        
+        for rank, result in enumerate(vector_results, start=1):
+            fused[fusion_key(result["document_id"], result["metadata"].get("chunk_index", -1))] = {
+                "result": result, "rrf": 1.0 / (self.rrf_k + rank),
+                "vector_rank": rank, "keyword_rank": None, "keyword_hit": None
+            }
+        
+        for rank, hit in enumerate(keyword_hits, start=1):
+            # Доля терминов запроса, найденных в чанке
+            coverage = hit["matched_terms"] / hit["query_terms"]
+            if coverage < min_relevance:
+                continue
+            entry = fused.setdefault(fusion_key(hit["document_id"], hit["chunk_index"]), {
+                "result": None, "rrf": 0.0, "vector_rank": None, "keyword_rank": None, "keyword_hit": None
+            })
+            entry["rrf"] += 1.0 / (self.rrf_k + rank)
+            entry["keyword_rank"] = rank
+            entry["keyword_hit"] = hit
         
-        # Если не нашли хороший контекст, возвращаем начало
-        if best_score == 0:
-            return content[:max_length] + "..."
+        # Тексты BM25 чанков (одним запросом к коллекции): результаты только BM25
+        # и проверка точного вхождения запроса до сортировки
+        pending = [entry for entry in fused.values() if entry["keyword_hit"] is not None
+                   and (entry["result"] is None or not entry["result"]["exact_match"])]
+        if pending:
+            records = self._get_keyword_records([entry["keyword_hit"] for entry in pending])
+            for entry in pending:
+                hit = entry["keyword_hit"]
+                record = records.get((hit["document_id"], hit["chunk_index"]))
+                if record is None:
+                    continue
+                record_id, content, metadata = record
+                keyword_result = self._format_result(
+                    query, record_id, content, metadata, hit["matched_terms"] / hit["query_terms"], None
+                )
+                if entry["result"] is None:
+                    entry["result"] = keyword_result
+                elif keyword_result["exact_match"]:
+                    # Чанк с точной ссылкой (например, "S.I. No. 123 of 2019") показываем вместо векторного
+                    keyword_result["distance"] = entry["result"]["distance"]
+                    keyword_result["relevance_score"] = max(keyword_result["relevance_score"],
+                                                            entry["result"]["relevance_score"])
+                    entry["result"] = keyword_result
         
-        # Возвращаем лучший контекст
-        best_end = best_start + max_length
-        context = content[best_start:best_end]
+        # При равном RRF: точное совпадение, затем BM25 оценка
+        ranked = sorted(
+            (entry for entry in fused.values() if entry["result"] is not None),
+            key=lambda entry: (
+                entry["rrf"],
+                entry["result"]["exact_match"],
+                entry["keyword_hit"]["score"] if entry["keyword_hit"] is not None else 0.0
+            ),
+            reverse=True
+        )[:n_results]
+        self.retrieval_stats["keyword_only_results"] += sum(1 for entry in ranked if entry["vector_rank"] is None)
+        
+        fused_results = []
+        for entry in ranked:
+            result = entry["result"]
+            if entry["keyword_hit"] is not None:
+                result["relevance_score"] = max(result["relevance_score"],
+                                                entry["keyword_hit"]["matched_terms"] / entry["keyword_hit"]["query_terms"])
+                result["search_info"]["bm25_score"] = round(entry["keyword_hit"]["score"], 4)
+            result["search_info"].update({
+                "rrf_score": round(entry["rrf"], 6),
+                "vector_rank": entry["vector_rank"],
+                "keyword_rank": entry["keyword_rank"],
+                "retrievers": [name for name, rank in (("vector", entry["vector_rank"]),
+                                                       ("keyword", entry["keyword_rank"])) if rank is not None]
+            })
+            fused_results.append(result)
         
-        # Добавляем многоточие если обрезали
-        if best_start > 0:
-            context = "..." + context
-        if best_end < len(content):
-            context = context + "..."
+        return fused_results
+    
+    def _get_keyword_records(self, hits: List[Dict]) -> Dict[tuple, tuple]:
+        """Записи коллекции для BM25 чанков: (doc_id, chunk_index) → (id, текст, метаданные)"""
+        candidates = {}
+        for hit in hits:
+            doc_id, chunk_index = hit["document_id"], hit["chunk_index"]
+            # Однофрагментные документы хранятся без отдельных чанков
+            candidates[f"{doc_id}_chunk_{chunk_index}"] = (doc_id, chunk_index)
+            candidates.setdefault(doc_id, (doc_id, chunk_index))
         
-        return context.strip()
+        found = self.collection.get(ids=list(candidates), include=["documents", "metadatas"])
+        records = {}
+        for record_id, content, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+            key = candidates[record_id]
+            # Чанк предпочтительнее основного документа
+            if key not in records or metadata.get("is_chunk", False):
+                records[key] = (record_id, content, metadata)
+        return records
+    
+    # ====================================
+    # ЛЕКСИЧЕСКИЙ ИНДЕКС
+    # ====================================
+    
+    @staticmethod
+    def _keyword_revision(metadata: Dict[str, Any]) -> Any:
+        """Ревизия документа для сверки индекса с коллекцией"""
+        return metadata.get("updated_at") or metadata.get("added_at")
+    
+    def _load_keyword_index(self, live: Dict[str, Dict[str, Any]]):
+        """Загружает BM25 индекс и досчитывает документы, изменившиеся в коллекции (live: id → метаданные)"""
+        index = None
+        if os.path.exists(self.keyword_index_path):
+            try:
+                index = BM25Index.load(self.keyword_index_path)
+            except Exception as e:
+                logger.warning(f"Keyword index is unreadable, rebuilding: {e}")
+        if index is None:
+            index = BM25Index()
+        
+        removed = [doc_id for doc_id in index.documents if doc_id not in live]
+        for doc_id in removed:
+            index.remove_document(doc_id)
+        
+        stale = [
+            doc_id for doc_id, metadata in live.items()
+            if not index.has_document(doc_id) or index.get_revision(doc_id) != self._keyword_revision(metadata)
+        ]
+        for batch_start in range(0, len(stale), self.write_batch_size):
+            batch = stale[batch_start:batch_start + self.write_batch_size]
+            records = self.collection.get(
+                where={"parent_document_id": {"$in": batch}},
+                include=["documents", "metadatas"]
+            )
+            grouped: Dict[str, List[tuple]] = {}
+            for content, metadata in zip(records["documents"], records["metadatas"]):
+                grouped.setdefault(metadata["parent_document_id"], []).append(
+                    (metadata.get("chunk_index", -1), content)
+                )
+            for doc_id in batch:
+                parts = sorted(grouped.get(doc_id, []), key=lambda part: part[0])
+                chunks = [content for chunk_index, content in parts if chunk_index >= 0]
+                main = [content for chunk_index, content in parts if chunk_index < 0]
+                index.add_document(doc_id, chunks or main, self._keyword_revision(live[doc_id]))
+        
+        self.keyword_index = index
+        self._keyword_metadata = live
+        
+        if removed or stale:
+            logger.info(f"Keyword index updated: {len(stale)} documents indexed, {len(removed)} removed")
+            self.save_keyword_index()
+        logger.info(f"Keyword index ready: {index.get_stats()['chunks']} chunks")
+    
+    def _keyword_add(self, doc_id: str, records: List[Dict[str, Any]]):
+        """Индексирует документ (records: основная запись + чанки)"""
+        if self.keyword_index is None:
+            return
+        metadata = records[0]["metadata"]
+        chunks = [record["document"] for record in records[1:]] or [records[0]["document"]]
+        with self._keyword_lock:
+            self.keyword_index.add_document(doc_id, chunks, self._keyword_revision(metadata))
+            self._keyword_metadata[doc_id] = metadata
+        self._keyword_changed()
+    
+    def _keyword_remove(self, doc_ids: Iterable[str]):
+        """Удаляет документы из лексического индекса"""
+        if self.keyword_index is None:
+            return
+        removed = 0
+        with self._keyword_lock:
+            for doc_id in doc_ids:
+                removed += self.keyword_index.remove_document(doc_id)
+                self._keyword_metadata.pop(doc_id, None)
+        if removed:
+            self._keyword_changed(removed)
+    
+    def _keyword_changed(self, count: int = 1):
+        """Периодически сохраняет индекс (при старте он сверяется с коллекцией)"""
+        self._keyword_unsaved += count
+        if self._keyword_unsaved >= self.keyword_flush_interval:
+            self.save_keyword_index()
+    
+    def save_keyword_index(self):
+        """Сохраняет BM25 индекс рядом с коллекцией"""
+        if self.keyword_index is None:
+            return
+        try:
+            with self._keyword_lock:
+                self.keyword_index.save(self.keyword_index_path)
+            self._keyword_unsaved = 0
+        except Exception as e:
+            logger.error(f"Error saving keyword index: {e}")
+    
+    def close(self):
+        """Сохраняет несохраненные изменения индекса и останавливает пулы потоков"""
+        if self._keyword_unsaved:
+            self.save_keyword_index()
+        self.io_pool.shutdown()
+        self.embedding_pool.shutdown()
+        self._shutdown_process_pool()
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Глубина очереди и задержки пулов ввода-вывода и модели"""
+        return {
+            "chroma_io": self.io_pool.get_stats(),
+            "embedding": self.embedding_pool.get_stats(),
+            "embedding_processes": {
+                **self.process_pool_stats,
+                "workers": self.embedding_processes,
+                "threshold": self.embedding_process_threshold,
+                "running": self._process_pool is not None
+            }
+        }
+    
+    def get_embedding_backend_stats(self) -> Dict[str, Any]:
+        """Настроенный и фактически используемый бэкенд модели эмбеддингов"""
+        return {
+            "configured": self.configured_embedding_backend,
+            "active": self.embedding_backend,
+            "self_check_tolerance": self.embedding_self_check_tolerance,
+            "error": self.embedding_backend_error
+        }
+    
+    def get_retrieval_stats(self) -> Dict[str, Any]:
+        """Средние задержки обоих поисков"""
+        stats = self.retrieval_stats
+        searches = self.search_cache_stats["result_misses"]
+        return {
+            "hybrid_enabled": self.keyword_index is not None,
+            "rrf_k": self.rrf_k,
+            "hybrid_searches": stats["hybrid_searches"],
+            "keyword_only_results": stats["keyword_only_results"],
+            "keyword_skipped_searches": stats["keyword_skipped_searches"],
+            "average_vector_ms": stats["vector_time_total"] / searches * 1000 if searches else 0.0,
+            "average_keyword_ms": (
+                stats["keyword_time_total"] / stats["hybrid_searches"] * 1000 if stats["hybrid_searches"] else 0.0
+            ),
+            "keyword_index": self.keyword_index.get_stats() if self.keyword_index is not None else None
+        }
+    
+    def _cached_query_embedding(self, query: str) -> Optional[List[float]]:
+        """Эмбеддинг поискового запроса из LRU кэша (None при промахе)"""
+        with self._query_cache_lock:
+            embedding = self._query_embedding_cache.get(query)
+            if embedding is not None:
+                self.search_cache_stats["embedding_hits"] += 1
+            else:
+                self.search_cache_stats["embedding_misses"] += 1
+            return embedding
+        
+    def _compute_query_embedding(self, query: str) -> List[float]:
+        """Считает эмбеддинг запроса моделью и кладет в кэш (выполняется в пуле модели)"""
+        embedding = [float(value) for value in self.embedding_function([query])[0]]
+        with self._query_cache_lock:
+            self._query_embedding_cache[query] = embedding
+        return embedding
+    
+    def _invalidate_search_cache(self):
+        """Сбрасывает кэш результатов поиска после изменения коллекции"""
+        self.collection_version += 1
+        self.search_cache_stats["invalidations"] += 1
+        self._search_result_cache.clear()
+    
+    def get_search_cache_stats(self) -> Dict[str, Any]:
+        """Метрики кэша поиска"""
+        stats = self.search_cache_stats
+        embedding_lookups = stats["embedding_hits"] + stats["embedding_misses"]
+        result_lookups = stats["result_hits"] + stats["result_misses"]
+        
+        return {
+            **stats,
+            "embedding_hit_rate": stats["embedding_hits"] / embedding_lookups if embedding_lookups else 0.0,
+            "result_hit_rate": stats["result_hits"] / result_lookups if result_lookups else 0.0,
+            "embedding_cache_size": len(self._query_embedding_cache),
+            "result_cache_size": len(self._search_result_cache),
+            "collection_version": self.collection_version
+        }
     
     async def get_document_count(self) -> int:
         """Возвращает количество документов в коллекции"""
         try:
-            return self.collection.count()
+            return await self.io_pool.run(self.collection.count)
         except Exception as e:
             logger.error(f"Error getting document count: {str(e)}")
             return 0
     
     async def delete_document(self, document_id: str) -> bool:
         """Удаляет документ и все его чанки"""
+        result = await self.delete_documents([document_id])
+        return result["results"].get(document_id) == "deleted"
+    
+    async def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """
+        Пакетное удаление документов вместе с чанками.
+        
+        Все id записей находятся одним запросом метаданных на пакет документов,
+        записи удаляются пакетами по write_batch_size. Возвращает итог по каждому
+        документу: deleted, not_found или failed.
+        """
+        start_time = time.time()
+        document_ids = list(dict.fromkeys(document_ids))
+        record_ids: Dict[str, List[str]] = {doc_id: [] for doc_id in document_ids}
+        results: Dict[str, str] = {}
+        
         try:
-            # Получаем все связанные документы и чанки
-            all_related_docs = self.collection.get(
-                where={"parent_document_id": document_id},
-                include=["metadatas"]
-            )
+            await self.io_pool.run(self._collect_record_ids, record_ids)
+        except Exception as e:
+            logger.error(f"Error resolving documents for deletion: {str(e)}")
+            results = {doc_id: "failed" for doc_id in document_ids}
+            record_ids = {}
             
-            ids_to_delete = set()  # Используем set для уникальности
+        for doc_id, ids in record_ids.items():
+            # Основная запись старого формата без parent_document_id известна каталогу
+            if doc_id in self.catalog and doc_id not in ids:
+                ids.append(doc_id)
+            if not ids:
+                results[doc_id] = "not_found"
             
-            # Добавляем ID чанков
-            if all_related_docs["ids"]:
-                ids_to_delete.update(all_related_docs["ids"])
+        owners = {record_id: doc_id for doc_id, ids in record_ids.items() for record_id in ids}
+        failed_ids = await self.io_pool.run(self._delete_ids, list(owners))
+        for record_id in failed_ids:
+            results[owners[record_id]] = "failed"
             
-            # Добавляем основной документ
-            ids_to_delete.add(document_id)
+        deleted = [doc_id for doc_id in record_ids if doc_id not in results]
+        for doc_id in deleted:
+            results[doc_id] = "deleted"
+            self._untrack_document(doc_id)
+        await self.io_pool.run(self._keyword_remove, deleted)
+        if len(owners) > len(failed_ids):
+            self._invalidate_search_cache()
             
-            # Проверяем какие ID реально существуют
-            existing_docs = self.collection.get(
-                ids=list(ids_to_delete),
+        outcomes = [results[doc_id] for doc_id in document_ids]
+        elapsed = time.time() - start_time
+        logger.info(f"🗑️ Bulk delete: {outcomes.count('deleted')}/{len(document_ids)} documents, "
+                   f"{len(owners) - len(failed_ids)} records in {elapsed:.2f}s")
+            
+        return {
+            "success": "failed" not in outcomes,
+            "results": {doc_id: results[doc_id] for doc_id in document_ids},
+            "deleted": outcomes.count("deleted"),
+            "not_found": outcomes.count("not_found"),
+            "failed": outcomes.count("failed"),
+            "records_deleted": len(owners) - len(failed_ids),
+            "elapsed_seconds": round(elapsed, 3)
+        }
+            
+    def _collect_record_ids(self, record_ids: Dict[str, List[str]]):
+        """Дополняет record_ids (doc_id → []) id записей документов одним запросом на пакет"""
+        document_ids = list(record_ids)
+        # Основная запись и чанки документа помечены parent_document_id
+        for batch_start in range(0, len(document_ids), self.write_batch_size):
+            batch = document_ids[batch_start:batch_start + self.write_batch_size]
+            related = self.collection.get(
+                where={"parent_document_id": {"$in": batch}},
                 include=["metadatas"]
             )
-            
-            actual_ids_to_delete = existing_docs["ids"]
-            
-            if actual_ids_to_delete:
-                # Удаляем по одному ID для избежания дубликатов
-                deleted_count = 0
-                for doc_id in actual_ids_to_delete:
-                    try:
-                        self.collection.delete(ids=[doc_id])
-                        deleted_count += 1
-                        logger.debug(f"Deleted document/chunk: {doc_id}")
-                    except Exception as e:
-                        logger.warning(f"Failed to delete {doc_id}: {e}")
-                        continue
-                
-                logger.info(f"Successfully deleted {deleted_count} documents/chunks for {document_id}")
-                return deleted_count > 0
-            else:
-                logger.warning(f"Document {document_id} not found for deletion")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error deleting document: {str(e)}")
-            return False
+            for record_id, metadata in zip(related["ids"], related["metadatas"]):
+                record_ids[metadata["parent_document_id"]].append(record_id)
+    
+    def _delete_ids(self, ids: List[str]) -> List[str]:
+        """Удаляет записи пакетами; возвращает id, которые удалить не удалось"""
+        failed = []
+        for batch_start in range(0, len(ids), self.write_batch_size):
+            batch = ids[batch_start:batch_start + self.write_batch_size]
+            try:
+                self.collection.delete(ids=batch)
+            except Exception as e:
+                logger.warning(f"Failed to delete batch of {len(batch)} records: {e}")
+                failed.extend(batch)
+        return failed
     
     async def get_all_documents(self) -> List[Dict]:
         """Получает все основные документы (не чанки) для админ панели"""
         try:
             # Более надежный запрос основных документов
-            results = self.collection.get(
+            results = await self.io_pool.run(
+                self.collection.get,
                 where={"is_chunk": False},
                 include=["documents", "metadatas"]
             )
@@ -386,20 +1101,7 @@ class ChromaDBService:
                         continue
                     
                     seen_ids.add(doc_id)
-                    metadata = results["metadatas"][i]
-                    
-                    doc = {
-                        "id": doc_id,
-                        "filename": metadata.get("filename", "Unknown"),
-                        "category": metadata.get("category", "general"),
-                        "content": results["documents"][i],
-                        "size": metadata.get("content_length", 0),
-                        "word_count": metadata.get("word_count", 0),
-                        "chunks_count": metadata.get("chunks_count", 1),
-                        "added_at": metadata.get("added_at", time.time()),
-                        "metadata": metadata
-                    }
-                    documents.append(doc)
+                    documents.append(self._format_document(doc_id, results["documents"][i], results["metadatas"][i]))
             
             # Сортируем по дате добавления (новые первые)
             documents.sort(key=lambda x: x["added_at"], reverse=True)
@@ -411,77 +1113,228 @@ class ChromaDBService:
             logger.error(f"Error getting all documents: {str(e)}")
             return []
     
+    def _track_document(self, doc_id: str, metadata: Dict[str, Any]):
+        """Обновляет индекс списка и каталог по метаданным основного документа"""
+        self.listing.add(doc_id, metadata.get("added_at"), metadata.get("category"))
+        self.catalog.add(
+            doc_id,
+            metadata.get("category"),
+            chunks=metadata.get("chunks_count", 0),
+            size=metadata.get("content_length", 0),
+            modified_at=metadata.get("updated_at") or metadata.get("added_at")
+        )
+    
+    def _untrack_document(self, doc_id: str):
+        self.listing.remove(doc_id)
+        self.catalog.remove(doc_id)
+    
+    def get_category_counts(self) -> Dict[str, int]:
+        """Количество документов по категориям (из каталога)"""
+        return self.catalog.category_counts()
+    
+    async def list_documents(self, limit: int = 50, cursor: Optional[str] = None, offset: int = 0,
+                             category: Optional[str] = None, added_after: Optional[float] = None,
+                             added_before: Optional[float] = None,
+                             include_content: bool = False) -> Dict[str, Any]:
+        """
+        Страница основных документов (новые первыми) с keyset пагинацией.
+        Порядок и курсор берутся из сортированного индекса, из коллекции читаются
+        только строки страницы (без текста, если не include_content).
+        ValueError для неверного курсора.
+        """
+        page = self.listing.page(limit, cursor, offset, category, added_after, added_before)
+        if not page.ids:
+            return {"documents": [], "total": page.total, "next_cursor": page.next_cursor}
+        
+        include = ["metadatas", "documents"] if include_content else ["metadatas"]
+        results = await self.io_pool.run(
+            self.collection.get,
+            ids=page.ids,
+            where=self._listing_where(category, added_after, added_before),
+            include=include
+        )
+        
+        rows = {}
+        for i, doc_id in enumerate(results["ids"]):
+            content = results["documents"][i] if include_content else None
+            row = self._format_document(doc_id, content, results["metadatas"][i])
+            if not include_content:
+                del row["content"]
+            rows[doc_id] = row
+        
+        return {
+            "documents": [rows[doc_id] for doc_id in page.ids if doc_id in rows],
+            "total": page.total,
+            "next_cursor": page.next_cursor
+        }
+    
+    @staticmethod
+    def _listing_where(category: Optional[str], added_after: Optional[float],
+                       added_before: Optional[float]) -> Dict[str, Any]:
+        """Фильтр списка для ChromaDB where (только основные документы)"""
+        conditions: List[Dict[str, Any]] = [{"is_chunk": False}]
+        if category:
+            conditions.append({"category": category})
+        if added_after is not None:
+            conditions.append({"added_at": {"$gte": added_after}})
+        if added_before is not None:
+            conditions.append({"added_at": {"$lte": added_before}})
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    async def get_document(self, document_id: str) -> Optional[Dict]:
+        """Получает один основной документ по ID (без чтения всей коллекции)"""
+        try:
+            result = await self.io_pool.run(self.collection.get, ids=[document_id],
+                                            include=["documents", "metadatas"])
+            if not result["ids"]:
+                return None
+            return self._format_document(result["ids"][0], result["documents"][0], result["metadatas"][0])
+        except Exception as e:
+            logger.error(f"Error getting document {document_id}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _format_document(doc_id: str, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Документ в формате админ панели"""
+        return {
+            "id": doc_id,
+            "filename": metadata.get("filename", "Unknown"),
+            "category": metadata.get("category", "general"),
+            "content": content,
+            "size": metadata.get("content_length", 0),
+            "word_count": metadata.get("word_count", 0),
+            "chunks_count": metadata.get("chunks_count", 1),
+            "added_at": metadata.get("added_at", time.time()),
+            "metadata": metadata
+        }
+    
     async def update_document(self, document_id: str, new_content: str = None, new_metadata: Dict = None) -> bool:
         """Обновляет документ"""
+        result = await self.update_document_incremental(document_id, new_content, new_metadata)
+        return result["success"]
+    
+    async def update_document_incremental(self, document_id: str, new_content: str = None,
+                                          new_metadata: Dict = None) -> Dict[str, Any]:
+        """
+        Инкрементальное обновление документа.
+        
+        Новый текст заново разбивается на чанки, хэши чанков сравниваются с уже
+        сохраненными: эмбеддинги совпадающих текстов переиспользуются, модель
+        считает только измененные. Записи пишутся через upsert, лишние чанки
+        удаляются. В отчете записи документа (основная + чанки): сколько
+        переиспользовано и сколько посчитано заново.
+        """
+        result = {"success": False, "chunks_total": 0, "chunks_reused": 0, "chunks_embedded": 0, "chunks_deleted": 0}
+        if not new_content and not new_metadata:
+            return result
+        
         try:
-            # ChromaDB не поддерживает прямое обновление, поэтому удаляем и добавляем заново
-            if new_content or new_metadata:
-                # Получаем текущий документ
-                current = self.collection.get(
-                    ids=[document_id],
-                    include=["documents", "metadatas"]
-                )
-                
-                if not current["ids"]:
-                    return False
-                
-                # Подготавливаем новые данные
-                content = new_content if new_content else current["documents"][0]
-                metadata = current["metadatas"][0].copy()
-                
-                if new_metadata:
-                    metadata.update(new_metadata)
+            # Текущие записи документа вместе с эмбеддингами
+            current = await self.io_pool.run(
+                self.collection.get,
+                where={"parent_document_id": document_id},
+                include=["documents", "metadatas", "embeddings"]
+            )
+            if document_id not in current["ids"]:
+                # Основная запись старого формата без parent_document_id
+                main = await self.io_pool.run(self.collection.get, ids=[document_id],
+                                              include=["documents", "metadatas", "embeddings"])
+                if not main["ids"]:
+                    return result
+                for key in ("ids", "documents", "metadatas", "embeddings"):
+                    current[key] = list(current[key]) + list(main[key])
+            
+            stored = {}
+            stored_chunks = []
+            for i, record_id in enumerate(current["ids"]):
+                metadata = current["metadatas"][i]
+                stored[self._text_hash(current["documents"][i])] = current["embeddings"][i]
+                if record_id == document_id:
+                    main_content, main_metadata = current["documents"][i], metadata
+                elif metadata.get("is_chunk"):
+                    stored_chunks.append((metadata.get("chunk_index", 0), current["documents"][i]))
+            
+            content = new_content or main_content
+            if content == main_content and stored_chunks:
+                # Текст не изменился - чанки остаются прежними
+                chunks = [text for _, text in sorted(stored_chunks)]
+            else:
+                chunks = await self.io_pool.run(self.chunker, content)
+            
+            # Метаданные: прежние пользовательские поля + изменения, производные поля считаются заново
+            metadata = {key: value for key, value in main_metadata.items() if key not in _DERIVED_METADATA_KEYS}
+            if new_metadata:
+                metadata.update(new_metadata)
+            metadata["updated_at"] = time.time()
+            
+            records = self._build_records(ProcessedDocument(
+                id=document_id,
+                filename=metadata.get("filename", "Unknown"),
+                content=content,
+                metadata=metadata,
+                category=metadata.get("category", "general"),
+                chunks=chunks
+            ))
+            
+            # Эмбеддинги: из сохраненных записей по хэшу текста, остальные считает модель
+            embeddings = [stored.get(self._text_hash(record["document"])) for record in records]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            computed = await self.embedding_pool.run(self._embed_texts, [records[i]["document"] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+            embeddings = [[float(value) for value in embedding] for embedding in embeddings]
+            
+            await self.io_pool.run(self._write_records, self.collection.upsert, records, embeddings)
                 
-                # Удаляем старый документ и все его чанки
-                await self.delete_document(document_id)
+            # Чанки, которых больше нет в новой версии
+            new_ids = {record["id"] for record in records}
+            orphans = [record_id for record_id in current["ids"] if record_id not in new_ids]
+            failed_orphans = await self.io_pool.run(self._delete_ids, orphans)
                 
-                # Добавляем новый
-                self.collection.add(
-                    ids=[document_id],
-                    documents=[content],
-                    metadatas=[metadata]
-                )
+            self._invalidate_search_cache()
+            await self.io_pool.run(self._keyword_add, document_id, records)
+            self._track_document(document_id, records[0]["metadata"])
                 
-                logger.info(f"Updated document {document_id}")
-                return True
-            
-            return False
+            result.update({
+                "success": True,
+                "chunks_total": len(records),
+                "chunks_reused": len(records) - len(missing),
+                "chunks_embedded": len(missing),
+                "chunks_deleted": len(orphans) - len(failed_orphans)
+            })
+            logger.info(f"Updated document {document_id}: {result['chunks_reused']} records reused, "
+                       f"{result['chunks_embedded']} embedded, {result['chunks_deleted']} deleted")
+            return result
             
         except Exception as e:
             logger.error(f"Error updating document: {str(e)}")
-            return False
+            return result
+    
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
     
     async def get_stats(self) -> Dict:
-        """Получает статистику базы данных"""
+        """Получает статистику базы данных (из каталога, без чтения коллекции)"""
         try:
             total_count = await self.get_document_count()
-            
-            # Получаем уникальные категории из основных документов
-            all_results = self.collection.get(
-                where={"is_chunk": False},
-                include=["metadatas"]
-            )
-            
-            categories = set()
-            unique_docs = 0
-            
-            if all_results["metadatas"]:
-                seen_ids = set()
-                for i, doc_id in enumerate(all_results["ids"]):
-                    if doc_id not in seen_ids:
-                        seen_ids.add(doc_id)
-                        unique_docs += 1
-                        category = all_results["metadatas"][i].get("category", "general")
-                        categories.add(category)
+            unique_docs = len(self.catalog)
             
             return {
                 "total_documents": unique_docs,
-                "categories": list(categories),
+                "categories": self.catalog.categories(),
                 "database_type": "ChromaDB",
                 "persist_directory": self.persist_directory,
-                "embedding_model": "all-MiniLM-L6-v2",
+                "embedding_model": self.embedding_model,
+                "embedding_model_status": self.embedding_function.get_status(),
+                "embedding_backend": self.get_embedding_backend_stats(),
                 "total_chunks": total_count,
-                "unique_documents": unique_docs
+                "unique_documents": unique_docs,
+                "catalog": self.catalog.get_stats(),
+                "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else {"enabled": False},
+                "search_cache": self.get_search_cache_stats(),
+                "retrieval": self.get_retrieval_stats(),
+                "executors": self.get_executor_stats()
             }
             
         except Exception as e:
@@ -499,7 +1352,7 @@ class ChromaDBService:
             logger.info("🧹 Starting duplicate cleanup...")
             
             # Получаем все документы
-            all_docs = self.collection.get(include=["metadatas"])
+            all_docs = await self.io_pool.run(self.collection.get, include=["metadatas"])
             
             if not all_docs["ids"]:
                 return {"removed": 0, "message": "No documents found"}
@@ -533,15 +1386,16 @@ class ChromaDBService:
                         duplicates_to_remove.append(duplicate["id"])
                         logger.debug(f"Marking duplicate main document for removal: {duplicate['id']}")
             
-            # Удаляем дубликаты
-            removed_count = 0
-            for doc_id in duplicates_to_remove:
-                try:
-                    self.collection.delete(ids=[doc_id])
-                    removed_count += 1
-                    logger.debug(f"Removed duplicate: {doc_id}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove duplicate {doc_id}: {e}")
+            # Удаляем дубликаты пакетами
+            failed_ids = set(await self.io_pool.run(self._delete_ids, duplicates_to_remove))
+            removed_ids = [doc_id for doc_id in duplicates_to_remove if doc_id not in failed_ids]
+            for doc_id in removed_ids:
+                self._untrack_document(doc_id)
+            await self.io_pool.run(self._keyword_remove, removed_ids)
+            removed_count = len(removed_ids)
+            
+            if removed_count > 0:
+                self._invalidate_search_cache()
             
             logger.info(f"🧹 Cleanup completed: removed {removed_count} duplicates")
             
@@ -562,11 +1416,30 @@ class ChromaDBService:
 class DocumentProcessor:
     """Обработчик документов"""
     
-    def __init__(self):
+    def __init__(self, chunking_mode: str = "fixed", chunk_size: int = 1000, chunk_overlap: int = 200):
         self.supported_formats = {
             '.txt': self._process_txt,
             '.md': self._process_txt,
         }
+        
+        # fixed - окна chunk_size символов; content_defined - стабильные при правках границы
+        if chunking_mode not in CHUNKING_MODES:
+            raise ValueError(f"Unknown chunking mode: {chunking_mode}. Allowed: {list(CHUNKING_MODES)}")
+        self.chunking_mode = chunking_mode
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.content_chunker = (
+            ContentDefinedChunker(target_size=chunk_size, overlap=chunk_overlap)
+            if chunking_mode == "content_defined" else None
+        )
+        # Пул для чтения файла и разбиения на чанки (задается DocumentService)
+        self.executor: Optional[BoundedExecutor] = None
+    
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        """Блокирующая работа в пуле, если он задан, иначе в текущем потоке"""
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run(func, *args)
     
     async def process_file(self, file_path: str, category: str = "general") -> Optional[ProcessedDocument]:
         """Обрабатывает файл и извлекает текст"""
@@ -589,7 +1462,7 @@ class DocumentProcessor:
             metadata = await self._extract_metadata(file_path, content)
             
             # Разбиваем на чанки
-            chunks = self._chunk_text(content)
+            chunks = await self._run(self._chunk_text, content)
             
             # Создаем ID документа
             doc_id = self._generate_doc_id(file_path.name, content)
@@ -609,6 +1482,10 @@ class DocumentProcessor:
     
     async def _process_txt(self, file_path) -> str:
         """Обрабатывает текстовые файлы"""
+        return await self._run(self._read_text, file_path)
+    
+    def _read_text(self, file_path) -> str:
+        """Читает текстовый файл, подбирая кодировку"""
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 return file.read()
@@ -635,8 +1512,13 @@ class DocumentProcessor:
             "processed_at": time.time()
         }
     
-    def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def _chunk_text(self, text: str, chunk_size: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
         """Разбивает текст на чанки"""
+        if self.content_chunker is not None and chunk_size is None and overlap is None:
+            return self.content_chunker.chunk(text)
+        
+        chunk_size = chunk_size or self.chunk_size
+        overlap = self.chunk_overlap if overlap is None else overlap
         if len(text) <= chunk_size:
             return [text]
         
@@ -660,7 +1542,8 @@ class DocumentProcessor:
             if chunk:
                 chunks.append(chunk)
             
-            start = end - overlap
+            # Конец предложения внутри перекрытия не должен возвращать окно назад
+            start = end - overlap if end - overlap > start else end
         
         return chunks
     
@@ -672,9 +1555,11 @@ class DocumentProcessor:
 class DocumentService:
     """Основной сервис документов с ChromaDB"""
     
-    def __init__(self, db_path: str = "./chromadb_data"):
-        self.processor = DocumentProcessor()
-        self.vector_db = ChromaDBService(db_path)
+    def __init__(self, db_path: str = "./chromadb_data", chunking_mode: str = "fixed",
+                 chunk_size: int = 1000, chunk_overlap: int = 200, **chroma_options):
+        self.processor = DocumentProcessor(chunking_mode, chunk_size, chunk_overlap)
+        self.vector_db = ChromaDBService(db_path, chunker=self.processor._chunk_text, **chroma_options)
+        self.processor.executor = self.vector_db.io_pool
     
     async def process_and_store_file(self, file_path: str, category: str = "general") -> bool:
         """Обрабатывает файл и сохраняет в ChromaDB"""
@@ -685,7 +1570,24 @@ class DocumentService:
         
         return await self.vector_db.add_document(document)
     
-    async def search(self, query: str, category: str = None, limit: int = 5, min_relevance: float = 0.3) -> List[Dict]:
+    async def process_and_store_files(self, file_paths: List[str], category: str = "general") -> Dict[str, Any]:
+        """Обрабатывает несколько файлов и сохраняет их одним пакетом"""
+        documents = []
+        failed_files = []
+        
+        for file_path in file_paths:
+            document = await self.processor.process_file(file_path, category)
+            if document:
+                documents.append(document)
+            else:
+                failed_files.append(file_path)
+        
+        result = await self.vector_db.add_documents(documents)
+        result["failed_files"] = failed_files
+        return result
+    
+    async def search(self, query: str, category: str = None, limit: int = 5, min_relevance: float = 0.3,
+                     fields: Optional[Iterable[str]] = None, per_document: bool = True) -> List[Dict]:
         """
         Поиск документов с улучшенной фильтрацией
         """
@@ -693,21 +1595,56 @@ class DocumentService:
             query=query, 
             n_results=limit, 
             category=category,
-            min_relevance=min_relevance
+            min_relevance=min_relevance,
+            fields=fields,
+            per_document=per_document
         )
     
     async def get_stats(self) -> Dict:
         """Получает статистику"""
         return await self.vector_db.get_stats()
     
+    async def warm_up(self):
+        """Прогревает модель эмбеддингов (фоновая задача после старта)"""
+        await self.vector_db.warm_up()
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """Готовность векторной базы к поиску"""
+        return self.vector_db.get_readiness()
+    
     async def get_all_documents(self) -> List[Dict]:
         """Получает все документы"""
         return await self.vector_db.get_all_documents()
     
+    async def get_document(self, document_id: str) -> Optional[Dict]:
+        """Получает один документ"""
+        return await self.vector_db.get_document(document_id)
+    
+    def get_category_counts(self) -> Dict[str, int]:
+        """Количество документов по категориям"""
+        return self.vector_db.get_category_counts()
+    
+    async def list_documents(self, **options) -> Dict[str, Any]:
+        """Страница документов (см. ChromaDBService.list_documents)"""
+        return await self.vector_db.list_documents(**options)
+    
     async def delete_document(self, document_id: str) -> bool:
         """Удаляет документ"""
         return await self.vector_db.delete_document(document_id)
     
+    async def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Удаляет несколько документов"""
+        return await self.vector_db.delete_documents(document_ids)
+    
+    async def update_document(self, document_id: str, new_content: str = None, new_metadata: Dict = None) -> bool:
+        """Обновляет документ"""
+        return await self.vector_db.update_document(document_id, new_content, new_metadata)
+    
+    async def update_document_incremental(self, document_id: str, new_content: str = None,
+                                          new_metadata: Dict = None) -> Dict[str, Any]:
+        """Обновляет документ с отчетом о переиспользованных чанках"""
+        return await self.vector_db.update_document_incremental(document_id, new_content, new_metadata)
+    
     async def cleanup_duplicates(self) -> Dict:
         """Очищает дубликаты"""
         return await self.vector_db.cleanup_duplicates()
\ No newline at end of file
@@ -0,0 +1,134 @@
+# ====================================
+# ФАЙЛ: backend/services/content_chunker.py (НОВЫЙ ФАЙЛ)
+# Разбиение текста на чанки с границами, зависящими от содержимого
+# ====================================
+
+"""
+Content-Defined Chunker - Границы чанков не сдвигаются при правке документа
+
+- Кандидаты в границы: концы предложений, пустые строки и заголовки разделов
+- Кандидат становится границей, если отпечаток (crc32) окна текста перед ним
+  делится на фиксированный делитель. Решение зависит только от локального текста,
+  поэтому правка меняет лишь границы рядом с собой, а чанки дальше по тексту
+  совпадают с прежними (и их эмбеддинги переиспользуются при обновлении)
+- Делитель выбирается из целевого размера чанка и не зависит от документа
+- min_size/max_size ограничивают размер: слишком близкие границы пропускаются,
+  слишком длинный чанк режется на последнем кандидате (или пробеле)
+- Перекрытие: начало чанка дополняется хвостом предыдущего, выровненным
+  по началу предложения
+"""
+
+import bisect
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+CHUNKING_MODES = ("fixed", "content_defined")
+
+# Концы предложений, пустые строки и переводы строк перед заголовками разделов
+_BREAK_RE = re.compile(
+    r'[.!?…;]["»”)]*\s+'
+    r'|\n\s*\n'
+    r'|\n(?=[ \t]*(?:Стаття|Розділ|Глава|Частина|Статья|Раздел|Article|Section|Chapter|Part|§|\d+(?:\.\d+)*[.)]\s))'
+)
+
+# Средняя длина предложения (символов) для выбора делителя
+_EXPECTED_SENTENCE_LENGTH = 120
+
+class ContentDefinedChunker:
+    """Разбивает текст на чанки по стабильным границам предложений и разделов"""
+    
+    def __init__(self, target_size: int = 1000, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, overlap: int = 200, window: int = 64):
+        self.target_size = target_size
+        self.min_size = min_size if min_size is not None else target_size // 2
+        self.max_size = max_size if max_size is not None else target_size * 2
+        self.overlap = max(0, min(overlap, self.min_size // 2))
+        self.window = window
+        
+        # После min_size граница выбирается в среднем через divisor кандидатов
+        self.divisor = max(1, round((target_size - self.min_size) / _EXPECTED_SENTENCE_LENGTH))
+        # Разрывы абзацев и разделов - более вероятные границы
+        self.section_divisor = max(1, self.divisor // 4)
+    
+    def chunk(self, text: str) -> List[str]:
+        """Чанки текста (с перекрытием)"""
+        if len(text) <= self.target_size:
+            return [text]
+        
+        candidates = self._candidates(text)
+        positions = [position for position, _ in candidates]
+        cuts = self._boundaries(text, candidates)
+        
+        chunks = []
+        start = 0
+        for end in cuts + [len(text)]:
+            head = self._overlap_start(text, positions, start) if chunks else start
+            chunk = text[head:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = end
+        return chunks
+    
+    def _candidates(self, text: str) -> List[Tuple[int, bool]]:
+        """Позиции возможных границ (начало следующего фрагмента) и признак разрыва раздела"""
+        return [
+            (match.end(), "\n" in match.group())
+            for match in _BREAK_RE.finditer(text)
+            if 0 < match.end() < len(text)
+        ]
+    
+    def _is_boundary(self, text: str, position: int, section: bool) -> bool:
+        """Граница, если отпечаток окна перед кандидатом делится на делитель"""
+        fingerprint = zlib.crc32(text[max(0, position - self.window):position].encode("utf-8"))
+        return fingerprint % (self.section_divisor if section else self.divisor) == 0
+    
+    def _boundaries(self, text: str, candidates: List[Tuple[int, bool]]) -> List[int]:
+        """Позиции разрезов с учетом min_size/max_size"""
+        cuts = []
+        start = 0
+        fallback = None  # Последний кандидат не ближе min_size к началу чанка
+        
+        for position, section in candidates:
+            while position - start > self.max_size:
+                start = fallback if fallback is not None else self._hard_cut(text, start)
+                cuts.append(start)
+                fallback = None
+            
+            if position - start < self.min_size:
+                continue
+            if self._is_boundary(text, position, section):
+                cuts.append(position)
+                start = position
+                fallback = None
+            else:
+                fallback = position
+        
+        while len(text) - start > self.max_size:
+            start = fallback if fallback is not None else self._hard_cut(text, start)
+            cuts.append(start)
+            fallback = None
+        
+        # Короткий хвост присоединяем к предыдущему чанку
+        if cuts and len(text) - cuts[-1] < self.min_size // 2:
+            previous = cuts[-2] if len(cuts) > 1 else 0
+            if len(text) - previous <= self.max_size:
+                cuts.pop()
+        return cuts
+    
+    def _hard_cut(self, text: str, start: int) -> int:
+        """Разрез длинного фрагмента без кандидатов: по последнему пробелу до max_size"""
+        limit = start + self.max_size
+        space = text.rfind(" ", start + self.min_size, limit)
+        return space + 1 if space != -1 else limit
+    
+    def _overlap_start(self, text: str, positions: List[int], start: int) -> int:
+        """Начало перекрытия: первое начало предложения в последних overlap символах"""
+        if not self.overlap:
+            return start
+        lower = start - self.overlap
+        index = bisect.bisect_left(positions, lower)
+        if index < len(positions) and positions[index] < start:
+            return positions[index]
+        space = text.find(" ", lower, start)
+        return space + 1 if space != -1 else start
@@ -0,0 +1,190 @@
+# ====================================
+# ФАЙЛ: backend/services/context_packer.py (НОВЫЙ ФАЙЛ)
+# Упаковка нескольких найденных фрагментов в контекст LLM
+# ====================================
+
+"""
+Context Packer - Заполнение бюджета токенов контекста из ранжированных фрагментов
+
+- Быстрая оценка длины в токенах без токенизатора
+- Удаление перекрытий соседних чанков и повторяющихся предложений
+- Стабильный порядок фрагментов (документ, номер чанка), чтобы одинаковый набор
+  источников давал одинаковый префикс промпта для KV-кэша Ollama
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов: ~4 символа ASCII или ~2.5 символа кириллицы на токен"""
+    if not text:
+        return 0
+    # Каждый не-ASCII символ дает минимум 1 лишний байт в UTF-8
+    non_ascii = len(text.encode("utf-8")) - len(text)
+    ascii_chars = max(0, len(text) - non_ascii)
+    return int(ascii_chars / 4 + non_ascii / 2.5) + 1
+
+@dataclass
+class PackedContext:
+    """Результат упаковки контекста"""
+    text: str
+    tokens: int
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    skipped_duplicates: int = 0
+    truncated: bool = False
+    
+    @property
+    def sources(self) -> List[str]:
+        """Имена файлов источников без повторов"""
+        return list(dict.fromkeys(chunk.get("filename", "Document") for chunk in self.chunks))
+
+class ContextPacker:
+    """Упаковывает ранжированные фрагменты в бюджет токенов"""
+    
+    def __init__(self, token_budget: int = 4000, min_chunk_tokens: int = 32,
+                 min_overlap_chars: int = 40):
+        self.token_budget = max(1, token_budget)
+        self.min_chunk_tokens = min_chunk_tokens
+        self.min_overlap_chars = min_overlap_chars
+    
+    def pack(self, documents: List[Dict[str, Any]]) -> PackedContext:
+        """Выбирает фрагменты по рангу, пока хватает бюджета, и упорядочивает их стабильно"""
+        selected = []
+        seen_sentences = set()
+        used_tokens = 0
+        skipped_duplicates = 0
+        truncated = False
+        
+        for rank, document in enumerate(documents):
+            raw_text = (document.get("content") or "").strip()
+            if not raw_text:
+                continue
+            text = raw_text
+            
+            doc_key = str(document.get("document_id") or document.get("filename") or rank)
+            original_length = len(text)
+            
+            # Перекрытие с уже выбранными чанками того же документа
+            for previous in selected:
+                if previous["doc_key"] == doc_key:
+                    text = self._strip_overlap(previous["raw"], text)
+            
+            text, fingerprints = self._dedupe_sentences(text, seen_sentences)
+            # Фрагмент почти целиком повторяет уже выбранные
+            if not text or (len(text) < original_length and estimate_tokens(text) < self.min_chunk_tokens):
+                skipped_duplicates += 1
+                continue
+            
+            header = self._header(document)
+            tokens = estimate_tokens(header) + estimate_tokens(text)
+            remaining = self.token_budget - used_tokens
+            
+            if tokens > remaining:
+                if remaining < self.min_chunk_tokens * 2:
+                    truncated = True
+                    break
+                text = self._truncate_to_tokens(text, remaining - estimate_tokens(header))
+                tokens = estimate_tokens(header) + estimate_tokens(text)
+                truncated = True
+            
+            selected.append({
+                "doc_key": doc_key,
+                "chunk_index": self._chunk_index(document),
+                "rank": rank,
+                "filename": document.get("filename", "Document"),
+                "header": header,
+                "raw": raw_text,
+                "text": text,
+                "tokens": tokens,
+                "relevance_score": document.get("relevance_score", 0.0)
+            })
+            used_tokens += tokens
+            # Предложения считаются использованными только после выбора фрагмента
+            seen_sentences.update(fingerprints)
+            
+            if truncated:
+                break
+        
+        # Стабильный порядок: не зависит от колебаний ранжирования
+        selected.sort(key=lambda item: (item["doc_key"], item["chunk_index"]))
+        
+        packed_text = "\n\n".join(f"{item['header']}\n{item['text']}" for item in selected)
+        
+        return PackedContext(
+            text=packed_text,
+            tokens=used_tokens,
+            chunks=[{k: v for k, v in item.items() if k not in ("header", "raw", "text")} for item in selected],
+            skipped_duplicates=skipped_duplicates,
+            truncated=truncated
+        )
+    
+    @staticmethod
+    def _header(document: Dict[str, Any]) -> str:
+        """Заголовок фрагмента в промпте"""
+        return f"[{document.get('filename', 'Document')}]"
+    
+    @staticmethod
+    def _chunk_index(document: Dict[str, Any]) -> int:
+        """Номер чанка в документе (-1 для документа целиком)"""
+        metadata = document.get("metadata") or {}
+        try:
+            return int(document.get("chunk_index", metadata.get("chunk_index", -1)))
+        except (TypeError, ValueError):
+            return -1
+    
+    def _strip_overlap(self, previous: str, text: str) -> str:
+        """Убирает начало text, совпадающее с концом previous (перекрытие соседних чанков)"""
+        if text in previous:
+            return ""
+        
+        probe = text[:self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return text
+        
+        position = previous.rfind(probe)
+        while position != -1:
+            tail = previous[position:]
+            if text.startswith(tail):
+                return text[len(tail):].lstrip()
+            position = previous.rfind(probe, 0, position)
+        
+        return text
+    
+    @staticmethod
+    def _dedupe_sentences(text: str, seen: set) -> Tuple[str, Set[bytes]]:
+        """Удаляет предложения, уже попавшие в контекст; возвращает текст и отпечатки его предложений"""
+        kept = []
+        fingerprints = set()
+        for sentence in _SENTENCE_SPLIT_RE.split(text):
+            normalized = _WHITESPACE_RE.sub(" ", sentence).strip().lower()
+            if not normalized:
+                continue
+            if len(normalized) >= 20:
+                fingerprint = hashlib.md5(normalized.encode("utf-8")).digest()
+                if fingerprint in seen or fingerprint in fingerprints:
+                    continue
+                fingerprints.add(fingerprint)
+            kept.append(sentence.strip())
+        return " ".join(kept), fingerprints
+    
+    @staticmethod
+    def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+        """Обрезает текст под бюджет, по возможности на границе предложения"""
+        tokens = estimate_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        
+        max_chars = max(1, int(len(text) * max_tokens / tokens))
+        cut = text[:max_chars]
+        sentence_end = max(cut.rfind('. '), cut.rfind('! '), cut.rfind('? '))
+        if sentence_end > max_chars // 2:
+            return cut[:sentence_end + 1]
+        return cut.rstrip() + "..."
@@ -0,0 +1,106 @@
+# ====================================
+# ФАЙЛ: backend/services/document_catalog.py (НОВЫЙ ФАЙЛ)
+# Каталог документов: счетчики по категориям без просмотра коллекции
+# ====================================
+
+"""
+Document Catalog - Статистика документов за O(1)
+
+- Для каждого документа хранится категория, число чанков, размер и время изменения
+- Счетчики по категориям и общие итоги обновляются при добавлении, обновлении
+  и удалении документа (старая запись вычитается, новая прибавляется под одной
+  блокировкой, поэтому читатель не видит промежуточного состояния)
+- Каталог строится при старте из метаданных, которые хранилище уже читает
+  (индекс сегментов SimpleVectorDB или метаданные основных документов ChromaDB)
+"""
+
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+@dataclass
+class CatalogEntry:
+    """Запись каталога о документе"""
+    category: str
+    chunks: int
+    size: int
+    modified_at: float
+
+@dataclass
+class CategoryStats:
+    """Итоги по категории"""
+    documents: int = 0
+    chunks: int = 0
+    size: int = 0
+    last_modified: float = 0.0
+
+class DocumentCatalog:
+    """Счетчики документов по категориям, обновляемые вместе с хранилищем"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._categories: Dict[str, CategoryStats] = {}
+        self._totals = CategoryStats()
+    
+    def add(self, doc_id: str, category: Optional[str], chunks: int = 0, size: int = 0,
+            modified_at: Optional[float] = None):
+        """Добавляет документ или заменяет его прежнюю запись"""
+        entry = CatalogEntry(
+            category=category or "general",
+            chunks=max(0, int(chunks or 0)),
+            size=max(0, int(size or 0)),
+            modified_at=float(modified_at or time.time())
+        )
+        with self._lock:
+            previous = self._entries.get(doc_id)
+            if previous is not None:
+                self._apply(previous, -1)
+            self._entries[doc_id] = entry
+            self._apply(entry, 1)
+    
+    def remove(self, doc_id: str) -> bool:
+        """Удаляет документ из каталога"""
+        with self._lock:
+            entry = self._entries.pop(doc_id, None)
+            if entry is None:
+                return False
+            self._apply(entry, -1, modified_at=time.time())
+            return True
+    
+    def _apply(self, entry: CatalogEntry, sign: int, modified_at: Optional[float] = None):
+        """Прибавляет (sign=1) или вычитает (sign=-1) запись из итогов категории и общих итогов"""
+        category = self._categories.setdefault(entry.category, CategoryStats())
+        modified_at = modified_at or entry.modified_at
+        for stats in (category, self._totals):
+            stats.documents += sign
+            stats.chunks += sign * entry.chunks
+            stats.size += sign * entry.size
+            stats.last_modified = max(stats.last_modified, modified_at)
+        if category.documents <= 0:
+            del self._categories[entry.category]
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def categories(self) -> List[str]:
+        """Категории, в которых есть документы"""
+        with self._lock:
+            return sorted(self._categories)
+    
+    def category_counts(self) -> Dict[str, int]:
+        """Количество документов по категориям"""
+        with self._lock:
+            return {name: stats.documents for name, stats in self._categories.items()}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Итоги каталога: документы, чанки, размер и время последнего изменения"""
+        with self._lock:
+            return {
+                **asdict(self._totals),
+                "categories": {name: asdict(stats) for name, stats in sorted(self._categories.items())}
+            }
@@ -0,0 +1,120 @@
+# ====================================
+# ФАЙЛ: backend/services/document_listing.py (НОВЫЙ ФАЙЛ)
+# Отсортированный индекс документов для постраничного списка
+# ====================================
+
+"""
+Document Listing - Список документов без чтения всего корпуса
+
+- Ключи (-added_at, id) хранятся отсортированными (новые документы первыми),
+  отдельно для всех документов и для каждой категории
+- Фильтр по дате и позиция курсора находятся бинарным поиском
+- Keyset пагинация: курсор кодирует ключ последней строки страницы, поэтому
+  страница не сдвигается при добавлении и удалении документов
+"""
+
+import base64
+import bisect
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+ListingKey = Tuple[float, str]
+
+@dataclass
+class ListingPage:
+    """Страница списка: ID документов по порядку и курсор следующей страницы"""
+    ids: List[str] = field(default_factory=list)
+    total: int = 0  # Документов под фильтром (без учета курсора и offset)
+    next_cursor: Optional[str] = None
+
+def encode_cursor(key: ListingKey) -> str:
+    """Непрозрачный курсор из ключа строки"""
+    raw = json.dumps([-key[0], key[1]], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> ListingKey:
+    """Ключ строки из курсора; ValueError для поврежденного курсора"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        added_at, doc_id = json.loads(raw.decode("utf-8"))
+        return (-float(added_at), str(doc_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+class DocumentListIndex:
+    """Документы, отсортированные по времени добавления (новые первыми)"""
+    
+    def __init__(self):
+        self._keys: List[ListingKey] = []
+        self._by_category: Dict[str, List[ListingKey]] = {}
+        # doc_id → (ключ, категория)
+        self._entries: Dict[str, Tuple[ListingKey, str]] = {}
+    
+    def add(self, doc_id: str, added_at: Optional[float], category: Optional[str]):
+        """Добавляет или перемещает документ (при изменении даты или категории)"""
+        key = (-float(added_at or 0.0), doc_id)
+        category = category or "general"
+        
+        entry = self._entries.get(doc_id)
+        if entry == (key, category):
+            return
+        if entry is not None:
+            self.remove(doc_id)
+        
+        bisect.insort(self._keys, key)
+        bisect.insort(self._by_category.setdefault(category, []), key)
+        self._entries[doc_id] = (key, category)
+    
+    def remove(self, doc_id: str) -> bool:
+        """Удаляет документ из индекса"""
+        entry = self._entries.pop(doc_id, None)
+        if entry is None:
+            return False
+        
+        key, category = entry
+        self._delete_key(self._keys, key)
+        keys = self._by_category.get(category)
+        if keys is not None:
+            self._delete_key(keys, key)
+            if not keys:
+                del self._by_category[category]
+        return True
+    
+    @staticmethod
+    def _delete_key(keys: List[ListingKey], key: ListingKey):
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def page(self, limit: int, cursor: Optional[str] = None, offset: int = 0,
+             category: Optional[str] = None, added_after: Optional[float] = None,
+             added_before: Optional[float] = None) -> ListingPage:
+        """Страница документов под фильтром (added_after/added_before включительно)"""
+        keys = self._by_category.get(category, []) if category else self._keys
+        
+        # Диапазон дат: ключ хранит -added_at, поэтому границы меняются местами
+        start = bisect.bisect_left(keys, (-added_before,)) if added_before is not None else 0
+        end = (bisect.bisect_left(keys, (math.nextafter(-added_after, math.inf),))
+               if added_after is not None else len(keys))
+        end = max(start, end)
+        total = end - start
+        
+        if cursor:
+            start = max(start, bisect.bisect_right(keys, decode_cursor(cursor)))
+        start = min(end, start + max(0, offset))
+        
+        stop = min(end, start + max(0, limit))
+        page_keys = keys[start:stop]
+        return ListingPage(
+            ids=[doc_id for _, doc_id in page_keys],
+            total=total,
+            next_cursor=encode_cursor(page_keys[-1]) if page_keys and stop < end else None
+        )
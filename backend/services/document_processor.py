@@ -2,7 +2,7 @@
 Простая версия document processor без ChromaDB
 """
 import asyncio
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterable, List, Dict, Optional
 import tempfile
 import os
 from pathlib import Path
@@ -11,6 +11,15 @@ from dataclasses import dataclass
 import hashlib
 import json
 import time
+import zlib
+
+from services.bm25_index import BM25Index
+from services.content_chunker import CHUNKING_MODES, ContentDefinedChunker
+from services.document_catalog import DocumentCatalog
+from services.document_listing import DocumentListIndex
+from services.result_projection import parse_fields, project_result
+from services.segment_store import SegmentStore
+from services.snippet_selector import SnippetSelector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,11 +34,22 @@ class ProcessedDocument:
     chunks: List[str]
 
 class DocumentProcessor:
-    def __init__(self):
+    def __init__(self, chunking_mode: str = "fixed", chunk_size: int = 1000, chunk_overlap: int = 200):
         self.supported_formats = {
             '.txt': self._process_txt,
             '.md': self._process_txt,
         }
+        
+        # fixed - окна chunk_size символов; content_defined - стабильные при правках границы
+        if chunking_mode not in CHUNKING_MODES:
+            raise ValueError(f"Unknown chunking mode: {chunking_mode}. Allowed: {list(CHUNKING_MODES)}")
+        self.chunking_mode = chunking_mode
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.content_chunker = (
+            ContentDefinedChunker(target_size=chunk_size, overlap=chunk_overlap)
+            if chunking_mode == "content_defined" else None
+        )
     
     async def process_file(self, file_path: str, category: str = "general") -> Optional[ProcessedDocument]:
         """Обрабатывает файл и извлекает текст"""
@@ -101,8 +121,13 @@ class DocumentProcessor:
         
         return metadata
     
-    def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def _chunk_text(self, text: str, chunk_size: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
         """Разбивает текст на чанки"""
+        if self.content_chunker is not None and chunk_size is None and overlap is None:
+            return self.content_chunker.chunk(text)
+        
+        chunk_size = chunk_size or self.chunk_size
+        overlap = self.chunk_overlap if overlap is None else overlap
         if len(text) <= chunk_size:
             return [text]
         
@@ -127,7 +152,8 @@ class DocumentProcessor:
             if chunk:
                 chunks.append(chunk)
             
-            start = end - overlap
+            # Конец предложения внутри перекрытия не должен возвращать окно назад
+            start = end - overlap if end - overlap > start else end
         
         return chunks
     
@@ -137,37 +163,149 @@ class DocumentProcessor:
         return f"{filename}_{content_hash}"
 
 class SimpleVectorDB:
-    """Простая база данных в памяти вместо ChromaDB"""
+    """Простая база данных вместо ChromaDB (append-only сегменты на диске)"""
     
-    def __init__(self, persist_directory: str = "./simple_db"):
+    def __init__(self, persist_directory: str = "./simple_db", bm25_flush_interval: int = 256,
+                 chunker: Optional[Callable[[str], List[str]]] = None):
         self.persist_directory = persist_directory
-        self.documents = []
+        # Разбиение текста на чанки при обновлении документа
+        self.chunker = chunker or DocumentProcessor()._chunk_text
+        # Старый формат: весь корпус одним JSON файлом
         self.metadata_file = os.path.join(persist_directory, "documents.json")
+        self.bm25_file = os.path.join(persist_directory, "bm25_index.json")
+        self.bm25_flush_interval = max(1, bm25_flush_interval)
+        self.snippet_selector = SnippetSelector(max_length=500)
+        self._bm25_unsaved = 0
         
         # Создаем папку если не существует
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Загружаем существующие документы
-        self._load_documents()
+        # Загружается только индекс, документы читаются по требованию
+        self.store = SegmentStore(
+            os.path.join(persist_directory, "segments"),
+            summarize=self._summarize_document
+        )
+        self._migrate_legacy_file()
+        logger.info(f"Loaded index of {len(self.store)} documents from storage")
+        
+        self.bm25 = self._load_bm25_index()
+    
+        # Сортированный по дате индекс для постраничного списка и каталог для статистики
+        self.listing = DocumentListIndex()
+        self.catalog = DocumentCatalog()
+        for doc_id, summary in self.store.summaries():
+            self._track_document(doc_id, summary)
+    
+    @staticmethod
+    def _summarize_document(doc: Dict) -> Dict:
+        """Краткие метаданные документа, хранимые в индексе"""
+        metadata = doc.get("metadata") or {}
+        return {
+            "filename": doc.get("filename"),
+            "category": doc.get("category"),
+            "added_at": doc.get("added_at"),
+            "content_length": metadata.get("content_length", len(doc.get("content", ""))),
+            "chunks_count": len(doc.get("chunks", [])),
+            "metadata": metadata,
+            # Ревизия текста для сверки BM25 индекса с хранилищем
+            "revision": zlib.crc32("\x1f".join(SimpleVectorDB._search_chunks(doc)).encode("utf-8"))
+        }
+    
+    @staticmethod
+    def _search_chunks(doc: Dict) -> List[str]:
+        """Чанки для поиска (документ без чанков ищется целиком)"""
+        return doc.get("chunks") or [doc.get("content", "")]
+    
+    def _load_bm25_index(self) -> BM25Index:
+        """Загружает BM25 индекс и досчитывает документы, изменившиеся после сохранения"""
+        index = None
+        if os.path.exists(self.bm25_file):
+            try:
+                index = BM25Index.load(self.bm25_file)
+            except Exception as e:
+                logger.warning(f"BM25 index is unreadable, rebuilding: {e}")
+        if index is None:
+            index = BM25Index()
+        
+        changed = 0
+        live_ids = set()
+        for doc_id, summary in self.store.summaries():
+            live_ids.add(doc_id)
+            if index.has_document(doc_id) and index.get_revision(doc_id) == summary.get("revision"):
+                continue
+            doc = self.store.get(doc_id)
+            if doc is not None:
+                index.add_document(doc_id, self._search_chunks(doc), summary.get("revision"))
+                changed += 1
+        
+        for doc_id in [doc_id for doc_id in index.documents if doc_id not in live_ids]:
+            index.remove_document(doc_id)
+            changed += 1
+        
+        if changed:
+            logger.info(f"BM25 index updated for {changed} documents")
+            index.save(self.bm25_file)
+        return index
+    
+    def _track_document(self, doc_id: str, summary: Dict):
+        """Обновляет индекс списка и каталог по краткой записи документа"""
+        metadata = summary.get("metadata") or {}
+        self.listing.add(doc_id, summary.get("added_at"), summary.get("category"))
+        self.catalog.add(
+            doc_id,
+            summary.get("category"),
+            chunks=summary.get("chunks_count", 0),
+            size=summary.get("content_length", 0),
+            modified_at=metadata.get("updated_at") or summary.get("added_at")
+        )
     
-    def _load_documents(self):
-        """Загружает документы из файла"""
+    def _untrack_document(self, doc_id: str):
+        self.listing.remove(doc_id)
+        self.catalog.remove(doc_id)
+    
+    def _index_document(self, doc: Dict):
+        """Обновляет BM25 индекс для документа"""
+        summary = self.store.get_summary(doc["id"]) or {}
+        self.bm25.add_document(doc["id"], self._search_chunks(doc), summary.get("revision"))
+        self._track_document(doc["id"], summary)
+        self._bm25_changed()
+    
+    def _bm25_changed(self):
+        """Периодически сохраняет BM25 индекс (при старте индекс сверяется с хранилищем)"""
+        self._bm25_unsaved += 1
+        if self._bm25_unsaved >= self.bm25_flush_interval:
+            self.save_search_index()
+    
+    def save_search_index(self):
+        """Сохраняет BM25 индекс на диск"""
         try:
-            if os.path.exists(self.metadata_file):
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.documents = json.load(f)
-                logger.info(f"Loaded {len(self.documents)} documents from storage")
+            self.bm25.save(self.bm25_file)
+            self._bm25_unsaved = 0
         except Exception as e:
-            logger.error(f"Error loading documents: {e}")
-            self.documents = []
+            logger.error(f"Error saving BM25 index: {e}")
     
-    def _save_documents(self):
-        """Сохраняет документы в файл"""
+    def _migrate_legacy_file(self):
+        """Однократный перенос documents.json в сегменты"""
+        if not os.path.exists(self.metadata_file):
+            return
         try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.documents, f, ensure_ascii=False, indent=2)
+            with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                legacy_documents = json.load(f)
+            
+            for doc in legacy_documents:
+                if doc.get("id") not in self.store:
+                    self.store.put(doc)
+            self.store.flush()
+            
+            os.replace(self.metadata_file, self.metadata_file + ".migrated")
+            logger.info(f"Migrated {len(legacy_documents)} documents from documents.json to segment store")
         except Exception as e:
-            logger.error(f"Error saving documents: {e}")
+            logger.error(f"Error migrating documents.json: {e}")
+    
+    @property
+    def documents(self) -> List[Dict]:
+        """Все документы целиком (читает все сегменты, только для совместимости)"""
+        return list(self.store.iter_records())
     
     async def add_document(self, document: ProcessedDocument) -> bool:
         """Добавляет документ в базу"""
@@ -184,19 +322,12 @@ class SimpleVectorDB:
             }
             
             # Проверяем, не существует ли уже такой документ
-            existing_ids = [doc["id"] for doc in self.documents]
-            if document.id in existing_ids:
+            if document.id in self.store:
                 logger.warning(f"Document {document.id} already exists, updating...")
-                # Обновляем существующий
-                for i, doc in enumerate(self.documents):
-                    if doc["id"] == document.id:
-                        self.documents[i] = doc_dict
-                        break
-            else:
-                # Добавляем новый
-                self.documents.append(doc_dict)
             
-            self._save_documents()
+            # Новая версия дописывается в журнал, старая становится мертвой записью
+            self.store.put(doc_dict)
+            self._index_document(doc_dict)
             logger.info(f"Added document {document.filename} with {len(document.chunks)} chunks")
             return True
             
@@ -204,48 +335,139 @@ class SimpleVectorDB:
             logger.error(f"Error adding document: {str(e)}")
             return False
     
-    async def search_documents(self, query: str, n_results: int = 5, category: str = None) -> List[Dict]:
-        """Простой поиск по ключевым словам"""
+    async def get_document(self, document_id: str) -> Optional[Dict]:
+        """Читает документ целиком по ID"""
+        try:
+            return self.store.get(document_id)
+        except Exception as e:
+            logger.error(f"Error reading document {document_id}: {str(e)}")
+            return None
+    
+    async def get_all_documents(self) -> List[Dict]:
+        """Все документы целиком"""
+        return self.documents
+    
+    async def update_document(self, document_id: str, updates: Dict) -> bool:
+        """Обновляет поля документа (content, category, metadata)"""
+        try:
+            doc = self.store.get(document_id)
+            if doc is None:
+                return False
+            
+            if updates.get("content"):
+                doc["content"] = updates["content"]
+                # Чанки старого текста больше не соответствуют документу
+                doc["chunks"] = self.chunker(updates["content"])
+                doc["metadata"]["content_length"] = len(updates["content"])
+                doc["metadata"]["word_count"] = len(updates["content"].split())
+                doc["metadata"]["updated_at"] = time.time()
+            
+            if updates.get("category"):
+                doc["category"] = updates["category"]
+            
+            if updates.get("metadata"):
+                doc["metadata"].update(updates["metadata"])
+            
+            self.store.put(doc)
+            self._index_document(doc)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating document: {str(e)}")
+            return False
+    
+    def get_category_counts(self) -> Dict[str, int]:
+        """Количество документов по категориям (только по индексу)"""
+        return self.catalog.category_counts()
+    
+    async def list_documents(self, limit: int = 50, cursor: Optional[str] = None, offset: int = 0,
+                             category: Optional[str] = None, added_after: Optional[float] = None,
+                             added_before: Optional[float] = None,
+                             include_content: bool = False) -> Dict[str, Any]:
+        """
+        Страница документов (новые первыми) по сортированному индексу.
+        Строки содержат только метаданные из индекса хранилища; текст читается,
+        только если include_content. ValueError для неверного курсора.
+        """
+        page = self.listing.page(limit, cursor, offset, category, added_after, added_before)
+        
+        documents = []
+        for doc_id in page.ids:
+            summary = self.store.get_summary(doc_id)
+            if summary is None:
+                continue
+            if include_content or "metadata" not in summary:
+                # Индекс старого формата без метаданных или нужен текст
+                doc = self.store.get(doc_id)
+                if doc is None:
+                    continue
+                metadata = doc.get("metadata") or {}
+            else:
+                doc, metadata = None, summary["metadata"]
+            
+            row = {
+                "id": doc_id,
+                "filename": summary.get("filename"),
+                "category": summary.get("category") or "general",
+                "size": summary.get("content_length", 0),
+                "word_count": metadata.get("word_count", 0),
+                "chunks_count": summary.get("chunks_count", 0),
+                "added_at": summary.get("added_at"),
+                "metadata": metadata
+            }
+            if include_content:
+                row["content"] = doc["content"]
+            documents.append(row)
+        
+        return {"documents": documents, "total": page.total, "next_cursor": page.next_cursor}
+    
+    async def search_documents(self, query: str, n_results: int = 5, category: str = None,
+                               min_relevance: float = 0.0, fields: Optional[Iterable[str]] = None,
+                               per_document: bool = True) -> List[Dict]:
+        """Поиск BM25 по чанкам через инвертированный индекс (fields - поля результата)"""
+        fields = parse_fields(fields)
         try:
-            query_words = query.lower().split()
+            doc_filter = None
+            if category:
+                # Фильтр по категории по индексу хранилища, без чтения документа
+                doc_filter = lambda doc_id: (self.store.get_summary(doc_id) or {}).get("category") == category
+            
+            hits = self.bm25.search(query, limit=n_results, doc_filter=doc_filter, per_document=per_document)
             results = []
             
-            for doc in self.documents:
-                if category and doc["category"] != category:
+            for hit in hits:
+                # Доля терминов запроса, найденных в чанке
+                relevance = hit["matched_terms"] / hit["query_terms"]
+                if relevance < min_relevance:
                     continue
                 
-                # Простой поиск по содержимому
-                content_lower = doc["content"].lower()
-                score = 0
+                doc = self.store.get(hit["document_id"])
+                if doc is None:
+                    continue
                 
-                for word in query_words:
-                    if word in content_lower:
-                        score += content_lower.count(word)
+                chunks = self._search_chunks(doc)
+                best_chunk = chunks[hit["chunk_index"]] if hit["chunk_index"] < len(chunks) else ""
+                # Чанк целиком, если он есть; иначе фрагмент документа
+                snippet = self.snippet_selector.select(
+                    best_chunk or doc["content"], query, max_length=len(best_chunk) or None
+                )
                 
-                if score > 0:
-                    # Находим лучший чанк
-                    best_chunk = ""
-                    best_chunk_score = 0
-                    
-                    for chunk in doc["chunks"]:
-                        chunk_lower = chunk.lower()
-                        chunk_score = sum(chunk_lower.count(word) for word in query_words)
-                        if chunk_score > best_chunk_score:
-                            best_chunk_score = chunk_score
-                            best_chunk = chunk
-                    
-                    results.append({
-                        "content": best_chunk or doc["content"][:500],
-                        "metadata": doc["metadata"],
-                        "relevance_score": score / len(query_words),
-                        "document_id": doc["id"],
-                        "filename": doc["filename"]
-                    })
+                results.append(project_result({
+                    "content": snippet.text,
+                    "highlights": [list(span) for span in snippet.highlights],
+                    "full_content": best_chunk or doc["content"],
+                    "metadata": doc["metadata"],
+                    "relevance_score": relevance,
+                    "document_id": doc["id"],
+                    "filename": doc["filename"],
+                    "search_info": {
+                        "match_type": "lexical",
+                        "bm25_score": round(hit["score"], 4),
+                        "chunk_index": hit["chunk_index"]
+                    }
+                }, fields))
             
-            # Сортируем по релевантности
-            results.sort(key=lambda x: x["relevance_score"], reverse=True)
-            
-            return results[:n_results]
+            return results
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
@@ -253,16 +475,15 @@ class SimpleVectorDB:
     
     async def get_document_count(self) -> int:
         """Возвращает количество документов"""
-        return len(self.documents)
+        return len(self.store)
     
     async def delete_document(self, document_id: str) -> bool:
         """Удаляет документ"""
         try:
-            initial_count = len(self.documents)
-            self.documents = [doc for doc in self.documents if doc["id"] != document_id]
-            
-            if len(self.documents) < initial_count:
-                self._save_documents()
+            if self.store.delete(document_id):
+                self.bm25.remove_document(document_id)
+                self._untrack_document(document_id)
+                self._bm25_changed()
                 logger.info(f"Deleted document {document_id}")
                 return True
             
@@ -271,13 +492,62 @@ class SimpleVectorDB:
         except Exception as e:
             logger.error(f"Error deleting document: {str(e)}")
             return False
+    
+    async def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Удаляет несколько документов (tombstone записи пачкой с одним fsync)"""
+        start_time = time.time()
+        document_ids = list(dict.fromkeys(document_ids))
+        
+        try:
+            deleted = set(self.store.delete_many(document_ids))
+        except Exception as e:
+            logger.error(f"Error deleting documents: {str(e)}")
+            deleted = None
+        
+        if deleted is None:
+            results = {doc_id: "failed" for doc_id in document_ids}
+        else:
+            for doc_id in deleted:
+                self.bm25.remove_document(doc_id)
+                self._untrack_document(doc_id)
+            if deleted:
+                self._bm25_changed()
+            results = {doc_id: "deleted" if doc_id in deleted else "not_found" for doc_id in document_ids}
+        
+        outcomes = list(results.values())
+        logger.info(f"Bulk delete: {outcomes.count('deleted')}/{len(document_ids)} documents "
+                   f"in {time.time() - start_time:.2f}s")
+        return {
+            "success": "failed" not in outcomes,
+            "results": results,
+            "deleted": outcomes.count("deleted"),
+            "not_found": outcomes.count("not_found"),
+            "failed": outcomes.count("failed"),
+            "records_deleted": outcomes.count("deleted"),
+            "elapsed_seconds": round(time.time() - start_time, 3)
+        }
+    
+    def get_storage_stats(self) -> Dict:
+        """Статистика сегментного хранилища и поискового индекса"""
+        return {
+            **self.store.get_stats(),
+            "search_index": self.bm25.get_stats(),
+            "catalog": self.catalog.get_stats()
+        }
+    
+    def close(self):
+        """Сохраняет индексы и закрывает сегменты"""
+        if self._bm25_unsaved:
+            self.save_search_index()
+        self.store.close()
 
 class DocumentService:
     """Простой сервис обработки документов"""
     
-    def __init__(self, db_path: str = "./simple_db"):
-        self.processor = DocumentProcessor()
-        self.vector_db = SimpleVectorDB(db_path)
+    def __init__(self, db_path: str = "./simple_db", chunking_mode: str = "fixed",
+                 chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.processor = DocumentProcessor(chunking_mode, chunk_size, chunk_overlap)
+        self.vector_db = SimpleVectorDB(db_path, chunker=self.processor._chunk_text)
     
     async def process_and_store_file(self, file_path: str, category: str = "general") -> bool:
         """Обрабатывает файл и сохраняет в базу"""
@@ -288,13 +558,41 @@ class DocumentService:
         
         return await self.vector_db.add_document(document)
     
-    async def search(self, query: str, category: str = None, limit: int = 5) -> List[Dict]:
+    async def search(self, query: str, category: str = None, limit: int = 5,
+                     min_relevance: float = 0.0, fields: Optional[Iterable[str]] = None,
+                     per_document: bool = True) -> List[Dict]:
         """Поиск документов"""
-        return await self.vector_db.search_documents(query, limit, category)
+        return await self.vector_db.search_documents(query, limit, category, min_relevance, fields, per_document)
+    
+    async def get_all_documents(self) -> List[Dict]:
+        """Все документы"""
+        return await self.vector_db.get_all_documents()
+    
+    async def get_document(self, document_id: str) -> Optional[Dict]:
+        """Один документ"""
+        return await self.vector_db.get_document(document_id)
+    
+    async def list_documents(self, **options) -> Dict[str, Any]:
+        """Страница документов (см. SimpleVectorDB.list_documents)"""
+        return await self.vector_db.list_documents(**options)
+    
+    async def delete_document(self, document_id: str) -> bool:
+        """Удаляет документ"""
+        return await self.vector_db.delete_document(document_id)
+    
+    async def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Удаляет несколько документов"""
+        return await self.vector_db.delete_documents(document_ids)
     
     async def get_stats(self) -> Dict:
         """Получает статистику"""
         return {
             "total_documents": await self.vector_db.get_document_count(),
-            "db_path": self.vector_db.persist_directory
-        }
\ No newline at end of file
+            "categories": self.vector_db.catalog.categories(),
+            "db_path": self.vector_db.persist_directory,
+            "storage": self.vector_db.get_storage_stats()
+        }
+    
+    def get_category_counts(self) -> Dict[str, int]:
+        """Количество документов по категориям"""
+        return self.vector_db.get_category_counts()
\ No newline at end of file
@@ -0,0 +1,267 @@
+# ====================================
+# ФАЙЛ: backend/services/embedding_backends.py (НОВЫЙ ФАЙЛ)
+# Бэкенды модели эмбеддингов: SentenceTransformer (PyTorch) и ONNX Runtime int8
+# ====================================
+
+"""
+Embedding Backends - Выбор реализации модели эмбеддингов (EMBEDDING_BACKEND)
+
+- sentence_transformers: эталонная модель на PyTorch (поведение по умолчанию)
+- onnx_int8: та же модель, экспортированная в ONNX с динамической int8
+  квантизацией весов, выполняется ONNX Runtime на CPU без PyTorch
+
+Экспорт выполняется один раз (нужны torch и sentence_transformers) и
+сохраняется в EMBEDDING_ONNX_PATH: квантованная модель, tokenizer.json и
+meta.json с параметрами пулинга и эталонными векторами контрольных текстов.
+При загрузке квантованная модель проверяется по этим векторам: если
+косинусная близость ниже допуска, бэкенд не используется. Размерность
+векторов совпадает с эталонной, поэтому коллекцию переиндексировать не нужно.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("sentence_transformers", "onnx_int8")
+
+# Контрольные тексты самопроверки квантованной модели
+SELF_CHECK_TEXTS = [
+    "Стаття 12. Податкова декларація подається протягом сорока календарних днів.",
+    "Орендар зобов'язаний повернути земельну ділянку після закінчення строку договору.",
+    "Рішення суду першої інстанції може бути оскаржене в апеляційному порядку.",
+    "Працівника не може бути звільнено без попередньої згоди профспілкового органу.",
+    "The landlord must give the tenant written notice before terminating the tenancy.",
+    "An application for Irish citizenship by naturalisation is made to the Minister.",
+    "Section 4 applies to contracts of employment entered into after commencement.",
+    "What documents do I need to register a company?"
+]
+
+class EmbeddingBackendError(Exception):
+    """Бэкенд эмбеддингов недоступен или не прошел самопроверку"""
+    pass
+
+def _safe_model_name(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+def cosine_similarities(vectors: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Косинусная близость соответствующих строк двух матриц"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    reference = np.asarray(reference, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+    return np.sum(vectors * reference, axis=1) / np.maximum(norms, 1e-12)
+
+def export_onnx_int8(model_name: str, directory: str, check_texts: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Экспортирует модель SentenceTransformer в ONNX и квантует веса в int8"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+    
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    
+    pooling_modules = [module for module in model if isinstance(module, Pooling)]
+    if not pooling_modules:
+        raise EmbeddingBackendError(f"Model {model_name} has no pooling layer")
+    # sentence-transformers 2.x: get_pooling_mode_str(), новые версии: атрибут pooling_mode
+    pooling = getattr(pooling_modules[0], "pooling_mode", None) or pooling_modules[0].get_pooling_mode_str()
+    if pooling not in ("mean", "cls", "max"):
+        raise EmbeddingBackendError(f"Pooling mode {pooling} is not supported by the ONNX backend")
+    
+    sample = tokenizer(["export sample"], return_tensors="pt", padding=True, truncation=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    
+    class HiddenStates(torch.nn.Module):
+        """Выход трансформера (last_hidden_state); пулинг выполняется в numpy"""
+        
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+        
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)), return_dict=False)[0]
+    
+    fp32_path = os.path.join(directory, "model.fp32.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    export_options = dict(
+        input_names=input_names, output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes, opset_version=14
+    )
+    with torch.no_grad():
+        wrapper = HiddenStates(transformer.auto_model.eval())
+        inputs = tuple(sample[name] for name in input_names)
+        try:
+            torch.onnx.export(wrapper, inputs, fp32_path, dynamo=False, **export_options)
+        except TypeError:
+            # torch < 2.5: параметра dynamo нет, используется TorchScript экспорт
+            torch.onnx.export(wrapper, inputs, fp32_path, **export_options)
+    
+    quantize_dynamic(fp32_path, os.path.join(directory, OnnxEmbeddingModel.MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    tokenizer.save_pretrained(directory)
+    
+    check_texts = check_texts or SELF_CHECK_TEXTS
+    reference = model.encode(check_texts, convert_to_numpy=True, normalize_embeddings=False)
+    meta = {
+        "model_name": model_name,
+        "dimension": int(model.get_sentence_embedding_dimension()),
+        "pooling": pooling,
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "max_seq_length": int(model.max_seq_length),
+        "input_names": input_names,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": int(tokenizer.pad_token_id),
+        "check_texts": check_texts,
+        "reference_embeddings": reference.astype(np.float32).tolist(),
+        "export_seconds": round(time.perf_counter() - start, 2)
+    }
+    with open(os.path.join(directory, OnnxEmbeddingModel.META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    
+    logger.info(f"📦 Exported {model_name} to ONNX int8 in {meta['export_seconds']:.1f}s: {directory}")
+    return meta
+
+class OnnxEmbeddingModel:
+    """Квантованная модель в ONNX Runtime с интерфейсом SentenceTransformer.encode"""
+    
+    MODEL_FILE = "model.int8.onnx"
+    META_FILE = "meta.json"
+    TOKENIZER_FILE = "tokenizer.json"
+    
+    def __init__(self, model_name: str, model_dir: str = "./onnx_models", threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        
+        self.model_name = model_name
+        self.directory = os.path.join(model_dir, _safe_model_name(model_name))
+        meta_path = os.path.join(self.directory, self.META_FILE)
+        if not os.path.exists(meta_path):
+            logger.info(f"🔧 ONNX model for {model_name} not found, exporting to {self.directory}")
+            export_onnx_int8(model_name, self.directory)
+        
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.dimension = self.meta["dimension"]
+        
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.directory, self.TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.meta["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.meta["pad_token_id"], pad_token=self.meta["pad_token"])
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = max(0, threads)  # 0 - все ядра
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(self.directory, self.MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.self_check: Optional[Dict[str, Any]] = None
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+    
+    def encode(self, sentences: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Матрица эмбеддингов (len(sentences), dimension) float32 в порядке sentences"""
+        texts = [str(text).strip() for text in sentences]
+        output = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        
+        # Как SentenceTransformer: пакеты из текстов близкой длины (меньше паддинга)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for batch_start in range(0, len(texts), max(1, batch_size)):
+            rows = order[batch_start:batch_start + batch_size]
+            output[rows] = self._encode_batch([texts[row] for row in rows])
+        
+        if normalize_embeddings:
+            output /= np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+        return output
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: feeds[name] for name in self.meta["input_names"]})[0]
+        
+        pooling = self.meta["pooling"]
+        if pooling == "cls":
+            vectors = hidden[:, 0]
+        elif pooling == "max":
+            vectors = np.where(mask[:, :, None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            weights = mask[:, :, None].astype(np.float32)
+            vectors = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        
+        if self.meta["normalize"]:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.astype(np.float32)
+    
+    def verify(self, tolerance: float) -> Dict[str, Any]:
+        """Сравнивает векторы контрольных текстов с эталонной моделью (сохранены при экспорте)"""
+        reference = np.asarray(self.meta["reference_embeddings"], dtype=np.float32)
+        vectors = self.encode(self.meta["check_texts"])
+        if vectors.shape != reference.shape:
+            raise EmbeddingBackendError(f"ONNX output shape {vectors.shape} != reference {reference.shape}")
+        
+        similarities = cosine_similarities(vectors, reference)
+        self.self_check = {
+            "texts": len(similarities),
+            "min_cosine": round(float(similarities.min()), 5),
+            "mean_cosine": round(float(similarities.mean()), 5),
+            "tolerance": tolerance,
+            "passed": bool(similarities.min() >= tolerance)
+        }
+        return self.self_check
+    
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        # Протокол EmbeddingFunction ChromaDB
+        return self.encode(list(input)).tolist()
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "backend": "onnx_int8",
+            "model": self.model_name,
+            "dimension": self.dimension,
+            "directory": self.directory,
+            "self_check": self.self_check
+        }
+
+def load_embedding_model(backend: str, model_name: str, onnx_dir: str = "./onnx_models",
+                         self_check_tolerance: Optional[float] = None, threads: int = 0):
+    """Модель с методом encode: SentenceTransformer или квантованная ONNX модель"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    
+    if backend == "sentence_transformers":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    
+    model = OnnxEmbeddingModel(model_name, onnx_dir, threads=threads)
+    if self_check_tolerance is not None:
+        check = model.verify(self_check_tolerance)
+        if not check["passed"]:
+            raise EmbeddingBackendError(
+                f"ONNX int8 model {model_name} failed self-check: min cosine {check['min_cosine']} < {self_check_tolerance}"
+            )
+        logger.info(f"✅ ONNX int8 self-check passed: min cosine {check['min_cosine']}, mean {check['mean_cosine']}")
+    return model
+
+def create_embedding_function(backend: str, model_name: str, onnx_dir: str = "./onnx_models",
+                              self_check_tolerance: Optional[float] = None):
+    """Embedding function ChromaDB для выбранного бэкенда"""
+    if backend == "sentence_transformers":
+        # Эталонная реализация ChromaDB (импорт sentence_transformers/torch - только здесь)
+        from chromadb.utils import embedding_functions
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+    return load_embedding_model(backend, model_name, onnx_dir, self_check_tolerance)
@@ -0,0 +1,199 @@
+# ====================================
+# ФАЙЛ: backend/services/embedding_cache.py (НОВЫЙ ФАЙЛ)
+# Дисковый кэш эмбеддингов для ChromaDBService
+# ====================================
+
+"""
+Embedding Cache - Дисковый кэш эмбеддингов, ключ (модель, SHA-256 текста)
+
+Векторы хранятся в append-only файле float32 и читаются через memory-map,
+ключи - в параллельном текстовом файле (одна строка на вектор).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Кэш эмбеддингов на диске для одной модели"""
+    
+    VECTORS_FILE = "vectors.f32"
+    KEYS_FILE = "keys.txt"
+    META_FILE = "meta.json"
+    
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        safe_model_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(cache_dir, safe_model_name)
+        self.vectors_path = os.path.join(self.directory, self.VECTORS_FILE)
+        self.keys_path = os.path.join(self.directory, self.KEYS_FILE)
+        self.meta_path = os.path.join(self.directory, self.META_FILE)
+        
+        self.dimension: Optional[int] = None
+        self._index: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+        # Эмбеддинг выполняется в нескольких потоках (EMBEDDING_WORKERS > 1)
+        self._lock = threading.Lock()
+        
+        # Счетчики
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+    
+    @staticmethod
+    def text_key(text: str) -> str:
+        """Ключ кэша для текста чанка"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _load(self):
+        """Загружает индекс ключей и приводит файлы к согласованному состоянию"""
+        try:
+            if os.path.exists(self.meta_path):
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    self.dimension = json.load(f).get("dimension")
+            
+            if not self.dimension or not os.path.exists(self.keys_path):
+                return
+            
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                keys = [line.strip() for line in f if line.strip()]
+            
+            row_bytes = self.dimension * 4
+            vectors_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            rows = min(len(keys), vectors_size // row_bytes)
+            
+            # После аварийного завершения файлы могут разойтись - обрезаем до общей части
+            if rows != len(keys) or rows * row_bytes != vectors_size:
+                logger.warning(f"Embedding cache {self.directory} was inconsistent, truncating to {rows} rows")
+                keys = keys[:rows]
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(rows * row_bytes)
+                with open(self.keys_path, "w", encoding="utf-8") as f:
+                    f.write("".join(f"{key}\n" for key in keys))
+            
+            self._index = {key: row for row, key in enumerate(keys)}
+            logger.info(f"Embedding cache loaded: {len(self._index)} vectors ({self.model_name})")
+        
+        except Exception as e:
+            logger.error(f"Error loading embedding cache: {e}")
+            self._index = {}
+    
+    def _vectors(self) -> Optional[np.memmap]:
+        """Memory-map файла векторов (переоткрывается после записи)"""
+        if self._mmap is None and self._index and self.dimension:
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._index), self.dimension)
+            )
+        return self._mmap
+    
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Возвращает векторы для текстов (None для промахов)"""
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            vectors = self._vectors()
+            
+            for text in texts:
+                row = self._index.get(self.text_key(text))
+                if row is not None and vectors is not None:
+                    results.append(np.array(vectors[row]))
+                    self.hits += 1
+                else:
+                    results.append(None)
+                    self.misses += 1
+        
+        return results
+    
+    def put_many(self, texts: List[str], vectors: List[Any]):
+        """Дописывает векторы в кэш (fsync векторов до записи ключей)"""
+        with self._lock:
+            new_keys = []
+            new_vectors = []
+            seen = set()
+            
+            for text, vector in zip(texts, vectors):
+                key = self.text_key(text)
+                if key in self._index or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_vectors.append(vector)
+            
+            if not new_keys:
+                return
+            
+            keys_size = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+            try:
+                matrix = np.asarray(new_vectors, dtype=np.float32)
+                
+                if self.dimension is None:
+                    self.dimension = int(matrix.shape[1])
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"model_name": self.model_name, "dimension": self.dimension}, f)
+                elif matrix.shape[1] != self.dimension:
+                    logger.error(f"Embedding dimension mismatch: {matrix.shape[1]} != {self.dimension}")
+                    return
+                
+                # Сначала векторы, потом ключи: ключ без вектора отбросится при загрузке
+                with open(self.vectors_path, "ab") as f:
+                    f.write(matrix.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{key}\n" for key in new_keys))
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                start_row = len(self._index)
+                for offset, key in enumerate(new_keys):
+                    self._index[key] = start_row + offset
+                
+                self._mmap = None
+                self.writes += len(new_keys)
+            
+            except Exception as e:
+                logger.error(f"Error writing embedding cache: {e}")
+                self._rollback(keys_size)
+    
+    def _rollback(self, keys_size: int):
+        """Обрезает файлы до строк индекса после неудачной записи (иначе новые ключи сдвинутся)"""
+        try:
+            vectors_size = len(self._index) * (self.dimension or 0) * 4
+            if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > vectors_size:
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(vectors_size)
+            if os.path.exists(self.keys_path) and os.path.getsize(self.keys_path) > keys_size:
+                with open(self.keys_path, "r+b") as f:
+                    f.truncate(keys_size)
+            self._mmap = None
+        except Exception as e:
+            logger.error(f"Error rolling back embedding cache write: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики кэша для get_stats"""
+        lookups = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "path": self.directory,
+            "entries": len(self._index),
+            "dimension": self.dimension,
+            "size_bytes": len(self._index) * (self.dimension or 0) * 4,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
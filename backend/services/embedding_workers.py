@@ -0,0 +1,151 @@
+# ====================================
+# ФАЙЛ: backend/services/embedding_workers.py (НОВЫЙ ФАЙЛ)
+# Пул процессов для эмбеддингов больших пакетов чанков
+# ====================================
+
+"""
+Embedding Workers - Эмбеддинги на всех ядрах при массовой загрузке
+
+- N процессов, каждый загружает модель один раз (initializer): SentenceTransformer
+  или квантованную ONNX модель (EMBEDDING_BACKEND)
+- Тексты пакета передаются через разделяемую память: UTF-8 байты подряд,
+  процессу передаются только имя блока и смещения строк
+- Векторы float32 процесс пишет прямо в общий выходной блок (строки своего
+  пакета), поэтому результат не сериализуется и не копируется между процессами
+- Потоки torch в каждом процессе ограничены, чтобы процессы не конкурировали за ядра
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Модель процесса-воркера (загружается в _init_worker)
+_worker_model = None
+_worker_batch_size = 32
+
+def _init_worker(model_name: str, batch_size: int, threads: int, backend: str = "sentence_transformers",
+                 onnx_dir: str = "./onnx_models", self_check_tolerance: Optional[float] = None):
+    """Загружает модель один раз на процесс"""
+    global _worker_model, _worker_batch_size
+    if backend == "sentence_transformers":
+        try:
+            import torch
+            torch.set_num_threads(max(1, threads))
+        except ImportError:
+            pass
+    
+    from services.embedding_backends import load_embedding_model
+    _worker_model = load_embedding_model(
+        backend, model_name, onnx_dir, self_check_tolerance=self_check_tolerance, threads=max(1, threads)
+    )
+    _worker_batch_size = batch_size
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Подключается к блоку родителя (удаляет блок только родитель)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # До Python 3.13: spawn-воркеры используют resource_tracker родителя,
+        # повторная регистрация блока в нем ничего не меняет
+        return shared_memory.SharedMemory(name=name)
+
+def _worker_dimension() -> int:
+    return int(_worker_model.get_sentence_embedding_dimension())
+
+def _encode_batch(text_block: str, offsets: List[int], output_block: str, first_row: int, dimension: int) -> int:
+    """Считает эмбеддинги текстов из text_block и пишет их в строки output_block"""
+    source = _attach(text_block)
+    target = _attach(output_block)
+    try:
+        data = bytes(source.buf[:offsets[-1]])
+        texts = [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        vectors = _worker_model.encode(
+            texts, batch_size=_worker_batch_size, convert_to_numpy=True, normalize_embeddings=False
+        )
+        row_bytes = dimension * 4
+        target.buf[first_row * row_bytes:(first_row + len(texts)) * row_bytes] = (
+            np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+        )
+        return len(texts)
+    finally:
+        source.close()
+        target.close()
+
+class EmbeddingProcessPool:
+    """Процессы с моделью эмбеддингов; embed() распределяет пакеты текстов между ними"""
+    
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", workers: int = 2,
+                 chunk_size: int = 256, encode_batch_size: int = 32,
+                 backend: str = "sentence_transformers", onnx_dir: str = "./onnx_models",
+                 self_check_tolerance: Optional[float] = None):
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)  # Текстов в одной задаче воркера
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        
+        # spawn: воркеры не наследуют потоки и состояние torch родителя
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, encode_batch_size, threads, backend, onnx_dir, self_check_tolerance)
+        )
+        self._dimension: Optional[int] = None
+        logger.info(f"🧮 Embedding process pool: {self.workers} workers, model {model_name} ({backend})")
+    
+    @property
+    def dimension(self) -> int:
+        """Размерность векторов модели (первый вызов ждет загрузки модели в воркере)"""
+        if self._dimension is None:
+            self._dimension = self._executor.submit(_worker_dimension).result()
+        return self._dimension
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Матрица эмбеддингов (len(texts), dimension) float32 в порядке texts"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        
+        dimension = self.dimension
+        encoded = [text.encode("utf-8") for text in texts]
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            output = shared_memory.SharedMemory(create=True, size=len(texts) * dimension * 4)
+            blocks.append(output)
+            
+            futures = []
+            for first_row in range(0, len(texts), self.chunk_size):
+                text_block, offsets = self._pack(encoded[first_row:first_row + self.chunk_size])
+                blocks.append(text_block)
+                futures.append(self._executor.submit(
+                    _encode_batch, text_block.name, offsets, output.name, first_row, dimension
+                ))
+            for future in futures:
+                future.result()
+            
+            # Один memcpy из общего блока в память процесса (блок сразу освобождается)
+            return np.ndarray((len(texts), dimension), dtype=np.float32, buffer=output.buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+    
+    @staticmethod
+    def _pack(encoded: List[bytes]) -> Tuple[shared_memory.SharedMemory, List[int]]:
+        """Тексты подряд в одном блоке разделяемой памяти и смещения их границ"""
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        block = shared_memory.SharedMemory(create=True, size=max(1, offsets[-1]))
+        block.buf[:offsets[-1]] = b"".join(encoded)
+        return block, offsets
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,103 @@
+# ====================================
+# ФАЙЛ: backend/services/executor_pools.py (НОВЫЙ ФАЙЛ)
+# Пулы потоков для блокирующих вызовов ChromaDB и модели эмбеддингов
+# ====================================
+
+"""
+Executor Pools - Блокирующая работа выполняется вне event loop
+
+Клиент ChromaDB и SentenceTransformer синхронные: вызов прямо в async методе
+останавливает все остальные запросы процесса (чат, поиск) до его завершения.
+Каждый пул - ThreadPoolExecutor с ограниченным числом потоков; задачи сверх
+него ждут в очереди исполнителя. Для каждого пула считаются глубина очереди,
+число активных задач, время ожидания в очереди и время выполнения.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+class BoundedExecutor:
+    """Пул потоков с метриками очереди и задержек"""
+    
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        
+        # Метрики (обновляются из потоков пула)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "max_queue_depth": 0
+        }
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполняет func(*args, **kwargs) в пуле и ждет результат"""
+        with self._lock:
+            self._queued += 1
+            self.stats["submitted"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queued)
+        
+        future = self._executor.submit(self._call, time.perf_counter(), func, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Задача, отмененная до начала выполнения, уходит из очереди
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+    
+    def _call(self, submitted_at: float, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Выполняется в потоке пула"""
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_times.append(started_at - submitted_at)
+        
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._run_times.append(time.perf_counter() - started_at)
+                self.stats["failed" if failed else "completed"] += 1
+    
+    @property
+    def queue_depth(self) -> int:
+        """Задачи, ожидающие свободный поток"""
+        return self._queued
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики пула (время в миллисекундах)"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            runs = sorted(self._run_times)
+            return {
+                **self.stats,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "average_wait_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "p95_wait_ms": waits[max(0, int(len(waits) * 0.95) - 1)] * 1000 if waits else 0.0,
+                "average_run_ms": sum(runs) / len(runs) * 1000 if runs else 0.0,
+                "p95_run_ms": runs[max(0, int(len(runs) * 0.95) - 1)] * 1000 if runs else 0.0
+            }
@@ -0,0 +1,92 @@
+# ====================================
+# ФАЙЛ: backend/services/lazy_embedding.py (НОВЫЙ ФАЙЛ)
+# Отложенная загрузка модели эмбеддингов
+# ====================================
+
+"""
+Lazy Embedding - Модель загружается при первом вызове или фоновым прогревом
+
+Импорт torch и загрузка SentenceTransformer занимают секунды, поэтому при
+создании сервиса модель не загружается: сервер сразу отвечает на /health,
+а готовность (/ready) выставляется после прогрева. Загрузка выполняется один
+раз, даже если прогрев и первый запрос пришли одновременно.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyEmbeddingFunction:
+    """Embedding function ChromaDB, создающая настоящую функцию при первом вызове"""
+    
+    def __init__(self, factory: Callable[[], Callable[[List[str]], Any]], name: str = "embedding"):
+        self.name = name
+        self._factory = factory
+        self._function: Optional[Callable[[List[str]], Any]] = None
+        self._lock = threading.Lock()
+        self.state = "pending"  # pending | loading | loaded | ready | failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+    
+    def __call__(self, input: List[str]) -> Any:
+        # Имя параметра input требуется протоколом EmbeddingFunction ChromaDB
+        result = self.load()(input)
+        self.state = "ready"
+        return result
+    
+    def load(self) -> Callable[[List[str]], Any]:
+        """Загружает модель (один раз) и возвращает настоящую функцию"""
+        if self._function is not None:
+            return self._function
+        
+        with self._lock:
+            if self._function is None:
+                self.state = "loading"
+                start = time.perf_counter()
+                try:
+                    self._function = self._factory()
+                except Exception as e:
+                    self.state = "failed"
+                    self.error = str(e)
+                    logger.error(f"❌ Embedding model {self.name} failed to load: {e}")
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.state = "loaded"
+                logger.info(f"⏱️ Embedding model {self.name} loaded in {self.load_seconds:.2f}s")
+        return self._function
+    
+    def warm_up(self):
+        """Загружает модель и выполняет первый вызов (инициализация весов и потоков)"""
+        if self.state == "ready":
+            return
+        function = self.load()
+        start = time.perf_counter()
+        function(["warm-up"])
+        self.warmup_seconds = time.perf_counter() - start
+        self.state = "ready"
+        logger.info(f"✅ Embedding model {self.name} is warm (first call {self.warmup_seconds:.2f}s)")
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Состояние загрузки модели"""
+        status = {
+            "model": self.name,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error
+        }
+        # Бэкенд с собственным статусом (ONNX: результат самопроверки)
+        if hasattr(self._function, "get_status"):
+            status["backend"] = self._function.get_status()
+        return status
+    
+    def __repr__(self) -> str:
+        return f"LazyEmbeddingFunction({self.name!r}, state={self.state!r})"
@@ -0,0 +1,184 @@
+# ====================================
+# ФАЙЛ: backend/services/llm_cache.py (НОВЫЙ ФАЙЛ)
+# Кэш ответов LLM для OllamaService
+# ====================================
+
+"""
+LLM Response Cache - Кэш ответов LLM с TTL и ограничением размера
+
+Уровень 1 - память (TTLCache), уровень 2 (опционально) - SQLite,
+чтобы повторяющиеся юридические вопросы переживали перезапуск сервера.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Optional, Any
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """Кэш ответов LLM: ключ - модель, промпт, системный промпт, temperature, max_tokens"""
+    
+    def __init__(self, max_size: int = 100, ttl: int = 3600,
+                 persistent_path: Optional[str] = None, persistent_max_size: int = 5000):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.persistent_path = persistent_path
+        self.persistent_max_size = max(1, persistent_max_size)
+        self._memory = TTLCache(maxsize=self.max_size, ttl=ttl)
+        self._db: Optional[sqlite3.Connection] = None
+        
+        self.stats = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "time_saved_seconds": 0.0
+        }
+        
+        if persistent_path:
+            self._open_db()
+    
+    def _open_db(self):
+        """Открывает SQLite хранилище постоянного уровня"""
+        try:
+            directory = os.path.dirname(os.path.abspath(self.persistent_path))
+            os.makedirs(directory, exist_ok=True)
+            
+            self._db = sqlite3.connect(self.persistent_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    tokens_used INTEGER NOT NULL,
+                    response_time REAL NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at)")
+            self._db.commit()
+            logger.info(f"💾 LLM persistent cache: {self.persistent_path}")
+        except Exception as e:
+            logger.error(f"Failed to open LLM persistent cache: {e}")
+            self._db = None
+    
+    @staticmethod
+    def make_key(model: str, prompt: str, system_prompt: Optional[str],
+                 temperature: float, max_tokens: int) -> str:
+        """Строит ключ кэша из параметров генерации"""
+        raw = json.dumps([model, prompt, system_prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает закэшированный ответ или None"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.stats["memory_hits"] += 1
+            self.stats["time_saved_seconds"] += entry["response_time"]
+            return entry
+        
+        if self._db is not None:
+            try:
+                row = self._db.execute(
+                    "SELECT model, content, tokens_used, response_time FROM llm_cache "
+                    "WHERE key = ? AND created_at >= ?",
+                    (key, time.time() - self.ttl)
+                ).fetchone()
+                
+                if row:
+                    entry = {
+                        "model": row[0],
+                        "content": row[1],
+                        "tokens_used": row[2],
+                        "response_time": row[3]
+                    }
+                    self._memory[key] = entry
+                    self.stats["persistent_hits"] += 1
+                    self.stats["time_saved_seconds"] += entry["response_time"]
+                    return entry
+            except Exception as e:
+                logger.warning(f"LLM persistent cache read failed: {e}")
+        
+        self.stats["misses"] += 1
+        return None
+    
+    def set(self, key: str, model: str, content: str, tokens_used: int, response_time: float):
+        """Сохраняет успешный ответ"""
+        entry = {
+            "model": model,
+            "content": content,
+            "tokens_used": tokens_used,
+            "response_time": response_time
+        }
+        self._memory[key] = entry
+        self.stats["stores"] += 1
+        
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, model, content, tokens_used, response_time, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, content, tokens_used, response_time, time.time())
+                )
+                # Удаляем устаревшие и самые старые записи сверх лимита
+                self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.persistent_max_size,)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"LLM persistent cache write failed: {e}")
+    
+    def clear(self) -> int:
+        """Очищает оба уровня кэша, возвращает количество удаленных записей"""
+        removed = len(self._memory)
+        self._memory.clear()
+        
+        if self._db is not None:
+            try:
+                cursor = self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+                removed = max(removed, cursor.rowcount)
+            except Exception as e:
+                logger.warning(f"LLM persistent cache clear failed: {e}")
+        
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        hits = self.stats["memory_hits"] + self.stats["persistent_hits"]
+        lookups = hits + self.stats["misses"]
+        persistent_size = 0
+        
+        if self._db is not None:
+            try:
+                persistent_size = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            except Exception:
+                pass
+        
+        return {
+            "enabled": True,
+            **self.stats,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persistent": self._db is not None,
+            "persistent_size": persistent_size
+        }
+    
+    def close(self):
+        """Закрывает SQLite соединение"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
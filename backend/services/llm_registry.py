@@ -0,0 +1,207 @@
+# ====================================
+# ФАЙЛ: backend/services/llm_registry.py (НОВЫЙ ФАЙЛ)
+# Фоновый реестр моделей Ollama и circuit breaker
+# ====================================
+
+"""
+Model Registry - Фоновая проверка здоровья Ollama и списка моделей
+
+Проверка выполняется фоновой задачей с экспоненциальной задержкой при ошибках.
+Состояние circuit breaker читается за O(1), поэтому запросы чата не ждут
+проверку здоровья, когда Ollama недоступна.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Any, Set
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Реестр моделей Ollama с circuit breaker"""
+    
+    STATE_UNKNOWN = "unknown"  # Еще не было ни одной проверки
+    STATE_CLOSED = "closed"    # Ollama доступна, запросы проходят
+    STATE_OPEN = "open"        # Ollama недоступна, запросы сразу получают fallback
+    
+    def __init__(self,
+                 probe: Callable[[], Awaitable[Dict[str, Any]]],
+                 pull: Callable[[str], Awaitable[Dict[str, Any]]],
+                 check_interval: float = 30.0,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 300.0,
+                 failure_threshold: int = 3):
+        self._probe = probe
+        self._pull = pull
+        self.check_interval = check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = max(1, failure_threshold)
+        
+        self.state = self.STATE_UNKNOWN
+        self.models: Set[str] = set()
+        self.consecutive_failures = 0  # Неудачные проверки подряд (для backoff)
+        self.request_failures = 0      # Неудачные запросы подряд (для размыкания)
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_check_at: Optional[float] = None
+        self.trips = 0
+        
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._pulls: Dict[str, asyncio.Task] = {}
+    
+    # ====================================
+    # СОСТОЯНИЕ (O(1) для горячего пути)
+    # ====================================
+    
+    def is_open(self) -> bool:
+        """True если запросы к Ollama нужно сразу отклонять"""
+        return self.state == self.STATE_OPEN
+    
+    def is_available(self) -> bool:
+        """True если последняя проверка показала, что Ollama доступна"""
+        return self.state == self.STATE_CLOSED
+    
+    def retry_after(self) -> float:
+        """Секунд до следующей проверки (подсказка для клиентов)"""
+        if self.next_check_at is None:
+            return 0.0
+        return max(0.0, self.next_check_at - time.time())
+    
+    def has_model(self, model: str) -> bool:
+        """Есть ли модель в последнем известном списке"""
+        return model in self.models
+    
+    # ====================================
+    # ОБНОВЛЕНИЕ СОСТОЯНИЯ
+    # ====================================
+    
+    def record_probe(self, available: bool, models: Optional[list] = None, error: Optional[str] = None):
+        """Результат проверки /api/tags"""
+        self.last_check = time.time()
+        
+        if available:
+            if self.state != self.STATE_CLOSED:
+                logger.info(f"🟢 Ollama circuit closed: {len(models or [])} models available")
+            self.state = self.STATE_CLOSED
+            self.models = set(models or [])
+            self.consecutive_failures = 0
+            self.request_failures = 0
+            self.last_error = None
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self._open()
+    
+    def record_success(self):
+        """Успешный запрос генерации"""
+        self.request_failures = 0
+    
+    def record_failure(self, error: str):
+        """Неудачный запрос генерации (соединение, таймаут, 5xx)"""
+        self.request_failures += 1
+        self.last_error = error
+        
+        if self.request_failures >= self.failure_threshold and self.state != self.STATE_OPEN:
+            self._open()
+            # Будим фоновую задачу, чтобы проверка началась с минимальной задержки
+            if self._wake is not None:
+                self._wake.set()
+    
+    def _open(self):
+        """Размыкает circuit breaker и планирует следующую проверку"""
+        if self.state != self.STATE_OPEN:
+            self.trips += 1
+            logger.warning(f"🔴 Ollama circuit opened: {self.last_error}")
+        self.state = self.STATE_OPEN
+        self.next_check_at = time.time() + self._next_delay()
+    
+    def _next_delay(self) -> float:
+        """Интервал проверки: обычный или экспоненциальный backoff после ошибок"""
+        if self.state != self.STATE_OPEN:
+            return self.check_interval
+        failures = max(1, self.consecutive_failures)
+        return min(self.backoff_max, self.backoff_base * (2 ** (failures - 1)))
+    
+    # ====================================
+    # ФОНОВЫЕ ЗАДАЧИ
+    # ====================================
+    
+    def request_pull(self, model: str) -> bool:
+        """Запускает загрузку модели в фоне (не более одной на модель)"""
+        task = self._pulls.get(model)
+        if task is not None and not task.done():
+            return False
+        
+        try:
+            self._pulls[model] = asyncio.get_running_loop().create_task(self._pull_model(model))
+            logger.info(f"📥 Background pull scheduled for model {model}")
+            return True
+        except RuntimeError:
+            return False
+    
+    async def _pull_model(self, model: str):
+        """Загружает модель и добавляет ее в реестр при успехе"""
+        result = await self._pull(model)
+        if result.get("success"):
+            self.models.add(model)
+    
+    def start(self):
+        """Запускает фоновую проверку в текущем event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+        logger.info(f"🔁 Ollama model registry started (interval {self.check_interval}s)")
+    
+    async def stop(self):
+        """Останавливает фоновые задачи"""
+        tasks = [t for t in [self._task, *self._pulls.values()] if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._pulls.clear()
+    
+    async def _run(self):
+        """Цикл проверки здоровья"""
+        while True:
+            try:
+                # Проба сама сообщает результат через record_probe
+                await self._probe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.record_probe(False, error=str(e))
+            
+            delay = self._next_delay()
+            self.next_check_at = time.time() + delay
+            
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                # Разбудили после размыкания - ждем минимальную задержку перед пробой
+                self._wake.clear()
+                delay = self._next_delay()
+                self.next_check_at = time.time() + delay
+                await asyncio.sleep(delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Состояние реестра для мониторинга"""
+        return {
+            "state": self.state,
+            "models": sorted(self.models),
+            "consecutive_failures": self.consecutive_failures,
+            "request_failures": self.request_failures,
+            "trips": self.trips,
+            "last_check": self.last_check,
+            "last_error": self.last_error,
+            "retry_after": self.retry_after(),
+            "background_task_running": self._task is not None and not self._task.done()
+        }
@@ -0,0 +1,171 @@
+# ====================================
+# ФАЙЛ: backend/services/llm_scheduler.py (НОВЫЙ ФАЙЛ)
+# Планировщик запросов генерации к Ollama
+# ====================================
+
+"""
+LLM Scheduler - Ограничение одновременных генераций с очередью и приоритетами
+
+Локальный Ollama обрабатывает несколько генераций одновременно очень медленно,
+поэтому число активных генераций ограничено, а остальные ждут в очереди
+(FIFO внутри приоритета). При переполнении очереди или истечении времени
+ожидания запрос сразу отклоняется с подсказкой Retry-After.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Меньшее значение - более высокий приоритет
+PRIORITY_USER = 0
+PRIORITY_ADMIN = 10
+
+class LLMOverloadedError(Exception):
+    """Запрос отклонен планировщиком (очередь переполнена или истекло время ожидания)"""
+    
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"LLM is overloaded ({reason}), retry after {retry_after:.0f}s")
+    
+    @property
+    def retry_after_header(self) -> str:
+        """Значение заголовка Retry-After (целые секунды)"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+class LLMScheduler:
+    """Ограничивает число одновременных генераций, остальные запросы ставит в очередь"""
+    
+    def __init__(self, max_concurrent: int = 2, max_queue_size: int = 20, queue_timeout: float = 30.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_size = max(0, max_queue_size)
+        self.queue_timeout = queue_timeout
+        
+        self.in_flight = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._waiting = 0  # Ожидающие (без отмененных, которые еще лежат в куче)
+        self._sequence = itertools.count()
+        
+        # Метрики
+        self._wait_times = deque(maxlen=1000)
+        self._service_times = deque(maxlen=100)
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "max_queue_depth": 0
+        }
+    
+    @property
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих слот"""
+        return self._waiting
+    
+    def estimate_wait(self, position: Optional[int] = None) -> float:
+        """Оценка ожидания в секундах по средней длительности генерации"""
+        if position is None:
+            position = self._waiting + 1
+        average = sum(self._service_times) / len(self._service_times) if self._service_times else 5.0
+        return average * math.ceil(position / self.max_concurrent)
+    
+    def check_admission(self):
+        """Быстрая проверка до начала работы: бросает LLMOverloadedError если очередь заполнена"""
+        if self.in_flight >= self.max_concurrent and self._waiting >= self.max_queue_size:
+            self.stats["rejected_queue_full"] += 1
+            raise LLMOverloadedError("queue full", self.estimate_wait())
+    
+    async def acquire(self, priority: int = PRIORITY_USER) -> float:
+        """Занимает слот генерации, возвращает время ожидания в очереди"""
+        if self.in_flight < self.max_concurrent and self._waiting == 0:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            self._wait_times.append(0.0)
+            return 0.0
+        
+        self.check_admission()
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._waiting += 1
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+        
+        start = time.time()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Слот выдан одновременно с таймаутом - используем его
+                pass
+            else:
+                future.cancel()
+                self._waiting -= 1
+                self.stats["rejected_deadline"] += 1
+                logger.warning(f"⏳ LLM request waited {self.queue_timeout}s in queue, rejected")
+                raise LLMOverloadedError("queue timeout", self.estimate_wait())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже передан нам - возвращаем его следующему
+                self.release()
+            else:
+                future.cancel()
+                self._waiting -= 1
+            raise
+        
+        waited = time.time() - start
+        self.stats["admitted"] += 1
+        self._wait_times.append(waited)
+        return waited
+    
+    def release(self, service_time: Optional[float] = None):
+        """Освобождает слот и передает его следующему в очереди"""
+        if service_time is not None:
+            self._service_times.append(service_time)
+        
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            # Слот переходит к ожидающему без уменьшения in_flight
+            self._waiting -= 1
+            future.set_result(True)
+            return
+        
+        self.in_flight -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_USER):
+        """Контекстный менеджер для одной генерации"""
+        await self.acquire(priority)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.release(time.time() - start)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики планировщика"""
+        waits = sorted(self._wait_times)
+        return {
+            **self.stats,
+            "max_concurrent": self.max_concurrent,
+            "max_queue_size": self.max_queue_size,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self._waiting,
+            "rejected_total": self.stats["rejected_queue_full"] + self.stats["rejected_deadline"],
+            "average_wait_time": sum(waits) / len(waits) if waits else 0.0,
+            "p95_wait_time": waits[int(len(waits) * 0.95) - 1] if waits else 0.0,
+            "average_generation_time": (
+                sum(self._service_times) / len(self._service_times) if self._service_times else 0.0
+            )
+        }
@@ -7,14 +7,22 @@
 LLM Service - Сервис для работы с языковыми моделями через Ollama
 """
 
-import aiohttp
 import asyncio
 import logging
 import json
 import time
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Any
 from dataclasses import dataclass
 
+from services.context_packer import ContextPacker
+from services.llm_cache import LLMResponseCache
+from services.llm_registry import ModelRegistry
+from services.llm_scheduler import LLMScheduler, LLMOverloadedError, PRIORITY_USER
+
+# aiohttp импортируется при создании сессии, а не при старте сервера
+if TYPE_CHECKING:
+    import aiohttp
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -26,39 +34,94 @@ class LLMResponse:
     response_time: float
     success: bool
     error: Optional[str] = None
+    cached: bool = False
+    first_token_time: Optional[float] = None  # Время до первого токена (только для стриминга)
+
+@dataclass
+class LLMStreamChunk:
+    """Фрагмент потокового ответа LLM (последний фрагмент содержит итоговый LLMResponse)"""
+    content: str
+    done: bool = False
+    response: Optional[LLMResponse] = None
 
 class OllamaService:
     """Сервис для работы с Ollama"""
     
-    def __init__(self, base_url: str = "http://localhost:11434", default_model: str = "llama3:latest"):
+    def __init__(self, base_url: str = "http://localhost:11434", default_model: str = "llama3:latest",
+                 cache: Optional[LLMResponseCache] = None, pool_size: int = 10,
+                 keepalive_timeout: float = 30.0, request_timeout: float = 120.0,
+                 health_check_interval: float = 30.0, health_backoff_max: float = 300.0,
+                 circuit_failure_threshold: int = 3, scheduler: Optional[LLMScheduler] = None):
         self.base_url = base_url.rstrip('/')
         self.default_model = default_model
         self.session = None
+        self._session_loop = None
         self.available_models = []
         self.service_available = False
+        self.cache = cache
+        self.pool_size = max(1, pool_size)
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        
+        # Ограничение одновременных генераций
+        self.scheduler = scheduler or LLMScheduler()
+        
+        # Состояние доступности Ollama обновляется в фоне, а не на пути запроса
+        self.registry = ModelRegistry(
+            probe=self.check_service_health,
+            pull=self.pull_model,
+            check_interval=health_check_interval,
+            backoff_max=health_backoff_max,
+            failure_threshold=circuit_failure_threshold
+        )
         
         logger.info(f"🤖 Initializing Ollama service: {self.base_url}")
         
-        # НЕ создаем сессию здесь - будем создавать по требованию
+        # НЕ создаем сессию здесь - она создается лениво в том event loop, где будет использоваться
     
     def _create_session(self):
-        """Создает новую HTTP сессию"""
-        timeout = aiohttp.ClientTimeout(total=120, connect=10)
-        return aiohttp.ClientSession(timeout=timeout)
+        """Создает HTTP сессию с пулом keep-alive соединений"""
+        import aiohttp
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout, connect=10)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+    
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Возвращает общую сессию, создавая ее при первом обращении"""
+        loop = asyncio.get_running_loop()
+        
+        if self.session is not None and not self.session.closed and self._session_loop is not loop:
+            # Сессия привязана к другому event loop (например, loop инициализации) - использовать ее нельзя
+            logger.debug("🔄 Ollama session belongs to another event loop, recreating")
+            self.session = None
+        
+        if self.session is None or self.session.closed:
+            self.session = self._create_session()
+            self._session_loop = loop
+            logger.debug(f"🔌 Ollama session created (pool size {self.pool_size})")
+        
+        return self.session
     
     async def check_service_health(self) -> Dict[str, Any]:
         """Проверяет доступность Ollama сервиса"""
-        session = None
+        import aiohttp
+        
         try:
-            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+            session = await self._get_session()
             
-            async with session.get(f"{self.base_url}/api/tags") as response:
+            async with session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=10)) as response:
                 if response.status == 200:
                     data = await response.json()
                     self.available_models = [model["name"] for model in data.get("models", [])]
                     self.service_available = True
+                    self.registry.record_probe(True, self.available_models)
                     
-                    logger.info(f"✅ Ollama service is available with {len(self.available_models)} models")
+                    logger.debug(f"✅ Ollama service is available with {len(self.available_models)} models")
                     
                     return {
                         "available": True,
@@ -68,6 +131,7 @@ class OllamaService:
                     }
                 else:
                     self.service_available = False
+                    self.registry.record_probe(False, error=f"HTTP {response.status}")
                     return {
                         "available": False,
                         "error": f"HTTP {response.status}",
@@ -76,6 +140,7 @@ class OllamaService:
                     
         except aiohttp.ClientConnectorError:
             self.service_available = False
+            self.registry.record_probe(False, error="Connection refused")
             logger.warning("❌ Ollama service not available - connection refused")
             return {
                 "available": False,
@@ -84,26 +149,26 @@ class OllamaService:
             }
         except Exception as e:
             self.service_available = False
+            self.registry.record_probe(False, error=str(e) or type(e).__name__)
             logger.error(f"❌ Error checking Ollama service: {e}")
             return {
                 "available": False,
                 "error": str(e),
                 "base_url": self.base_url
             }
-        finally:
-            # ВАЖНО: Всегда закрываем временную сессию
-            if session and not session.closed:
-                await session.close()
     
     async def pull_model(self, model_name: str) -> Dict[str, Any]:
         """Загружает модель в Ollama"""
-        session = None
+        import aiohttp
+        
         try:
-            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300))  # 5 минут для загрузки
+            session = await self._get_session()
             
             payload = {"name": model_name}
             
-            async with session.post(f"{self.base_url}/api/pull", json=payload) as response:
+            # 5 минут для загрузки
+            async with session.post(f"{self.base_url}/api/pull", json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=300)) as response:
                 if response.status == 200:
                     logger.info(f"✅ Model {model_name} pulled successfully")
                     await self.check_service_health()  # Обновляем список моделей
@@ -116,73 +181,91 @@ class OllamaService:
         except Exception as e:
             logger.error(f"❌ Error pulling model {model_name}: {e}")
             return {"success": False, "error": str(e)}
-        finally:
-            # ВАЖНО: Всегда закрываем временную сессию
-            if session and not session.closed:
-                await session.close()
+    
+    async def _ensure_model(self, model: str) -> Optional[str]:
+        """Проверяет доступность сервиса и модели по реестру, возвращает текст ошибки или None"""
+        # Circuit breaker разомкнут - не ждем таймаута
+        if self.registry.is_open():
+            return f"Ollama service not available (retry in {self.registry.retry_after():.0f}s)"
+        
+        # Модели нет в последнем известном списке - загружаем в фоне, не блокируя запрос
+        if self.registry.is_available() and not self.registry.has_model(model):
+            logger.warning(f"Model {model} not found, scheduling background pull...")
+            self.registry.request_pull(model)
+            return f"Model {model} not available, pull in progress"
+        
+        return None
+    
+    def _build_payload(self, model: str, prompt: str, system_prompt: Optional[str],
+                       temperature: float, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        """Формирует payload для /api/generate"""
+        # УПРОЩЕННЫЙ payload для тестирования
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        
+        # Добавляем options только если нужно
+        if temperature != 0.7 or max_tokens != 1000:
+            payload["options"] = {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        
+        # Добавляем системный промпт если есть
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        return payload
     
     async def generate_response(self, 
                               prompt: str, 
                               model: str = None,
                               system_prompt: str = None,
                               temperature: float = 0.7,
-                              max_tokens: int = 1000) -> LLMResponse:
-        """Генерирует ответ от LLM"""
+                              max_tokens: int = 1000,
+                              priority: int = PRIORITY_USER) -> LLMResponse:
+        """Генерирует ответ от LLM (LLMOverloadedError если планировщик отклонил запрос)"""
+        import aiohttp
         
         model = model or self.default_model
         start_time = time.time()
         
+        # Проверяем кэш ответов
+        cache_key = None
+        if self.cache:
+            cache_key = LLMResponseCache.make_key(model, prompt, system_prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"⚡ LLM response served from cache: {len(cached['content'])} chars")
+                return LLMResponse(
+                    content=cached["content"],
+                    model=cached["model"],
+                    tokens_used=cached["tokens_used"],
+                    response_time=time.time() - start_time,
+                    success=True,
+                    cached=True
+                )
+        
         try:
-            # Проверяем доступность сервиса
-            if not self.service_available:
-                health = await self.check_service_health()
-                if not health["available"]:
-                    return LLMResponse(
-                        content="",
-                        model=model,
-                        tokens_used=0,
-                        response_time=0,
-                        success=False,
-                        error="Ollama service not available"
-                    )
-            
-            # Проверяем наличие модели
-            if model not in self.available_models:
-                logger.warning(f"Model {model} not found, attempting to pull...")
-                pull_result = await self.pull_model(model)
-                if not pull_result["success"]:
-                    return LLMResponse(
-                        content="",
-                        model=model,
-                        tokens_used=0,
-                        response_time=time.time() - start_time,
-                        success=False,
-                        error=f"Model {model} not available and pull failed"
-                    )
+            preflight_error = await self._ensure_model(model)
+            if preflight_error:
+                return LLMResponse(
+                    content="",
+                    model=model,
+                    tokens_used=0,
+                    response_time=time.time() - start_time,
+                    success=False,
+                    error=preflight_error
+                )
             
-            session = self._create_session()  # Создаем новую сессию для каждого запроса
-            
-            # УПРОЩЕННЫЙ payload для тестирования
-            payload = {
-                "model": model,
-                "prompt": prompt,
-                "stream": False
-            }
-            
-            # Добавляем options только если нужно
-            if temperature != 0.7 or max_tokens != 1000:
-                payload["options"] = {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
-            
-            # Добавляем системный промпт если есть
-            if system_prompt:
-                payload["system"] = system_prompt
+            session = await self._get_session()
+            payload = self._build_payload(model, prompt, system_prompt, temperature, max_tokens, stream=False)
             
             logger.debug(f"🤖 Sending request to Ollama: model={model}, prompt_length={len(prompt)}")
             
-            try:
+            async with self.scheduler.slot(priority):
                 async with session.post(f"{self.base_url}/api/generate", json=payload) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -193,6 +276,10 @@ class OllamaService:
                         
                         logger.info(f"✅ LLM response generated: {len(content)} chars, {tokens_used} tokens, {response_time:.2f}s")
                         
+                        self.registry.record_success()
+                        if cache_key and content.strip():
+                            self.cache.set(cache_key, model, content, tokens_used, response_time)
+                        
                         return LLMResponse(
                             content=content,
                             model=model,
@@ -203,6 +290,8 @@ class OllamaService:
                     else:
                         error_text = await response.text()
                         logger.error(f"❌ Ollama API error: {response.status} - {error_text}")
+                        if response.status >= 500:
+                            self.registry.record_failure(f"HTTP {response.status}")
                         
                         return LLMResponse(
                             content="",
@@ -212,13 +301,12 @@ class OllamaService:
                             success=False,
                             error=f"API error: {response.status}"
                         )
-            finally:
-                # ВАЖНО: Всегда закрываем сессию после запроса
-                if session and not session.closed:
-                    await session.close()
-                    
+        
+        except LLMOverloadedError:
+            raise
         except asyncio.TimeoutError:
             logger.error("❌ Ollama request timeout")
+            self.registry.record_failure("Request timeout")
             return LLMResponse(
                 content="",
                 model=model,
@@ -229,6 +317,8 @@ class OllamaService:
             )
         except Exception as e:
             logger.error(f"❌ Error generating LLM response: {e}")
+            if isinstance(e, aiohttp.ClientError):
+                self.registry.record_failure(str(e))
             return LLMResponse(
                 content="",
                 model=model,
@@ -238,16 +328,153 @@ class OllamaService:
                 error=str(e)
             )
     
+    async def stream_response(self,
+                              prompt: str,
+                              model: str = None,
+                              system_prompt: str = None,
+                              temperature: float = 0.7,
+                              max_tokens: int = 1000,
+                              priority: int = PRIORITY_USER) -> AsyncIterator[LLMStreamChunk]:
+        """Генерирует ответ потоком токенов (NDJSON поток Ollama)"""
+        import aiohttp
+        
+        model = model or self.default_model
+        start_time = time.time()
+        
+        def final_chunk(content: str, tokens_used: int = 0, error: str = None,
+                        first_token_time: float = None, cached: bool = False) -> LLMStreamChunk:
+            return LLMStreamChunk(
+                content="",
+                done=True,
+                response=LLMResponse(
+                    content=content,
+                    model=model,
+                    tokens_used=tokens_used,
+                    response_time=time.time() - start_time,
+                    success=error is None,
+                    error=error,
+                    cached=cached,
+                    first_token_time=first_token_time
+                )
+            )
+        
+        # Закэшированный ответ отдаем одним фрагментом
+        cache_key = None
+        if self.cache:
+            cache_key = LLMResponseCache.make_key(model, prompt, system_prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"⚡ LLM stream served from cache: {len(cached['content'])} chars")
+                yield LLMStreamChunk(content=cached["content"])
+                yield final_chunk(cached["content"], cached["tokens_used"],
+                                  first_token_time=time.time() - start_time, cached=True)
+                return
+        
+        parts: List[str] = []
+        tokens_used = 0
+        first_token_time = None
+        
+        try:
+            preflight_error = await self._ensure_model(model)
+            if preflight_error:
+                yield final_chunk("", error=preflight_error)
+                return
+            
+            session = await self._get_session()
+            payload = self._build_payload(model, prompt, system_prompt, temperature, max_tokens, stream=True)
+            
+            logger.debug(f"🤖 Streaming request to Ollama: model={model}, prompt_length={len(prompt)}")
+            
+            async with self.scheduler.slot(priority):
+                async with session.post(f"{self.base_url}/api/generate", json=payload) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"❌ Ollama API error: {response.status} - {error_text}")
+                        if response.status >= 500:
+                            self.registry.record_failure(f"HTTP {response.status}")
+                        yield final_chunk("", error=f"API error: {response.status}")
+                        return
+                    
+                    # Каждая строка потока - отдельный JSON объект
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(data["error"])
+                        
+                        token = data.get("response", "")
+                        if token:
+                            if first_token_time is None:
+                                first_token_time = time.time() - start_time
+                            parts.append(token)
+                            yield LLMStreamChunk(content=token)
+                        
+                        if data.get("done"):
+                            tokens_used = data.get("eval_count", 0)
+                            break
+            
+            self.registry.record_success()
+            content = "".join(parts)
+            logger.info(f"✅ LLM stream completed: {len(content)} chars, {tokens_used} tokens, "
+                        f"TTFT {first_token_time or 0:.2f}s, total {time.time() - start_time:.2f}s")
+            
+            if cache_key and content.strip():
+                self.cache.set(cache_key, model, content, tokens_used, time.time() - start_time)
+            
+            yield final_chunk(content, tokens_used, first_token_time=first_token_time)
+        
+        except LLMOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            logger.error("❌ Ollama stream timeout")
+            self.registry.record_failure("Request timeout")
+            yield final_chunk("".join(parts), tokens_used, "Request timeout", first_token_time)
+        except Exception as e:
+            logger.error(f"❌ Error streaming LLM response: {e}")
+            if isinstance(e, aiohttp.ClientError):
+                self.registry.record_failure(str(e))
+            yield final_chunk("".join(parts), tokens_used, str(e), first_token_time)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Статистика кэша ответов"""
+        if not self.cache:
+            return {"enabled": False}
+        return self.cache.get_stats()
+    
+    def clear_cache(self) -> int:
+        """Очищает кэш ответов"""
+        if not self.cache:
+            return 0
+        return self.cache.clear()
+    
+    async def close_session(self):
+        """Закрывает общую HTTP сессию (следующий запрос откроет новую)"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self._session_loop = None
+    
+    def start_background_tasks(self):
+        """Запускает фоновую проверку здоровья (нужен работающий event loop)"""
+        self.registry.start()
+    
     async def close(self):
         """Закрывает HTTP сессию"""
-        # Не нужно закрывать сессию, так как создаем новую для каждого запроса
+        await self.registry.stop()
+        await self.close_session()
+        if self.cache:
+            self.cache.close()
         logger.debug("🔒 Ollama service cleanup completed")
 
 class LegalAssistantLLM:
     """Основной сервис Legal Assistant с промптами для юридических запросов"""
     
-    def __init__(self, ollama_service: OllamaService):
+    def __init__(self, ollama_service: OllamaService, context_token_budget: int = 4000):
         self.ollama = ollama_service
+        self.context_packer = ContextPacker(token_budget=context_token_budget)
         self.system_prompts = {
             "en": """You are a helpful legal assistant specializing in Irish and Ukrainian law. 
 Your task is to provide accurate, helpful answers based on the provided legal documents.
@@ -278,28 +505,83 @@ Guidelines:
                                   language: str = "en") -> LLMResponse:
         """Отвечает на юридический вопрос на основе контекста"""
         
-        # УПРОЩЕННЫЙ контекст - берем только первый документ и обрезаем
+        # Ollama недоступна - сразу отдаем ошибку, чтобы чат вернул fallback
+        if self.ollama.registry.is_open():
+            return self._circuit_open_response()
+        
+        prompt = self._build_prompt(question, context_documents, language)
+        
+        # Системный промпт неизменен между запросами - Ollama переиспользует его KV-кэш
+        response = await self.ollama.generate_response(
+            prompt=prompt,
+            system_prompt=self._system_prompt(language),
+            temperature=0.1,  # Очень низкая температура
+            max_tokens=200    # Сильно ограничиваем длину ответа
+        )
+        
+        return response
+    
+    async def stream_legal_answer(self,
+                                  question: str,
+                                  context_documents: List[Dict[str, Any]],
+                                  language: str = "en") -> AsyncIterator[LLMStreamChunk]:
+        """Потоковый вариант answer_legal_question"""
+        if self.ollama.registry.is_open():
+            yield LLMStreamChunk(content="", done=True, response=self._circuit_open_response())
+            return
+        
+        prompt = self._build_prompt(question, context_documents, language)
+        
+        async for chunk in self.ollama.stream_response(
+            prompt=prompt,
+            system_prompt=self._system_prompt(language),
+            temperature=0.1,
+            max_tokens=200
+        ):
+            yield chunk
+    
+    def _circuit_open_response(self) -> LLMResponse:
+        """Ответ без обращения к Ollama при разомкнутом circuit breaker"""
+        return LLMResponse(
+            content="",
+            model=self.ollama.default_model,
+            tokens_used=0,
+            response_time=0,
+            success=False,
+            error=f"Ollama service not available (retry in {self.ollama.registry.retry_after():.0f}s)"
+        )
+    
+    def is_available(self) -> bool:
+        """Доступность Ollama по последней фоновой проверке (O(1))"""
+        return self.ollama.registry.is_available()
+    
+    def start_background_tasks(self):
+        """Запускает фоновые задачи сервиса"""
+        self.ollama.start_background_tasks()
+    
+    def _system_prompt(self, language: str) -> str:
+        """Системный промпт для языка"""
+        return self.system_prompts.get(language, self.system_prompts["en"])
+    
+    def _build_prompt(self, question: str, context_documents: List[Dict[str, Any]], language: str) -> str:
+        """Формирует промпт для юридического вопроса"""
+        # Контекст из нескольких фрагментов в пределах бюджета токенов
         if context_documents:
-            first_doc = context_documents[0]
-            content = first_doc.get("content", "")
+            packed = self.context_packer.pack(context_documents)
+            logger.debug(f"📦 Context packed: {len(packed.chunks)} chunks, ~{packed.tokens} tokens, "
+                         f"{packed.skipped_duplicates} duplicates skipped")
             
-            # СИЛЬНО обрезаем контекст - максимум 500 символов
-            if len(content) > 500:
-                content = content[:500] + "..."
-            
-            filename = first_doc.get("filename", "Document")
-            
-            # КРАТКИЙ промпт без лишних инструкций
+            # Вопрос в конце - начало промпта совпадает для одинакового набора источников
             if language == "uk":
-                prompt = f"""Документ: {filename}
-Контекст: {content}
+                prompt = f"""Документи:
+{packed.text}
 
 Питання: {question}
 
 Коротка відповідь:"""
             else:
-                prompt = f"""Document: {filename}
-Context: {content}
+                prompt = f"""Documents:
+{packed.text}
 
 Question: {question}
 
@@ -311,15 +593,7 @@ Brief answer:"""
             else:
                 prompt = f"Question: {question}\nBrief answer:"
         
-        # Убираем системный промпт для упрощения
-        response = await self.ollama.generate_response(
-            prompt=prompt,
-            system_prompt=None,  # Убираем системный промпт
-            temperature=0.1,  # Очень низкая температура
-            max_tokens=200    # Сильно ограничиваем длину ответа
-        )
-        
-        return response
+        return prompt
     
     async def get_service_status(self) -> Dict[str, Any]:
         """Возвращает статус LLM сервиса"""
@@ -332,6 +606,8 @@ Brief answer:"""
             "base_url": self.ollama.base_url,
             "system_prompts_loaded": len(self.system_prompts),
             "supported_languages": list(self.system_prompts.keys()),
+            "circuit_breaker": self.ollama.registry.get_stats(),
+            "scheduler": self.ollama.scheduler.get_stats(),
             "error": health.get("error")
         }
     
@@ -341,7 +617,46 @@ Brief answer:"""
 
 # Фабричная функция для создания сервиса
 def create_llm_service(ollama_url: str = "http://localhost:11434", 
-                      model: str = "llama3:latest") -> LegalAssistantLLM:
+                      model: str = "llama3:latest",
+                      cache_enabled: bool = False,
+                      cache_ttl: int = 3600,
+                      cache_max_size: int = 100,
+                      cache_persistent_path: Optional[str] = None,
+                      cache_persistent_max_size: int = 5000,
+                      pool_size: int = 10,
+                      keepalive_timeout: float = 30.0,
+                      request_timeout: float = 120.0,
+                      health_check_interval: float = 30.0,
+                      health_backoff_max: float = 300.0,
+                      circuit_failure_threshold: int = 3,
+                      max_concurrent_requests: int = 2,
+                      queue_max_size: int = 20,
+                      queue_timeout: float = 30.0,
+                      context_token_budget: int = 4000) -> LegalAssistantLLM:
     """Создает и настраивает LLM сервис"""
-    ollama_service = OllamaService(base_url=ollama_url, default_model=model)
-    return LegalAssistantLLM(ollama_service)
\ No newline at end of file
+    cache = None
+    if cache_enabled:
+        cache = LLMResponseCache(
+            max_size=cache_max_size,
+            ttl=cache_ttl,
+            persistent_path=cache_persistent_path,
+            persistent_max_size=cache_persistent_max_size
+        )
+    
+    ollama_service = OllamaService(
+        base_url=ollama_url,
+        default_model=model,
+        cache=cache,
+        pool_size=pool_size,
+        keepalive_timeout=keepalive_timeout,
+        request_timeout=request_timeout,
+        health_check_interval=health_check_interval,
+        health_backoff_max=health_backoff_max,
+        circuit_failure_threshold=circuit_failure_threshold,
+        scheduler=LLMScheduler(
+            max_concurrent=max_concurrent_requests,
+            max_queue_size=queue_max_size,
+            queue_timeout=queue_timeout
+        )
+    )
+    return LegalAssistantLLM(ollama_service, context_token_budget=context_token_budget)
\ No newline at end of file
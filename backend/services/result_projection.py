@@ -0,0 +1,71 @@
+# ====================================
+# ФАЙЛ: backend/services/result_projection.py (НОВЫЙ ФАЙЛ)
+# Выбор полей результатов поиска и документов
+# ====================================
+
+"""
+Result Projection - Клиент выбирает, какие поля нужны в ответе
+
+- snippet: фрагмент с подсветкой (content, highlights)
+- full_content: полный текст найденного документа/чанка
+- metadata: метаданные документа
+
+По умолчанию полный текст не передается; он читается по частям через
+/documents/{doc_id} с параметрами offset/length.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+RESULT_FIELDS = ("snippet", "full_content", "metadata")
+DEFAULT_RESULT_FIELDS = ("snippet", "metadata")
+
+# Ключи результата, которые относятся к каждому полю
+_FIELD_KEYS = {
+    "snippet": ("content", "highlights"),
+    "full_content": ("full_content",),
+    "metadata": ("metadata",)
+}
+
+# Длина превью документа в списке документов
+PREVIEW_LENGTH = 300
+
+def parse_fields(fields: Optional[Union[str, Iterable[str]]]) -> Tuple[str, ...]:
+    """Нормализует список полей ("snippet,metadata" или список); ValueError для неизвестных"""
+    if fields is None:
+        return DEFAULT_RESULT_FIELDS
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    
+    requested = tuple(dict.fromkeys(field.strip() for field in fields if field and field.strip()))
+    if not requested:
+        return DEFAULT_RESULT_FIELDS
+    
+    unknown = [field for field in requested if field not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Allowed: {list(RESULT_FIELDS)}")
+    return requested
+
+def project_result(result: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Копия результата без ключей невыбранных полей"""
+    excluded = {key for field, keys in _FIELD_KEYS.items() if field not in fields for key in keys}
+    return {key: value for key, value in result.items() if key not in excluded}
+
+def preview(content: str, length: int = PREVIEW_LENGTH) -> str:
+    """Начало документа для списков (по границе слова)"""
+    if len(content) <= length:
+        return content
+    cut = content[:length]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > length // 2 else cut).rstrip() + "..."
+
+def slice_content(content: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """Часть текста документа для постраничного чтения"""
+    total = len(content)
+    offset = max(0, min(offset, total))
+    end = total if length is None else min(total, offset + max(0, length))
+    return {
+        "content": content[offset:end],
+        "content_offset": offset,
+        "total_length": total,
+        "has_more": end < total
+    }
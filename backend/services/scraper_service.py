@@ -10,10 +10,9 @@
 
 import asyncio
 import time
-import aiohttp
 import ssl
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 import logging
 import re
 from urllib.parse import urlparse, urljoin, quote, unquote
@@ -21,6 +20,10 @@ from pathlib import Path
 import json
 import hashlib
 
+# aiohttp импортируется при первом запросе, а не при старте сервера
+if TYPE_CHECKING:
+    import aiohttp
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -87,7 +90,7 @@ class LegalSiteScraper:
     """Профессиональный скрапер для юридических сайтов"""
     
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional["aiohttp.ClientSession"] = None
         self.legal_sites_config = self._initialize_site_configs()
         self.demo_mode = False
         self.stats = {
@@ -190,6 +193,8 @@ class LegalSiteScraper:
     
     async def _ensure_session(self):
         """Обеспечивает наличие активной сессии"""
+        import aiohttp
+        
         if not self.session or self.session.closed:
             # Настройки SSL для обхода проблем с сертификатами
             ssl_context = ssl.create_default_context()
@@ -341,6 +346,8 @@ class LegalSiteScraper:
     
     async def _fetch_url(self, url: str, site_config: SiteConfig) -> Optional[Dict]:
         """Выполняет HTTP запрос к URL"""
+        import aiohttp
+        
         try:
             headers = {
                 **self.session.headers,
@@ -395,7 +402,7 @@ class LegalSiteScraper:
             logger.error(f"Error fetching {url}: {e}")
             return None
     
-    def _detect_encoding(self, response: aiohttp.ClientResponse, default: str = "utf-8") -> str:
+    def _detect_encoding(self, response: "aiohttp.ClientResponse", default: str = "utf-8") -> str:
         """Определяет кодировку ответа"""
         # Проверяем заголовок Content-Type
         content_type = response.headers.get('content-type', '').lower()
@@ -768,6 +775,8 @@ pip install aiohttp beautifulsoup4
     
     async def validate_url(self, url: str) -> Dict:
         """Валидирует URL перед парсингом"""
+        import aiohttp
+        
         validation_result = {
             "url": url,
             "valid": False,
@@ -824,6 +833,8 @@ pip install aiohttp beautifulsoup4
     
     async def get_site_info(self, url: str) -> Dict:
         """Получает информацию о сайте без полного парсинга"""
+        import aiohttp
+        
         try:
             await self._ensure_session()
             
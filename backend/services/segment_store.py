@@ -0,0 +1,428 @@
+# ====================================
+# ФАЙЛ: backend/services/segment_store.py (НОВЫЙ ФАЙЛ)
+# Append-only хранилище документов для SimpleVectorDB
+# ====================================
+
+"""
+Segment Store - Журнал записей документов с индексом id → смещение
+
+- Каждая запись (put/delete) дописывается в конец активного сегмента и сбрасывается
+  на диск через fsync, поэтому сбой во время записи портит только хвост журнала
+- Индекс (id → сегмент, смещение, длина + краткие метаданные) сохраняется атомарно
+  (временный файл + os.replace); при старте читается только индекс и хвост журнала
+  после последней контрольной точки
+- Полные документы читаются лениво из memory-mapped сегментов
+- Компакция переписывает живые записи в новые сегменты, когда доля мертвых байт велика
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Заголовок записи: magic, операция, длина payload, crc32 payload
+_RECORD_HEADER = struct.Struct("<4sBII")
+_RECORD_MAGIC = b"SVR1"
+_OP_PUT = 1
+_OP_DELETE = 2
+
+_SEGMENT_NAME_RE = re.compile(r"^segment-(\d{6})\.log$")
+_INDEX_VERSION = 1
+
+class SegmentStore:
+    """Append-only хранилище JSON записей с ленивым чтением через mmap"""
+    
+    def __init__(self,
+                 directory: str,
+                 summarize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 max_segment_size: int = 64 * 1024 * 1024,
+                 compaction_ratio: float = 0.5,
+                 compaction_min_bytes: int = 1024 * 1024,
+                 index_flush_interval: int = 64,
+                 fsync: bool = True):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        self._summarize = summarize or (lambda record: {})
+        self.max_segment_size = max_segment_size
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+        self.index_flush_interval = max(1, index_flush_interval)
+        self.fsync = fsync
+        
+        # id → [номер сегмента, смещение записи, длина записи, метаданные]
+        self.entries: Dict[str, list] = {}
+        # номер сегмента → {"size": ..., "dead": ...}
+        self.segments: Dict[int, Dict[str, int]] = {}
+        self.active_segment = 0
+        
+        self._writer = None
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files: Dict[int, Any] = {}
+        self._unflushed = 0
+        self._lock = threading.RLock()
+        self.stats = {
+            "writes": 0,
+            "reads": 0,
+            "compactions": 0,
+            "recovered_records": 0,
+            "truncated_bytes": 0
+        }
+        
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+    
+    # ====================================
+    # ОТКРЫТИЕ И ВОССТАНОВЛЕНИЕ
+    # ====================================
+    
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.log")
+    
+    def _open(self):
+        """Загружает индекс и дочитывает хвост активного сегмента"""
+        checkpoint = 0
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.active_segment = index["active_segment"]
+            self.segments = {int(k): v for k, v in index["segments"].items()}
+            self.entries = index["entries"]
+            checkpoint = index["checkpoint"]
+        else:
+            self.active_segment = 1
+            self.segments = {1: {"size": 0, "dead": 0}}
+        
+        self._remove_orphan_segments()
+        
+        # Записи, добавленные после последнего сохранения индекса
+        recovered = self._replay(self.active_segment, checkpoint)
+        if recovered:
+            self.stats["recovered_records"] = recovered
+            logger.info(f"🔁 Segment store recovered {recovered} records after last checkpoint")
+        
+        self._writer = open(self._segment_path(self.active_segment), "ab")
+        if recovered or not os.path.exists(self.index_file):
+            self._save_index()
+    
+    def _remove_orphan_segments(self):
+        """Удаляет сегменты, не попавшие в индекс (прерванная компакция)"""
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME_RE.match(name)
+            if match and int(match.group(1)) not in self.segments:
+                os.remove(os.path.join(self.directory, name))
+                logger.warning(f"🧹 Removed orphan segment {name}")
+    
+    def _replay(self, segment: int, offset: int) -> int:
+        """Применяет записи сегмента начиная с offset, обрезает поврежденный хвост"""
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            self.segments[segment]["size"] = 0
+            return 0
+        
+        recovered = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                position = f.tell()
+                header = f.read(_RECORD_HEADER.size)
+                if not header:
+                    break
+                
+                record = None
+                if len(header) == _RECORD_HEADER.size:
+                    magic, op, length, crc = _RECORD_HEADER.unpack(header)
+                    payload = f.read(length)
+                    if magic == _RECORD_MAGIC and len(payload) == length and zlib.crc32(payload) == crc:
+                        record = (op, json.loads(payload.decode("utf-8")))
+                
+                if record is None:
+                    # Недописанная запись после сбоя - отбрасываем хвост
+                    size = os.path.getsize(path)
+                    self.stats["truncated_bytes"] = size - position
+                    logger.warning(f"⚠️ Truncating {size - position} corrupt bytes at end of {path}")
+                    f.close()
+                    with open(path, "r+b") as tail:
+                        tail.truncate(position)
+                    break
+                
+                op, data = record
+                self._apply(op, data, segment, position, f.tell() - position)
+                recovered += 1
+        
+        self.segments[segment]["size"] = os.path.getsize(path)
+        return recovered
+    
+    def _apply(self, op: int, data: Dict[str, Any], segment: int, offset: int, length: int):
+        """Обновляет индекс после записи"""
+        doc_id = data["id"]
+        previous = self.entries.pop(doc_id, None)
+        if previous is not None:
+            self.segments[previous[0]]["dead"] += previous[2]
+        
+        if op == _OP_PUT:
+            self.entries[doc_id] = [segment, offset, length, self._summarize(data)]
+        else:
+            # Сам tombstone тоже мертвый сразу после записи
+            self.segments[segment]["dead"] += length
+    
+    def _save_index(self):
+        """Атомарно сохраняет индекс (контрольная точка)"""
+        index = {
+            "version": _INDEX_VERSION,
+            "active_segment": self.active_segment,
+            "checkpoint": self.segments[self.active_segment]["size"],
+            "segments": {str(k): v for k, v in self.segments.items()},
+            "entries": self.entries
+        }
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_file)
+        self._unflushed = 0
+    
+    # ====================================
+    # ЗАПИСЬ
+    # ====================================
+    
+    def _append(self, op: int, data: Dict[str, Any], sync: bool = True):
+        """Дописывает запись в активный сегмент (sync=False - fsync делает вызывающий)"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        record = _RECORD_HEADER.pack(_RECORD_MAGIC, op, len(payload), zlib.crc32(payload)) + payload
+        
+        if self.segments[self.active_segment]["size"] and \
+                self.segments[self.active_segment]["size"] + len(record) > self.max_segment_size:
+            self._roll_segment()
+        
+        offset = self.segments[self.active_segment]["size"]
+        self._writer.write(record)
+        self._writer.flush()
+        if self.fsync and sync:
+            os.fsync(self._writer.fileno())
+        
+        self.segments[self.active_segment]["size"] += len(record)
+        self._apply(op, data, self.active_segment, offset, len(record))
+        self.stats["writes"] += 1
+        
+        self._unflushed += 1
+        if self._unflushed >= self.index_flush_interval:
+            self._save_index()
+    
+    def _roll_segment(self):
+        """Закрывает активный сегмент и начинает новый"""
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+        self._writer.close()
+        self.active_segment = max(self.segments) + 1
+        self.segments[self.active_segment] = {"size": 0, "dead": 0}
+        self._writer = open(self._segment_path(self.active_segment), "ab")
+        self._save_index()
+    
+    def put(self, record: Dict[str, Any]):
+        """Сохраняет запись (вставка или замена по record['id'])"""
+        with self._lock:
+            self._append(_OP_PUT, record)
+            self._maybe_compact()
+    
+    def delete(self, doc_id: str) -> bool:
+        """Удаляет запись, возвращает False если ее не было"""
+        with self._lock:
+            if doc_id not in self.entries:
+                return False
+            self._append(_OP_DELETE, {"id": doc_id})
+            self._maybe_compact()
+            return True
+    
+    def delete_many(self, doc_ids: List[str]) -> List[str]:
+        """Удаляет несколько записей с одним fsync, возвращает ID удаленных"""
+        with self._lock:
+            deleted = []
+            for doc_id in dict.fromkeys(doc_ids):
+                if doc_id in self.entries:
+                    self._append(_OP_DELETE, {"id": doc_id}, sync=False)
+                    deleted.append(doc_id)
+            if deleted and self.fsync:
+                os.fsync(self._writer.fileno())
+            self._maybe_compact()
+            return deleted
+    
+    # ====================================
+    # ЧТЕНИЕ
+    # ====================================
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def ids(self) -> List[str]:
+        """ID всех живых записей"""
+        return list(self.entries)
+    
+    def get_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Краткие метаданные из индекса без чтения сегмента"""
+        entry = self.entries.get(doc_id)
+        return entry[3] if entry else None
+    
+    def summaries(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(id, краткие метаданные) всех записей из индекса"""
+        for doc_id, entry in list(self.entries.items()):
+            yield doc_id, entry[3]
+    
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Читает полную запись из сегмента"""
+        with self._lock:
+            entry = self.entries.get(doc_id)
+            if entry is None:
+                return None
+            segment, offset, length, _ = entry
+            data = self._map(segment, offset + length)[offset + _RECORD_HEADER.size:offset + length]
+            self.stats["reads"] += 1
+            return json.loads(data.decode("utf-8"))
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Полные записи в порядке расположения в сегментах (последовательное чтение)"""
+        with self._lock:
+            order = sorted(self.entries, key=lambda doc_id: self.entries[doc_id][:2])
+        for doc_id in order:
+            record = self.get(doc_id)
+            if record is not None:
+                yield record
+    
+    def _map(self, segment: int, required: int) -> mmap.mmap:
+        """mmap сегмента; активный сегмент переотображается, если вырос"""
+        mapped = self._maps.get(segment)
+        if mapped is not None and len(mapped) >= required:
+            return mapped
+        
+        if mapped is not None:
+            mapped.close()
+        handle = self._files.get(segment)
+        if handle is None:
+            handle = open(self._segment_path(segment), "rb")
+            self._files[segment] = handle
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = mapped
+        return mapped
+    
+    def _unmap(self, segment: int):
+        mapped = self._maps.pop(segment, None)
+        if mapped is not None:
+            mapped.close()
+        handle = self._files.pop(segment, None)
+        if handle is not None:
+            handle.close()
+    
+    # ====================================
+    # КОМПАКЦИЯ
+    # ====================================
+    
+    def _dead_bytes(self) -> Tuple[int, int]:
+        total = sum(s["size"] for s in self.segments.values())
+        dead = sum(s["dead"] for s in self.segments.values())
+        return dead, total
+    
+    def _maybe_compact(self):
+        dead, total = self._dead_bytes()
+        if dead >= self.compaction_min_bytes and total and dead / total >= self.compaction_ratio:
+            self.compact()
+    
+    def compact(self) -> Dict[str, int]:
+        """Переписывает живые записи в новые сегменты и удаляет старые"""
+        with self._lock:
+            dead_before, total_before = self._dead_bytes()
+            old_segments = list(self.segments)
+            next_segment = max(self.segments) + 1
+            
+            new_entries: Dict[str, list] = {}
+            new_segments: Dict[int, Dict[str, int]] = {next_segment: {"size": 0, "dead": 0}}
+            writer = open(self._segment_path(next_segment), "wb")
+            try:
+                order = sorted(self.entries.items(), key=lambda item: item[1][:2])
+                for doc_id, (segment, offset, length, summary) in order:
+                    record = self._map(segment, offset + length)[offset:offset + length]
+                    if new_segments[next_segment]["size"] and \
+                            new_segments[next_segment]["size"] + length > self.max_segment_size:
+                        self._close_writer(writer)
+                        next_segment += 1
+                        new_segments[next_segment] = {"size": 0, "dead": 0}
+                        writer = open(self._segment_path(next_segment), "wb")
+                    
+                    new_entries[doc_id] = [next_segment, new_segments[next_segment]["size"], length, summary]
+                    writer.write(record)
+                    new_segments[next_segment]["size"] += length
+            finally:
+                self._close_writer(writer)
+            
+            # Переключаемся на новые сегменты: сначала индекс, затем удаление старых файлов
+            self._writer.close()
+            for segment in old_segments:
+                self._unmap(segment)
+            
+            self.entries = new_entries
+            self.segments = new_segments
+            self.active_segment = next_segment
+            self._writer = open(self._segment_path(self.active_segment), "ab")
+            self._save_index()
+            
+            for segment in old_segments:
+                try:
+                    os.remove(self._segment_path(segment))
+                except FileNotFoundError:
+                    pass
+            
+            _, total_after = self._dead_bytes()
+            self.stats["compactions"] += 1
+            logger.info(f"🗜️ Segment store compacted: {total_before} → {total_after} bytes "
+                        f"({dead_before} dead bytes reclaimed)")
+            return {"bytes_before": total_before, "bytes_after": total_after, "live_records": len(self.entries)}
+    
+    def _close_writer(self, writer):
+        writer.flush()
+        if self.fsync:
+            os.fsync(writer.fileno())
+        writer.close()
+    
+    # ====================================
+    # ОБСЛУЖИВАНИЕ
+    # ====================================
+    
+    def flush(self):
+        """Сохраняет индекс, если есть несохраненные записи"""
+        with self._lock:
+            if self._unflushed:
+                self._save_index()
+    
+    def close(self):
+        """Сохраняет индекс и закрывает файлы"""
+        with self._lock:
+            if self._writer is None:
+                return
+            self._save_index()
+            self._writer.close()
+            self._writer = None
+            for segment in list(self._maps) + list(self._files):
+                self._unmap(segment)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Размеры сегментов и счетчики операций"""
+        dead, total = self._dead_bytes()
+        return {
+            **self.stats,
+            "records": len(self.entries),
+            "segments": len(self.segments),
+            "active_segment": self.active_segment,
+            "total_bytes": total,
+            "dead_bytes": dead,
+            "dead_ratio": dead / total if total else 0.0
+        }
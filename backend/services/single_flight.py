@@ -0,0 +1,54 @@
+# ====================================
+# ФАЙЛ: backend/services/single_flight.py (НОВЫЙ ФАЙЛ)
+# Объединение одинаковых одновременных запросов
+# ====================================
+
+"""
+Single Flight - Одновременные вызовы с одинаковым ключом выполняются один раз
+
+Первый вызов (лидер) запускает работу отдельной задачей, остальные ждут тот же
+результат (или ту же ошибку). Отключение клиента лидера не отменяет работу
+для остальных ожидающих.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Группа single-flight вызовов"""
+    
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0
+        }
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет func() или присоединяется к уже выполняющемуся вызову с тем же ключом"""
+        task = self._in_flight.get(key)
+        
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+            logger.debug(f"🔗 {self.name}: joined in-flight call")
+        
+        # shield: отмена одного ожидающего не отменяет общую работу
+        return await asyncio.shield(task)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики объединения"""
+        total = self.stats["executions"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight),
+            "coalesce_rate": self.stats["coalesced"] / total if total else 0.0
+        }
@@ -0,0 +1,160 @@
+# ====================================
+# ФАЙЛ: backend/services/snippet_selector.py (НОВЫЙ ФАЙЛ)
+# Выбор фрагмента документа для показа в результатах поиска
+# ====================================
+
+"""
+Snippet Selector - Лучший фрагмент документа за один проход по тексту
+
+- Все вхождения слов запроса находятся одним скомпилированным регулярным
+  выражением (альтернация, кэш по запросу)
+- Самое плотное окно выбирается по префиксным суммам весов вхождений
+  (редкие в документе слова весят больше, чтобы окно покрывало разные слова)
+- Границы окна привязываются к границам предложений или слов
+- Возвращаются смещения подсветки относительно текста фрагмента
+"""
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Pattern, Tuple
+
+_EDGE_PUNCTUATION = ".,;:!?()[]{}\"'«»“”"
+_SENTENCE_END_RE = re.compile(r'[.!?…]["»”)]*\s+|\n\s*\n')
+_ELLIPSIS = "..."
+
+@dataclass
+class Snippet:
+    """Фрагмент документа с подсветкой"""
+    text: str
+    start: int  # Смещение фрагмента в исходном тексте
+    end: int
+    highlights: List[Tuple[int, int]] = field(default_factory=list)  # Смещения в text
+    matches: int = 0
+
+@lru_cache(maxsize=1024)
+def compile_query(query: str, ignore_case: bool = False) -> Optional[Pattern]:
+    """Одно регулярное выражение для всех слов запроса (длинные слова первыми)"""
+    words = {word.strip(_EDGE_PUNCTUATION) for word in query.lower().split()}
+    words = sorted((word for word in words if word), key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE if ignore_case else 0)
+
+def find_occurrences(content: str, query: str) -> List[Tuple[int, int, str]]:
+    """Все вхождения слов запроса за один проход: (начало, конец, слово)"""
+    lowered = content.lower()
+    if len(lowered) == len(content):
+        # Поиск по строке в нижнем регистре заметно быстрее re.IGNORECASE
+        pattern = compile_query(query)
+        text = lowered
+    else:
+        # lower() изменил длину (редкие символы) - смещения считаем по исходному тексту
+        pattern = compile_query(query, ignore_case=True)
+        text = content
+    if pattern is None:
+        return []
+    return [(m.start(), m.end(), m.group().lower()) for m in pattern.finditer(text)]
+
+class SnippetSelector:
+    """Выбирает самое плотное по словам запроса окно текста"""
+    
+    def __init__(self, max_length: int = 400, snap_distance: int = 80):
+        self.max_length = max_length
+        self.snap_distance = snap_distance
+    
+    def select(self, content: str, query: str, max_length: Optional[int] = None) -> Snippet:
+        """Фрагмент content длиной не более max_length с подсветкой слов query"""
+        max_length = max_length or self.max_length
+        occurrences = find_occurrences(content, query)
+        
+        if len(content) <= max_length:
+            return Snippet(content, 0, len(content),
+                           [(start, end) for start, end, _ in occurrences], len(occurrences))
+        
+        if not occurrences:
+            # Нет совпадений - начало документа
+            end = self._snap_end(content, 0, max_length)
+            return self._build(content, 0, end, [])
+        
+        start, end = self._densest_window(content, occurrences, max_length)
+        start = self._snap_start(content, start, end, occurrences)
+        end = self._snap_end(content, start, max_length)
+        return self._build(content, start, end, occurrences)
+    
+    def _densest_window(self, content: str, occurrences: List[Tuple[int, int, str]],
+                        max_length: int) -> Tuple[int, int]:
+        """Окно с максимальной суммой весов вхождений (префиксные суммы + бинарный поиск)"""
+        term_counts = {}
+        for _, _, term in occurrences:
+            term_counts[term] = term_counts.get(term, 0) + 1
+        
+        starts = [start for start, _, _ in occurrences]
+        prefix = [0.0]
+        for _, _, term in occurrences:
+            prefix.append(prefix[-1] + 1.0 / term_counts[term])
+        
+        best_score, best_i, best_j = -1.0, 0, 1
+        for i, (start, _, _) in enumerate(occurrences):
+            # Вхождения, начинающиеся в окне [start, start + max_length)
+            j = bisect.bisect_left(starts, start + max_length, lo=i)
+            score = prefix[j] - prefix[i]
+            if score > best_score:
+                best_score, best_i, best_j = score, i, j
+        
+        # Центрируем окно вокруг найденных вхождений
+        first_start = occurrences[best_i][0]
+        last_end = min(occurrences[best_j - 1][1], first_start + max_length)
+        slack = max_length - (last_end - first_start)
+        start = max(0, min(first_start - slack // 2, len(content) - max_length))
+        return start, start + max_length
+    
+    def _snap_start(self, content: str, start: int, end: int, occurrences: List[Tuple[int, int, str]]) -> int:
+        """Сдвигает начало к ближайшему началу предложения (не дальше первого вхождения в окне)"""
+        if start == 0:
+            return 0
+        
+        first_match = next((s for s, _, _ in occurrences if s >= start), start)
+        window_start = max(0, start - self.snap_distance)
+        best = None
+        for match in _SENTENCE_END_RE.finditer(content, window_start, min(first_match, end)):
+            if match.end() <= first_match and (best is None or abs(match.end() - start) < abs(best - start)):
+                best = match.end()
+        if best is not None:
+            return best
+        
+        # Начало слова
+        space = content.rfind(" ", window_start, start + 1)
+        return space + 1 if space != -1 else start
+    
+    def _snap_end(self, content: str, start: int, max_length: int) -> int:
+        """Конец окна по концу предложения (в последней четверти) или по границе слова"""
+        limit = min(len(content), start + max_length)
+        if limit == len(content):
+            return limit
+        
+        best = None
+        for match in _SENTENCE_END_RE.finditer(content, start + max_length * 3 // 4, limit):
+            best = match.start() + 1
+        if best is not None:
+            return best
+        
+        space = content.rfind(" ", start, limit)
+        return space if space > start else limit
+    
+    @staticmethod
+    def _build(content: str, start: int, end: int, occurrences: List[Tuple[int, int, str]]) -> Snippet:
+        """Текст фрагмента с многоточиями и смещения подсветки в нем"""
+        body = content[start:end].strip()
+        lead = len(content[start:end]) - len(content[start:end].lstrip())
+        body_start = start + lead
+        
+        prefix = _ELLIPSIS if body_start > 0 else ""
+        suffix = _ELLIPSIS if end < len(content) else ""
+        highlights = [
+            (match_start - body_start + len(prefix), match_end - body_start + len(prefix))
+            for match_start, match_end, _ in occurrences
+            if match_start >= body_start and match_end <= body_start + len(body)
+        ]
+        return Snippet(prefix + body + suffix, body_start, body_start + len(body), highlights, len(highlights))
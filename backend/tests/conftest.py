@@ -0,0 +1,9 @@
+# ====================================
+# ФАЙЛ: backend/tests/conftest.py (НОВЫЙ ФАЙЛ)
+# Общая настройка pytest: пакеты backend импортируются как при запуске сервера
+# ====================================
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
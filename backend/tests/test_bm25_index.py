@@ -0,0 +1,263 @@
+# ====================================
+# ФАЙЛ: backend/tests/test_bm25_index.py (НОВЫЙ ФАЙЛ)
+# Тесты BM25 индекса и гибридного объединения результатов (без ChromaDB)
+# ====================================
+
+import math
+import random
+import threading
+from collections import Counter
+
+import pytest
+
+from services.bm25_index import BM25Index, tokenize
+from services.chroma_service import ChromaDBService, _compile_where
+from services.snippet_selector import SnippetSelector
+
+STATUTE = "S.I. No. 123 of 2019"
+
+VOCABULARY = ("tenant landlord notice period rent deposit court order statute section employer "
+              "employee dismissal wage contract pension appeal tribunal regulation schedule").split()
+
+def build_corpus(seed: int = 7, documents: int = 40, chunks: int = 4) -> dict:
+    """Документы из случайных слов: частые и редкие термины с фиксированным seed"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+    return {
+        f"doc{doc}": [" ".join(rng.choices(VOCABULARY, weights, k=rng.randint(5, 60))) for _ in range(chunks)]
+        for doc in range(documents)
+    }
+
+def exhaustive_scores(corpus: dict, query: str, k1: float = 1.2, b: float = 0.75) -> dict:
+    """BM25 каждого чанка полным перебором: (doc_id, chunk_index) → (балл, найдено терминов)"""
+    chunks = {(doc_id, index): Counter(tokenize(text))
+              for doc_id, texts in corpus.items() for index, text in enumerate(texts)}
+    average_length = sum(sum(terms.values()) for terms in chunks.values()) / len(chunks)
+    terms = set(tokenize(query))
+    df = {term: sum(1 for counts in chunks.values() if term in counts) for term in terms}
+    
+    scores = {}
+    for key, counts in chunks.items():
+        length = sum(counts.values())
+        score, matched = 0.0, 0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf:
+                idf = math.log(1 + (len(chunks) - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+                matched += 1
+        if matched:
+            scores[key] = (score, matched)
+    return scores
+
+def build_index(corpus: dict) -> BM25Index:
+    index = BM25Index()
+    for doc_id, chunks in corpus.items():
+        index.add_document(doc_id, chunks, revision=f"rev-{doc_id}")
+    return index
+
+@pytest.mark.parametrize("query", [
+    "tenant notice",                         # частые термины
+    "tribunal schedule regulation",          # редкие термины
+    "tenant landlord notice pension appeal"  # частые и редкие - срабатывает MaxScore
+])
+@pytest.mark.parametrize("per_document", [True, False])
+def test_maxscore_matches_exhaustive_scoring(query, per_document):
+    corpus = build_corpus()
+    expected = exhaustive_scores(corpus, query)
+    if per_document:
+        best = {}
+        for (doc_id, chunk_index), value in expected.items():
+            if doc_id not in best or value[0] > best[doc_id][1][0]:
+                best[doc_id] = ((doc_id, chunk_index), value)
+        expected = dict(best.values())
+    
+    hits = build_index(corpus).search(query, limit=10, per_document=per_document)
+    
+    expected_top = sorted((value[0] for value in expected.values()), reverse=True)[:10]
+    assert [hit["score"] for hit in hits] == pytest.approx(expected_top)
+    for hit in hits:
+        score, matched = expected[(hit["document_id"], hit["chunk_index"])]
+        assert hit["score"] == pytest.approx(score)
+        assert hit["matched_terms"] == matched
+        assert hit["query_terms"] == len(set(tokenize(query)))
+
+def test_search_respects_document_filter():
+    corpus = build_corpus()
+    allowed = {"doc3", "doc11", "doc20"}
+    
+    hits = build_index(corpus).search("tenant notice pension", limit=5, doc_filter=allowed.__contains__)
+    
+    assert hits and {hit["document_id"] for hit in hits} <= allowed
+
+def test_save_load_round_trip(tmp_path):
+    corpus = build_corpus()
+    index = build_index(corpus)
+    index.remove_document("doc5")
+    index.add_document("doc6", ["court order appeal", "tribunal schedule"], revision=42)
+    path = str(tmp_path / "keyword_index.json")
+    
+    index.save(path)
+    loaded = BM25Index.load(path)
+    
+    assert loaded.get_stats() == index.get_stats()
+    assert not loaded.has_document("doc5")
+    assert loaded.get_revision("doc6") == 42
+    assert loaded.get_revision("doc7") == "rev-doc7"
+    for query in ("tenant notice", "tribunal schedule appeal", "court"):
+        assert loaded.search(query, limit=8, per_document=False) == index.search(query, limit=8, per_document=False)
+
+def test_load_rejects_unknown_version(tmp_path):
+    path = tmp_path / "keyword_index.json"
+    path.write_text('{"version": 999}', encoding="utf-8")
+    
+    with pytest.raises(ValueError):
+        BM25Index.load(str(path))
+
+def test_statute_reference_terms_are_indexed():
+    # Номера актов сохраняются токенизатором: лексический поиск находит точную ссылку
+    index = BM25Index()
+    index.add_document("statute", [f"Notice periods are set by {STATUTE}."])
+    index.add_document("other", ["S.I. No. 45 of 2017 on minimum wage."])
+    
+    hits = index.search(STATUTE, limit=2)
+    
+    assert hits[0]["document_id"] == "statute"
+    assert hits[0]["matched_terms"] == hits[0]["query_terms"]
+
+# ====================================
+# RECIPROCAL RANK FUSION
+# ====================================
+
+def make_fusion_service(records: dict) -> ChromaDBService:
+    """ChromaDBService только с состоянием, нужным _fuse_results; коллекция заменена словарем"""
+    service = ChromaDBService.__new__(ChromaDBService)
+    service.rrf_k = 60
+    service.snippet_selector = SnippetSelector(max_length=400)
+    service.retrieval_stats = {"keyword_only_results": 0}
+    service._get_keyword_records = lambda hits: {
+        (hit["document_id"], hit["chunk_index"]): records[hit["document_id"]]
+        for hit in hits if hit["document_id"] in records
+    }
+    return service
+
+def vector_result(service: ChromaDBService, doc_id: str, content: str, relevance: float) -> dict:
+    return service._format_result(STATUTE, doc_id, content, {"filename": f"{doc_id}.txt"},
+                                  relevance, 2.0 - 2.0 * relevance)
+
+def test_rrf_combines_both_rankings():
+    query = "notice period"
+    service = make_fusion_service({"keyword": ("keyword", "A notice period applies.", {"filename": "keyword.txt"})})
+    vector_results = [vector_result(service, doc_id, "Renting a home.", 0.8) for doc_id in ("first", "both")]
+    keyword_hits = [{"document_id": "both", "chunk_index": 0, "score": 4.0, "matched_terms": 2, "query_terms": 2},
+                    {"document_id": "keyword", "chunk_index": 0, "score": 2.0, "matched_terms": 2, "query_terms": 2}]
+    
+    fused = service._fuse_results(query, vector_results, keyword_hits, 5, 0.3)
+    
+    assert [result["document_id"] for result in fused] == ["both", "first", "keyword"]
+    assert fused[0]["search_info"]["rrf_score"] == round(1 / 62 + 1 / 61, 6)
+    assert fused[2]["search_info"]["retrievers"] == ["keyword"]
+
+def test_low_coverage_keyword_hits_are_dropped():
+    service = make_fusion_service({"partial": ("partial", "Notice only.", {"filename": "partial.txt"})})
+    keyword_hits = [{"document_id": "partial", "chunk_index": 0, "score": 1.0, "matched_terms": 1, "query_terms": 4}]
+    
+    assert service._fuse_results("notice period for tenants", [], keyword_hits, 5, 0.3) == []
+
+def test_exact_reference_wins_rrf_tie():
+    statute_text = f"The Residential Tenancies Regulations ({STATUTE}) set the notice periods."
+    service = make_fusion_service({"statute": ("statute", statute_text, {"filename": "statute.txt"})})
+    
+    vector_results = [vector_result(service, "weak", "General guidance on renting a home in Ireland.", 0.4)]
+    keyword_hits = [{"document_id": "statute", "chunk_index": 0, "score": 7.5,
+                     "matched_terms": 4, "query_terms": 4}]
+    
+    fused = service._fuse_results(STATUTE, vector_results, keyword_hits, 5, 0.3)
+    
+    assert [result["document_id"] for result in fused] == ["statute", "weak"]
+    assert fused[0]["exact_match"]
+    assert fused[0]["search_info"]["retrievers"] == ["keyword"]
+    assert fused[0]["search_info"]["rrf_score"] == fused[1]["search_info"]["rrf_score"]
+    assert service.retrieval_stats["keyword_only_results"] == 1
+
+def test_exact_reference_survives_result_limit():
+    statute_text = f"Notice periods are set by {STATUTE}."
+    service = make_fusion_service({"statute": ("statute", statute_text, {"filename": "statute.txt"})})
+    
+    vector_results = [vector_result(service, "weak", "Renting a home.", 0.4)]
+    keyword_hits = [{"document_id": "statute", "chunk_index": 0, "score": 7.5,
+                     "matched_terms": 4, "query_terms": 4}]
+    
+    fused = service._fuse_results(STATUTE, vector_results, keyword_hits, 1, 0.3)
+    
+    assert [result["document_id"] for result in fused] == ["statute"]
+
+def test_exact_keyword_chunk_replaces_vector_chunk():
+    # Документ найден обоими поисками, но векторный чанк не содержит ссылку
+    service = make_fusion_service({
+        "statute": ("statute_chunk_2", f"Schedule 2 of {STATUTE}.", {"filename": "statute.txt", "is_chunk": True})
+    })
+    vector_results = [vector_result(service, "statute", "Introductory provisions.", 0.6)]
+    keyword_hits = [{"document_id": "statute", "chunk_index": 2, "score": 5.0,
+                     "matched_terms": 4, "query_terms": 4}]
+    
+    fused = service._fuse_results(STATUTE, vector_results, keyword_hits, 5, 0.3)
+    
+    assert len(fused) == 1
+    assert fused[0]["exact_match"]
+    assert STATUTE in fused[0]["full_content"]
+    assert fused[0]["search_info"]["retrievers"] == ["vector", "keyword"]
+
+def test_chunk_fusion_keeps_chunks_of_one_document():
+    # Контекст LLM: чанки одного документа не схлопываются в один результат
+    query = "notice period"
+    service = make_fusion_service({})
+    chunk = lambda index, text, relevance: service._format_result(
+        query, f"lease_chunk_{index}", text,
+        {"filename": "lease.txt", "is_chunk": True, "chunk_index": index, "parent_document_id": "lease"},
+        relevance, 2.0 - 2.0 * relevance
+    )
+    vector_results = [chunk(0, "The notice period is 28 days.", 0.8), chunk(3, "A longer notice period applies.", 0.7)]
+    keyword_hits = [{"document_id": "lease", "chunk_index": 3, "score": 3.0, "matched_terms": 2, "query_terms": 2}]
+    
+    fused = service._fuse_results(query, vector_results, keyword_hits, 5, 0.3, per_document=False)
+    
+    assert [result["metadata"]["chunk_index"] for result in fused] == [3, 0]
+    assert fused[0]["search_info"]["retrievers"] == ["vector", "keyword"]
+
+# ====================================
+# ФИЛЬТРЫ МЕТАДАННЫХ ЛЕКСИЧЕСКОГО ПОИСКА
+# ====================================
+
+@pytest.mark.parametrize("where, expected", [
+    ({"category": "court"}, {"judgment"}),
+    ({"category": {"$eq": "court"}}, {"judgment"}),
+    ({"category": {"$ne": "court"}}, {"act", "guide"}),
+    ({"category": {"$in": ["court", "legislation"]}}, {"judgment", "act"}),
+    ({"category": {"$nin": ["court", "legislation"]}}, {"guide"}),
+    ({"year": {"$gte": 2019}}, {"act", "judgment"}),
+    ({"year": {"$lt": 2020}}, {"act"}),  # Год-строка не сравнивается с числом
+    ({"year": {"$gt": 2018, "$lte": 2020}}, {"act"}),
+    ({"$or": [{"category": "guide"}, {"year": {"$gt": 2020}}]}, {"guide", "judgment"}),
+    ({"$and": [{"category": {"$in": ["court", "legislation"]}}, {"year": {"$lt": 2021}}]}, {"act"})
+])
+def test_keyword_filter_supports_where_operators(where, expected):
+    service = ChromaDBService.__new__(ChromaDBService)
+    service.keyword_index = BM25Index()
+    service._keyword_lock = threading.Lock()
+    service._keyword_metadata = {
+        "act": {"category": "legislation", "year": 2019},
+        "judgment": {"category": "court", "year": 2022},
+        "guide": {"category": "guide", "year": "unknown"}
+    }
+    for doc_id in service._keyword_metadata:
+        service.keyword_index.add_document(doc_id, [f"Tenant notice period rules in the {doc_id}."])
+    hits = service._keyword_query("tenant notice", 10, _compile_where(where))
+    
+    assert {hit["document_id"] for hit in hits} == expected
+
+def test_unsupported_where_operator_is_rejected():
+    with pytest.raises(ValueError):
+        _compile_where({"category": {"$contains": "court"}})
+    with pytest.raises(ValueError):
+        _compile_where({"$not": {"category": "court"}})
@@ -0,0 +1,37 @@
+# ====================================
+# ФАЙЛ: backend/tests/test_context_packer.py (НОВЫЙ ФАЙЛ)
+# Тесты упаковки фрагментов в контекст LLM
+# ====================================
+
+from services.context_packer import ContextPacker
+
+SHARED = "The landlord must give written notice before ending the tenancy."
+
+def test_skipped_chunk_does_not_hide_its_sentences():
+    packer = ContextPacker(token_budget=4000, min_chunk_tokens=32)
+    documents = [
+        {"document_id": "a", "filename": "a.txt", "content": "Intro text about leases in Ireland today."},
+        # Почти целиком повторяет первый фрагмент - пропускается
+        {"document_id": "b", "filename": "b.txt",
+         "content": f"Intro text about leases in Ireland today. {SHARED}"},
+        {"document_id": "c", "filename": "c.txt",
+         "content": f"{SHARED} Notice periods depend on the length of the tenancy and are set by statute."}
+    ]
+    
+    packed = packer.pack(documents)
+    
+    assert [chunk["doc_key"] for chunk in packed.chunks] == ["a", "c"]
+    assert packed.skipped_duplicates == 1
+    assert SHARED in packed.text
+
+def test_repeated_sentences_are_removed():
+    packer = ContextPacker(token_budget=4000, min_chunk_tokens=4)
+    documents = [
+        {"document_id": "a", "filename": "a.txt", "content": f"{SHARED} Rent is paid monthly in advance by the tenant."},
+        {"document_id": "b", "filename": "b.txt", "content": f"{SHARED} Deposits are held by the Residential Tenancies Board."}
+    ]
+    
+    packed = packer.pack(documents)
+    
+    assert packed.text.count(SHARED) == 1
+    assert "Deposits are held" in packed.text
@@ -0,0 +1,61 @@
+# ====================================
+# ФАЙЛ: backend/tests/test_embedding_cache.py (НОВЫЙ ФАЙЛ)
+# Тесты дискового кэша эмбеддингов
+# ====================================
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services import embedding_cache
+from services.embedding_cache import EmbeddingCache
+
+def vector_for(text: str) -> np.ndarray:
+    return np.full(8, float(len(text)), dtype=np.float32)
+
+def test_concurrent_writes_keep_rows_aligned(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    batches = [[f"chunk {worker}-{index}" * (1 + index % 3) for index in range(50)] for worker in range(8)]
+    
+    def write_and_read(texts):
+        cache.put_many(texts, [vector_for(text) for text in texts])
+        return cache.get_many(texts)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for texts, vectors in zip(batches, pool.map(write_and_read, batches)):
+            for text, vector in zip(texts, vectors):
+                assert np.array_equal(vector, vector_for(text))
+    
+    # Ключи и векторы на диске согласованы после перезапуска
+    reopened = EmbeddingCache(str(tmp_path), "test-model")
+    texts = [text for batch in batches for text in batch]
+    assert reopened.get_stats()["entries"] == len(set(texts))
+    for text, vector in zip(texts, reopened.get_many(texts)):
+        assert np.array_equal(vector, vector_for(text))
+
+def test_failed_keys_write_does_not_shift_later_rows(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    cache.put_many(["first"], [vector_for("first")])
+    
+    real_open = open
+    def failing_open(path, mode="r", *args, **kwargs):
+        handle = real_open(path, mode, *args, **kwargs)
+        if path == cache.keys_path and mode == "a":
+            # Ключи дописаны частично, затем ошибка диска
+            handle.write("deadbeef")
+            handle.close()
+            raise OSError("disk full")
+        return handle
+    
+    monkeypatch.setattr(embedding_cache, "open", failing_open, raising=False)
+    cache.put_many(["lost text"], [vector_for("lost text")])
+    monkeypatch.undo()
+    
+    assert cache.get_many(["lost text"]) == [None]
+    cache.put_many(["second row"], [vector_for("second row")])
+    
+    for current in (cache, EmbeddingCache(str(tmp_path), "test-model")):
+        first, second, lost = current.get_many(["first", "second row", "lost text"])
+        assert np.array_equal(first, vector_for("first"))
+        assert np.array_equal(second, vector_for("second row"))
+        assert lost is None
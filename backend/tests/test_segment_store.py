@@ -0,0 +1,91 @@
+# ====================================
+# ФАЙЛ: backend/tests/test_segment_store.py (НОВЫЙ ФАЙЛ)
+# Тесты append-only хранилища документов SimpleVectorDB
+# ====================================
+
+import os
+
+from services.segment_store import SegmentStore
+
+def make_store(directory, **options) -> SegmentStore:
+    options.setdefault("fsync", False)
+    return SegmentStore(str(directory), summarize=lambda record: {"title": record["title"]}, **options)
+
+def record(doc_id: str, title: str = "", size: int = 10) -> dict:
+    return {"id": doc_id, "title": title or doc_id, "content": "x" * size}
+
+def test_records_after_checkpoint_are_replayed(tmp_path):
+    store = make_store(tmp_path, index_flush_interval=1000)
+    store.put(record("a"))
+    store.flush()  # Контрольная точка: в индексе только "a"
+    store.put(record("b"))
+    store.put(record("a", title="a v2"))
+    store.delete("b")
+    # Без close(): эмулируем аварийное завершение после записи журнала
+    
+    reopened = make_store(tmp_path)
+    
+    assert reopened.stats["recovered_records"] == 3
+    assert reopened.ids() == ["a"]
+    assert reopened.get_summary("a") == {"title": "a v2"}
+    assert reopened.get("a")["title"] == "a v2"
+    reopened.close()
+
+def test_torn_tail_record_is_truncated_on_reopen(tmp_path):
+    store = make_store(tmp_path, index_flush_interval=1000)
+    store.put(record("a"))
+    store.put(record("b"))
+    segment_path = store._segment_path(store.active_segment)
+    intact_size = os.path.getsize(segment_path)
+    
+    # Недописанная запись: заголовок и часть payload
+    with open(segment_path, "ab") as f:
+        f.write(b"SVR1\x01\x40\x00\x00\x00\x00\x00\x00\x00{\"id\":\"c\"")
+    
+    reopened = make_store(tmp_path)
+    
+    assert os.path.getsize(segment_path) == intact_size
+    assert reopened.stats["truncated_bytes"] > 0
+    assert sorted(reopened.ids()) == ["a", "b"]
+    
+    # Новые записи дописываются после обрезанного хвоста и переживают повторное открытие
+    reopened.put(record("c"))
+    reopened.close()
+    assert sorted(make_store(tmp_path).ids()) == ["a", "b", "c"]
+
+def test_compaction_keeps_only_live_records(tmp_path):
+    store = make_store(tmp_path, compaction_min_bytes=1 << 30)
+    for index in range(10):
+        store.put(record(f"doc{index}", size=200))
+    for index in range(10):
+        store.put(record(f"doc{index}", title=f"v2 {index}", size=200))
+    store.delete_many([f"doc{index}" for index in range(5)])
+    old_segments = list(store.segments)
+    
+    result = store.compact()
+    
+    assert result["live_records"] == 5
+    assert result["bytes_after"] < result["bytes_before"]
+    assert store.get_stats()["dead_bytes"] == 0
+    assert not any(os.path.exists(store._segment_path(segment)) for segment in old_segments)
+    assert [item["title"] for item in store.iter_records()] == [f"v2 {index}" for index in range(5, 10)]
+    store.close()
+    
+    reopened = make_store(tmp_path)
+    assert sorted(reopened.ids()) == [f"doc{index}" for index in range(5, 10)]
+    assert reopened.get("doc7")["title"] == "v2 7"
+    reopened.close()
+
+def test_delete_many_survives_reopen(tmp_path):
+    store = make_store(tmp_path, index_flush_interval=1000)
+    for doc_id in ("a", "b", "c", "d"):
+        store.put(record(doc_id))
+    
+    deleted = store.delete_many(["b", "d", "b", "missing"])
+    
+    assert deleted == ["b", "d"]
+    # Без close(): удаления восстанавливаются из журнала
+    reopened = make_store(tmp_path)
+    assert sorted(reopened.ids()) == ["a", "c"]
+    assert reopened.get("b") is None
+    reopened.close()
@@ -25,6 +25,23 @@ import DocumentsTable from './admin/DocumentsTable';
 import Notification from './common/Notification';
 import URLScraper from './URLScraper';
 
+const DOCUMENTS_PAGE_SIZE = 100;
+
+const formatDocument = (doc: any, index: number): Document => ({
+  id: doc.id || `doc_${index}_${Date.now()}`,
+  filename: doc.filename,
+  content: doc.content,
+  category: doc.category,
+  size: doc.size,
+  source: doc.source || 'Unknown',
+  original_url: doc.original_url || 'N/A',
+  word_count: doc.word_count || 0,
+  chunks_count: doc.chunks_count || 0,
+  added_at: doc.added_at || Date.now() / 1000, // Добавляем текущее время если нет даты
+  metadata: doc.metadata || {},
+  content_truncated: doc.content_truncated || false
+});
+
 const AdminDashboard: React.FC = () => {
   const { t } = useTranslation();
   
@@ -33,6 +50,9 @@ const AdminDashboard: React.FC = () => {
   const [filteredDocuments, setFilteredDocuments] = useState<Document[]>([]);
   const [stats, setStats] = useState<AdminStats>({ total_documents: 0, total_chats: 0, categories: [] });
   const [isLoading, setIsLoading] = useState<boolean>(true);
+  const [totalDocuments, setTotalDocuments] = useState<number>(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState<boolean>(false);
   
   // Модальные окна
   const [showUploadModal, setShowUploadModal] = useState<boolean>(false);
@@ -52,7 +72,7 @@ const AdminDashboard: React.FC = () => {
   // Эффекты
   useEffect(() => {
     loadData();
-  }, []);
+  }, [selectedCategory]);
 
   useEffect(() => {
     filterDocuments();
@@ -68,38 +88,40 @@ const AdminDashboard: React.FC = () => {
     }));
   }, []);
 
+  // Страница документов (фильтр по категории и курсор на сервере)
+  const fetchDocumentsPage = (cursor?: string | null) => {
+    return axios.get<DocumentsResponse>('/api/admin/documents', {
+      params: {
+        limit: DOCUMENTS_PAGE_SIZE,
+        category: selectedCategory || undefined,
+        cursor: cursor || undefined,
+        _t: new Date().getTime()
+      }
+    });
+  };
+
   // Загрузка данных
   const loadData = async (): Promise<void> => {
     setIsLoading(true);
     try {
       const timestamp = new Date().getTime();
       const [documentsResponse, statsResponse] = await Promise.all([
-        axios.get<DocumentsResponse>(`/api/admin/documents?_t=${timestamp}`),
+        fetchDocumentsPage(),
         axios.get<AdminStats>(`/api/admin/stats?_t=${timestamp}`)
       ]);
       
       const docs = documentsResponse.data.documents || [];
-      const formattedDocs = docs.map((doc: any, index: number) => ({
-        id: doc.id || `doc_${index}_${Date.now()}`,
-        filename: doc.filename,
-        content: doc.content,
-        category: doc.category,
-        size: doc.size,
-        source: doc.source || 'Unknown',
-        original_url: doc.original_url || 'N/A',
-        word_count: doc.word_count || 0,
-        chunks_count: doc.chunks_count || 0,
-        added_at: doc.added_at || Date.now() / 1000, // Добавляем текущее время если нет даты
-        metadata: doc.metadata || {}
-      }));
+      const formattedDocs = docs.map(formatDocument);
       
       setDocuments(formattedDocs);
+      setTotalDocuments(documentsResponse.data.total);
+      setNextCursor(documentsResponse.data.next_cursor || null);
       
       const serverStats = statsResponse.data;
       setStats({
         ...serverStats,
-        total_documents: formattedDocs.length,
-        categories: Array.from(new Set(formattedDocs.map(doc => doc.category)))
+        total_documents: selectedCategory ? serverStats.total_documents : documentsResponse.data.total,
+        categories: serverStats.categories || Array.from(new Set(formattedDocs.map(doc => doc.category)))
       });
       
     } catch (error) {
@@ -110,6 +132,24 @@ const AdminDashboard: React.FC = () => {
     }
   };
 
+  // Следующая страница документов
+  const loadMoreDocuments = async (): Promise<void> => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const response = await fetchDocumentsPage(nextCursor);
+      const docs = (response.data.documents || []).map(formatDocument);
+      setDocuments(prevDocs => [...prevDocs, ...docs]);
+      setTotalDocuments(response.data.total);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (error) {
+      console.error('Error loading documents:', error);
+      showNotification(t('common.error'), 'error');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   // Фильтрация документов
   const filterDocuments = (): void => {
     let filtered = [...documents];
@@ -219,8 +259,20 @@ const AdminDashboard: React.FC = () => {
     }
   };
 
-  const handleViewDocument = (doc: Document): void => {
-    setSelectedDocument(doc);
+  const handleViewDocument = async (doc: Document): Promise<void> => {
+    let fullDoc = doc;
+    if (doc.content_truncated) {
+      // The list only carries a preview; load the full text on demand
+      try {
+        const response = await axios.get<Document>(`/api/admin/documents/${encodeURIComponent(String(doc.id))}`);
+        fullDoc = { ...doc, ...response.data };
+      } catch (error) {
+        console.error('Error loading document:', error);
+        showNotification(t('common.error'), 'error');
+        return;
+      }
+    }
+    setSelectedDocument(fullDoc);
     setShowDocumentModal(true);
   };
 
@@ -381,22 +433,33 @@ const AdminDashboard: React.FC = () => {
               {filteredDocuments.length > 0 && (
                 <div className="mt-4 flex items-center justify-between">
                   <div className="text-sm text-gray-700">
-                    Showing {filteredDocuments.length} of {documents.length} documents
+                    Showing {filteredDocuments.length} of {totalDocuments} documents
                     {searchTerm && (
                       <span className="ml-1">matching "{searchTerm}"</span>
                     )}
                   </div>
-                  {searchTerm && (
-                    <button
-                      onClick={() => {
-                        setSearchTerm('');
-                        setSelectedCategory('');
-                      }}
-                      className="text-sm text-blue-600 hover:text-blue-800"
-                    >
-                      Clear filters
-                    </button>
-                  )}
+                  <div className="flex items-center space-x-4">
+                    {nextCursor && (
+                      <button
+                        onClick={loadMoreDocuments}
+                        disabled={isLoadingMore}
+                        className="text-sm text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+                      >
+                        {isLoadingMore ? t('common.loading') : 'Load more'}
+                      </button>
+                    )}
+                    {searchTerm && (
+                      <button
+                        onClick={() => {
+                          setSearchTerm('');
+                          setSelectedCategory('');
+                        }}
+                        className="text-sm text-blue-600 hover:text-blue-800"
+                      >
+                        Clear filters
+                      </button>
+                    )}
+                  </div>
                 </div>
               )}
             </div>
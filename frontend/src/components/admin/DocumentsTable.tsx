@@ -1,5 +1,6 @@
 import React from 'react';
 import { useTranslation } from 'react-i18next';
+import axios from 'axios';
 import { 
   FileText, 
   Eye, 
@@ -52,8 +53,19 @@ const DocumentsTable: React.FC<DocumentsTableProps> = ({
     return t(`admin.categories.${category}`) || category;
   };
 
-  const handleDownload = (doc: Document): void => {
-    const blob = new Blob([doc.content], { type: 'text/plain' });
+  const handleDownload = async (doc: Document): Promise<void> => {
+    let content = doc.content;
+    if (doc.content_truncated) {
+      // The list only carries a preview; fetch the full text for the download
+      try {
+        const response = await axios.get<Document>(`/api/admin/documents/${encodeURIComponent(String(doc.id))}`);
+        content = response.data.content;
+      } catch (error) {
+        console.error('Error downloading document:', error);
+        return;
+      }
+    }
+    const blob = new Blob([content], { type: 'text/plain' });
     const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
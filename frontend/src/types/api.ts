@@ -55,11 +55,14 @@ export interface Document {
   added_at: number; // Unix timestamp
   metadata?: any;
   uploadDate?: string; // Deprecated, use added_at instead
+  content_truncated?: boolean; // content is a preview; full text via DOCUMENTS_LIST/{id}
+  total_length?: number;
 }
 
 export interface DocumentsResponse {
   documents: Document[];
   total: number;
+  next_cursor?: string | null; // Pass as `cursor` to load the next page
 }
 
 // Admin Stats Types